@@ -1,10 +1,15 @@
 import uvicorn
 from fastapi import FastAPI
 
+from app.api.v1.blobs import router as blobs_router
 from app.api.v1.chat import router as chat_router
+from app.api.v1.completions import router as completions_router
 from app.api.v1.health import router as health_router
+from app.api.v1.jobs import router as jobs_router
+from app.api.v1.ws import router as ws_router
 from app.api.v1.project_name import router as project_router
 from app.api.v1.prompt_enhance import router as prompt_router
+from app.api.v1.prompt_templates import router as prompt_templates_router
 from app.api.v1.weby import router as weby_router
 
 from app.api.v1.studio import router as studio_router
@@ -33,9 +38,14 @@ register_exception_handlers(app)
 app.include_router(prompt_router)
 app.include_router(chat_router)
 app.include_router(weby_router)
+app.include_router(completions_router)
 app.include_router(project_router)
 app.include_router(health_router)
 app.include_router(studio_router)
+app.include_router(prompt_templates_router)
+app.include_router(jobs_router)
+app.include_router(ws_router)
+app.include_router(blobs_router)
 
 if __name__ == "__main__":
     logger.info("=" * 50)
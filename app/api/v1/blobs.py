@@ -0,0 +1,79 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+
+from app.components.config import Config
+from app.schemas.types import BlobInfo, BlobUploadResponse, ErrorResponse
+from app.services.blobs.store import blob_store
+from app.utils.client.verify_api_key import verify_api_key
+from app.utils.logger import logger
+
+router = APIRouter(tags=["blobs"])
+
+MAX_FILES_PER_UPLOAD = 16
+
+# Bytes read from an upload at a time
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+async def limit_upload_size(request: Request):
+    """Refuses uploads that are too large from Content-Length, before the multipart body is parsed."""
+    content_length = request.headers.get("content-length")
+    limit = Config.BLOB_MAX_BYTES * MAX_FILES_PER_UPLOAD
+    if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload is {content_length} bytes, the limit is {limit}",
+        )
+
+
+async def _read(upload: UploadFile) -> bytes:
+    chunks = []
+    size = 0
+    while chunk := await upload.read(READ_CHUNK_SIZE):
+        size += len(chunk)
+        if size > Config.BLOB_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"{upload.filename} exceeds the limit of {Config.BLOB_MAX_BYTES} bytes",
+            )
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@router.post(
+    "/v1/blobs",
+    summary="Upload files",
+    description=(
+        "Stores the raw bytes of multipart-uploaded files by their SHA-256. The returned ids are sent as "
+        "blob_id in uploaded_files instead of base64 content."
+    ),
+    response_model=BlobUploadResponse,
+    responses={
+        401: {"model": ErrorResponse, "description": "Unauthorized"},
+        403: {"model": ErrorResponse, "description": "Forbidden"},
+        413: {"model": ErrorResponse, "description": "Upload too large"},
+    },
+    dependencies=[Depends(limit_upload_size)],
+)
+async def upload_blobs(
+        files: List[UploadFile] = File(..., description="Files to store"),
+        api_key: str = Depends(verify_api_key),
+):
+    if len(files) > MAX_FILES_PER_UPLOAD:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_FILES_PER_UPLOAD} files can be uploaded at once",
+        )
+
+    blobs = []
+    for upload in files:
+        data = await _read(upload)
+        if not data:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{upload.filename} is empty")
+        blob = blob_store.put(data, upload.content_type or "application/octet-stream")
+        blobs.append(BlobInfo(
+            id=blob.id, filename=upload.filename or blob.id, content_type=blob.content_type, size=blob.size
+        ))
+    logger.info(f"Stored {len(blobs)} blobs, {sum(blob.size for blob in blobs)} bytes")
+    return BlobUploadResponse(blobs=blobs)
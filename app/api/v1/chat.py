@@ -1,24 +1,136 @@
 import time
-from typing import AsyncGenerator, List
+from typing import AsyncGenerator, List, Optional
 
-from fastapi import status, Depends, HTTPException, APIRouter
+from fastapi import status, Depends, Header, HTTPException, APIRouter
 from openai import AsyncOpenAI, AsyncStream
 from openai.types.chat import ChatCompletionChunk, ChatCompletionSystemMessageParam, ChatCompletionUserMessageParam
-from sse_starlette import EventSourceResponse
 
 from app.components.config import Config
-from app.components.prompts.chat import CHAT_SYSTEM_PROMPT
+from app.components.prompts.registry import prompts
 from app.schemas.types import ChatCompletionResponseChunk, ErrorResponse, ChatCompletionRequest
+from app.services.blobs.store import blob_text, resolve_blob
+from app.services.streams.resumable import resumable_response, resume_response
+from app.utils.app.request_body import chat_request, json_body_openapi
 from app.utils.client.openai.openai_client import get_client
+from app.utils.client.prompt_cache import STREAM_USAGE, prefix_cache_stats, static_system_message
 from app.utils.client.serialize_object import serialize_object
+from app.utils.client.verify_api_key import api_key_header, verified_api_key
 from app.utils.logger import logger
 from app.utils.schemas.sse_event import sse_event
 
 router = APIRouter(tags=["chat"])
 
 
+async def chat_events(request: ChatCompletionRequest, client: AsyncOpenAI) -> AsyncGenerator[dict, None]:
+    """
+    Adds the file context to the conversation and returns the generation's SSE events.
+    """
+    if request.project_files:
+        logger.info(f"Request includes {len(request.project_files)} project files")
+
+        project_files_context = []
+        for file in request.project_files:
+            file_context = f"""
+Project file: {file.filename}
+```
+{file.content}
+```
+"""
+            project_files_context.append(file_context)
+
+        project_files_context = "\n".join(project_files_context)
+    else:
+        project_files_context = ""
+
+    # Static prompt first so it stays a cacheable prefix, project files in their own message
+    messages: List[ChatCompletionSystemMessageParam | ChatCompletionUserMessageParam] = [
+        static_system_message(prompts.get("chat"), request.model)
+    ]
+    if project_files_context:
+        messages.append(ChatCompletionSystemMessageParam(role="system", content=project_files_context))
+
+    conversation_messages: List[ChatCompletionUserMessageParam] = [
+        ChatCompletionUserMessageParam(**serialize_object(msg))
+        for msg in request.messages[-Config.MAX_CHAT_HISTORY_SIZE:]
+    ]
+
+    if request.uploaded_files:
+        logger.info(
+            f"Request includes {len(request.uploaded_files)} uploaded files"
+        )
+
+        uploaded_file_contexts = []
+        for file in request.uploaded_files:
+            content = file.content if file.blob_id is None else blob_text(
+                resolve_blob(file.blob_id), Config.REQUEST_MAX_FILE_BYTES
+            )
+            file_context = f"""
+File: {file.filename}
+```
+{content}
+```
+"""
+            uploaded_file_contexts.append(file_context)
+
+        files_context = "\n".join(uploaded_file_contexts)
+
+        if conversation_messages and conversation_messages[-1]["role"] == "user":
+            conversation_messages[-1]["content"] = (
+                    conversation_messages[-1]["content"]
+                    + f"\n\n## Provided Files:\n{files_context}"
+            )
+        else:
+            conversation_messages.append(
+                {"role": "user", "content": f"## Provided Files:\n{files_context}"}
+            )
+
+    messages.extend(conversation_messages)
+
+    async def stream_generator() -> AsyncGenerator[dict, None]:
+        try:
+            stream: AsyncStream[
+                ChatCompletionChunk
+            ] = await client.chat.completions.create(
+                model=request.model,
+                messages=messages,
+                stream=True,
+                temperature=request.temperature,
+                top_p=request.top_p,
+                max_tokens=request.max_tokens,
+                stream_options=STREAM_USAGE,
+                extra_body={
+                    "provider": {
+                        "order": ["deepinfra/fp4"],
+                        "allow_fallbacks": False,
+                    }
+                },
+            )
+
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    prefix_cache_stats.record("chat", chunk.usage)
+                if not chunk.choices:
+                    continue
+                response_chunk = ChatCompletionResponseChunk(data=chunk)
+                yield sse_event(response_chunk)
+
+        except Exception as stream_ex:
+            logger.exception(f"Error during chat streaming: {str(stream_ex)}")
+            error_response = ChatCompletionResponseChunk(
+                error=ErrorResponse(
+                    details=str(stream_ex),
+                    status_code=500,
+                    timestamp=time.strftime("%Y-%m-%d %H:%M:%S"),
+                )
+            )
+            yield sse_event(error_response)
+
+    return stream_generator()
+
+
 @router.post(
     "/v1/chat",
+    openapi_extra=json_body_openapi(ChatCompletionRequest),
     summary="Create a streaming chat completion with file support",
     description="Create a streaming chat completion with the provided messages and optional file context. Returns "
                 "Server-Sent Events (SSE) stream.",
@@ -43,105 +155,29 @@ router = APIRouter(tags=["chat"])
     },
 )
 async def chatty(
-        request: ChatCompletionRequest,
+        request: ChatCompletionRequest = Depends(chat_request),
+        last_event_id: Optional[str] = Header(
+            default=None, description="Id of the last event received, resumes that stream instead of starting over"
+        ),
+        # Not enforced here, a valid key makes the stream resumable and scopes it to that key
+        api_key: Optional[str] = Depends(api_key_header),
         client: AsyncOpenAI = Depends(get_client),
 ):
+    # Anonymous streams share no scope another caller could resume them from
+    owner = verified_api_key(api_key)
+    resumed = resume_response(owner, last_event_id)
+    if resumed is not None:
+        return resumed
+
     logger.info(
         f"Processing chat completion request with {len(request.messages)} messages"
     )
 
     try:
-        if request.project_files:
-            logger.info(f"Request includes {len(request.project_files)} project files")
-
-            project_files_context = []
-            for file in request.project_files:
-                file_context = f"""
-Project file: {file.file_path}
-```
-{file.content}
-```
-"""
-                project_files_context.append(file_context)
-
-            project_files_context = "\n".join(project_files_context)
-        else:
-            project_files_context = ""
-
-        messages: List[ChatCompletionSystemMessageParam | ChatCompletionUserMessageParam] = [
-            ChatCompletionSystemMessageParam(role="system", content=CHAT_SYSTEM_PROMPT + project_files_context)
-        ]
-
-        conversation_messages: List[ChatCompletionUserMessageParam] = [
-            ChatCompletionUserMessageParam(**serialize_object(msg))
-            for msg in request.messages[-Config.MAX_CHAT_HISTORY_SIZE:]
-        ]
-
-        if request.uploaded_files:
-            logger.info(
-                f"Request includes {len(request.uploaded_files)} uploaded files"
-            )
-
-            uploaded_file_contexts = []
-            for file in request.uploaded_files:
-                file_context = f"""
-File: {file.file_path}
-```
-{file.content}
-```
-"""
-                uploaded_file_contexts.append(file_context)
-
-            files_context = "\n".join(uploaded_file_contexts)
-
-            if conversation_messages and conversation_messages[-1]["role"] == "user":
-                conversation_messages[-1]["content"] = (
-                        conversation_messages[-1]["content"]
-                        + f"\n\n## Provided Files:\n{files_context}"
-                )
-            else:
-                conversation_messages.append(
-                    {"role": "user", "content": f"## Provided Files:\n{files_context}"}
-                )
-
-        messages.extend(conversation_messages)
-
-        async def stream_generator() -> AsyncGenerator[dict, None]:
-            try:
-                stream: AsyncStream[
-                    ChatCompletionChunk
-                ] = await client.chat.completions.create(
-                    model=request.model,
-                    messages=messages,
-                    stream=True,
-                    temperature=request.temperature,
-                    top_p=request.top_p,
-                    max_tokens=request.max_tokens,
-                    extra_body={
-                        "provider": {
-                            "order": ["deepinfra/fp4"],
-                            "allow_fallbacks": False,
-                        }
-                    },
-                )
-
-                async for chunk in stream:
-                    response_chunk = ChatCompletionResponseChunk(data=chunk)
-                    yield sse_event(response_chunk)
-
-            except Exception as stream_ex:
-                logger.exception(f"Error during chat streaming: {str(e)}")
-                error_response = ChatCompletionResponseChunk(
-                    error=ErrorResponse(
-                        details=str(stream_ex),
-                        status_code=500,
-                        timestamp=time.strftime("%Y-%m-%d %H:%M:%S"),
-                    )
-                )
-                yield sse_event(error_response)
+        events = await chat_events(request, client)
 
         logger.info("Starting chat SSE response stream")
-        return EventSourceResponse(stream_generator())
+        return resumable_response("chat", owner, events)
 
     except Exception as e:
         logger.exception(f"Error processing chat request: {str(e)}")
@@ -1,57 +1,166 @@
+import asyncio
 import time
-from typing import AsyncGenerator
+import uuid
+from typing import AsyncGenerator, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from openai import AsyncOpenAI, AsyncStream
 from openai.types.completion import Completion
+from openai.types.completion_choice import CompletionChoice
 from sse_starlette import EventSourceResponse
 
+from app.components.config import Config
 from app.schemas.types import CodeCompletionRequest, ErrorResponse, CodeCompletionResponseChunk
+from app.services.completions.cache import CachedCompletion, completion_cache
+from app.services.completions.sessions import completion_sessions
 from app.utils.client.openai.openai_client import get_client
+from app.utils.client.verify_api_key import verify_api_key
 from app.utils.schemas.sse_event import sse_event
 from app.utils.logger import logger
 
 router = APIRouter(tags=["code-completion"])
 
+SUPERSEDED = "Superseded by a newer completion request of this editor session"
+
+
+def _error_chunk(details: str, status_code: int) -> CodeCompletionResponseChunk:
+    return CodeCompletionResponseChunk(
+        error=ErrorResponse(
+            details=details,
+            status_code=status_code,
+            timestamp=time.strftime("%Y-%m-%d %H:%M:%S"),
+        )
+    )
+
+
+def _cached_chunk(cached: CachedCompletion, model: str) -> CodeCompletionResponseChunk:
+    return CodeCompletionResponseChunk(
+        data=Completion(
+            id=f"cmpl-cache-{uuid.uuid4().hex}",
+            object="text_completion",
+            created=int(time.time()),
+            model=model,
+            choices=[
+                CompletionChoice(index=0, text=cached.text, finish_reason=cached.finish_reason or "stop", logprobs=None)
+            ],
+        )
+    )
+
 
 @router.post(
     "/v1/completions",
     summary="Native Code Completion Endpoint (OpenAI-Compatible)",
-    description="Streams raw text completions (non-chat) for IDE-like code completion.",
-    response_model=CodeCompletionResponseChunk
+    description=(
+        "Streams raw text completions (non-chat) for IDE-like code completion. Requests with the same "
+        "X-Editor-Session header supersede each other: a new request cancels the previous one upstream."
+    ),
+    response_model=CodeCompletionResponseChunk,
+    responses={
+        401: {"model": ErrorResponse, "description": "Unauthorized"},
+        403: {"model": ErrorResponse, "description": "Forbidden"},
+        500: {"model": ErrorResponse, "description": "Internal server error"},
+    },
 )
 async def native_code_completion(
     request: CodeCompletionRequest,
+    x_editor_session: Optional[str] = Header(
+        default=None, description="Editor session whose previous in-flight completion this request replaces"
+    ),
+    api_key: str = Depends(verify_api_key),
     client: AsyncOpenAI = Depends(get_client),
 ):
     try:
         logger.info("Received native code completion request")
 
-        async def stream_response() -> AsyncGenerator[dict, None]:
-            try:
-                stream: AsyncStream[Completion] = await client.completions.create(
-                    model=request.model,
-                    prompt=request.prompt,
-                    stream=True,
-                    max_tokens=request.max_tokens,
-                    temperature=request.temperature,
-                    top_p=request.top_p,
-                    stop=request.stop,
-                    suffix=request.suffix,
-                )
+        # Sessions are scoped to the API key so clients cannot cancel each other's completions
+        session_id = f"{api_key or ''}:{x_editor_session}" if x_editor_session else None
+        generation = completion_sessions.start(session_id) if session_id else 0
+
+        cache_group = completion_cache.group_key(
+            api_key,
+            request.model, request.suffix, request.stop, request.max_tokens, request.temperature
+        )
+        cached = completion_cache.get(cache_group, request.prompt)
+        if cached is not None:
+            logger.info(f"Code completion served from cache ({len(cached.text)} chars)")
+            if session_id:
+                completion_sessions.finish(session_id, generation)
 
-                async for chunk in stream:
-                    yield sse_event(CodeCompletionResponseChunk(data=chunk))
+            async def cached_response() -> AsyncGenerator[dict, None]:
+                yield sse_event(_cached_chunk(cached, request.model))
 
+            return EventSourceResponse(cached_response())
+
+        async def produce(queue: "asyncio.Queue[Optional[CodeCompletionResponseChunk]]"):
+            try:
+                async with asyncio.timeout(Config.COMPLETION_DEADLINE):
+                    stream: AsyncStream[Completion] = await client.completions.create(
+                        model=request.model,
+                        prompt=request.prompt,
+                        stream=True,
+                        max_tokens=request.max_tokens,
+                        temperature=request.temperature,
+                        top_p=request.top_p,
+                        stop=request.stop,
+                        suffix=request.suffix,
+                    )
+                    texts = []
+                    finish_reason = None
+                    try:
+                        async for chunk in stream:
+                            if chunk.choices:
+                                texts.append(chunk.choices[0].text)
+                                finish_reason = chunk.choices[0].finish_reason or finish_reason
+                            queue.put_nowait(CodeCompletionResponseChunk(data=chunk))
+                    finally:
+                        # Closing the response stops generation upstream
+                        await stream.close()
+                # Only completions that ran to the end are cached
+                completion_cache.put(cache_group, request.prompt, "".join(texts), finish_reason)
+
+            except asyncio.CancelledError:
+                logger.info("Code completion superseded, upstream stream closed")
+                queue.put_nowait(_error_chunk(SUPERSEDED, status.HTTP_409_CONFLICT))
+            except TimeoutError:
+                logger.warning(f"Code completion exceeded the {Config.COMPLETION_DEADLINE}s deadline")
+                queue.put_nowait(
+                    _error_chunk(
+                        f"Completion exceeded the {Config.COMPLETION_DEADLINE}s deadline",
+                        status.HTTP_504_GATEWAY_TIMEOUT,
+                    )
+                )
             except Exception as stream_error:
                 logger.exception("Streaming error")
-                yield sse_event(CodeCompletionResponseChunk(
-                    error=ErrorResponse(
-                        details=str(stream_error),
-                        status_code=500,
-                        timestamp=time.strftime("%Y-%m-%d %H:%M:%S"),
-                    )
-                ))
+                queue.put_nowait(_error_chunk(str(stream_error), status.HTTP_500_INTERNAL_SERVER_ERROR))
+
+        async def stream_response() -> AsyncGenerator[dict, None]:
+            if session_id:
+                # Keystrokes in quick succession replace each other before anything is sent upstream
+                if Config.COMPLETION_DEBOUNCE_MS > 0:
+                    await asyncio.sleep(Config.COMPLETION_DEBOUNCE_MS / 1000)
+                if not completion_sessions.is_current(session_id, generation):
+                    yield sse_event(_error_chunk(SUPERSEDED, status.HTTP_409_CONFLICT))
+                    return
+
+            queue: "asyncio.Queue[Optional[CodeCompletionResponseChunk]]" = asyncio.Queue()
+            task = asyncio.create_task(produce(queue))
+            # Also runs for a task cancelled before it started
+            task.add_done_callback(lambda _: queue.put_nowait(None))
+            if session_id:
+                completion_sessions.attach(session_id, generation, task)
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    yield sse_event(item)
+                if task.cancelled():
+                    yield sse_event(_error_chunk(SUPERSEDED, status.HTTP_409_CONFLICT))
+            finally:
+                # Also reached when the client disconnects
+                task.cancel()
+                if session_id:
+                    completion_sessions.finish(session_id, generation)
 
         return EventSourceResponse(stream_response())
 
@@ -1,9 +1,17 @@
 import time
-from typing import Dict, Union
+from typing import Any, Dict
 
 from fastapi import status, APIRouter
 
+from app.components.prompts.registry import prompts
+from app.services.blobs.store import blob_store
+from app.services.completions.cache import completion_cache
+from app.services.jobs.jobs import job_manager
+from app.services.streams.resumable import resumable_streams
+from app.utils.app.compression import compression_summary
+from app.utils.cache.response_cache import project_name_cache, prompt_enhance_cache
 from app.utils.client.openai.openai_client import get_openai_client
+from app.utils.client.prompt_cache import prefix_cache_stats
 from app.utils.logger import logger
 
 router = APIRouter(tags=["health"])
@@ -13,7 +21,7 @@ router = APIRouter(tags=["health"])
     "/health",
     summary="Health check",
     description="Check if the API is running and connected to required services",
-    response_model=Dict[str, Union[str, Dict[str, str]]],
+    response_model=Dict[str, Any],
     status_code=status.HTTP_200_OK,
 )
 async def health_check():
@@ -35,4 +43,18 @@ async def health_check():
         logger.warning(f"OpenAI health check failed: {str(e)}")
         health_status["services"]["openai"] = f"error: {str(e)[:100]}"
 
+    health_status["prompt_cache"] = prefix_cache_stats.summary()
+    health_status["completion_cache"] = completion_cache.summary()
+    health_status["response_cache"] = {
+        "project_name": project_name_cache.summary(),
+        "prompt_enhance": prompt_enhance_cache.summary(),
+    }
+    health_status["jobs"] = job_manager.summary()
+    health_status["blobs"] = blob_store.summary()
+    health_status["resumable_streams"] = resumable_streams.summary()
+    health_status["compression"] = compression_summary()
+    health_status["prompts"] = {
+        name: {"loaded": prompts.is_loaded(name), "tokens": prompts.tokens(name)} for name in prompts.assets
+    }
+
     return health_status
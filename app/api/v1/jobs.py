@@ -0,0 +1,120 @@
+import json
+from typing import AsyncGenerator, AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from sse_starlette import EventSourceResponse
+
+from app.components.config import Config
+from app.schemas.types import ErrorResponse, JobEventsResponse, JobResponse
+from app.services.jobs.jobs import Job, JobLimitError, job_manager
+from app.utils.client.verify_api_key import verify_api_key
+
+router = APIRouter(tags=["jobs"])
+
+JOB_RESPONSES = {
+    401: {"model": ErrorResponse, "description": "Unauthorized"},
+    403: {"model": ErrorResponse, "description": "Forbidden"},
+    404: {"model": ErrorResponse, "description": "Job not found or expired"},
+    410: {"model": ErrorResponse, "description": "Events from the offset were dropped"},
+}
+
+
+def submit_job(kind: str, api_key: Optional[str], events: AsyncIterator[dict]) -> JSONResponse:
+    """Runs a generation's SSE events as a background job and answers 202 with the job."""
+    try:
+        job = job_manager.submit(kind, api_key, events)
+    except JobLimitError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=job.describe().model_dump(),
+        headers={"Location": f"/v1/jobs/{job.id}"},
+    )
+
+
+def _get_job(job_id: str, api_key: Optional[str]) -> Job:
+    job = job_manager.get(job_id, api_key)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return job
+
+
+def _check_offset(job: Job, offset: int):
+    if offset < job.first_offset:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Events before offset {job.first_offset} of job {job.id} were dropped",
+        )
+
+
+@router.get(
+    "/v1/jobs/{job_id}",
+    summary="Poll a job",
+    description=(
+        "Job status and its buffered events from offset on. With wait > 0 the request is held until a new "
+        "event arrives or the job finishes (long polling), for at most JOB_MAX_WAIT seconds."
+    ),
+    response_model=JobEventsResponse,
+    responses=JOB_RESPONSES,
+)
+async def poll_job(
+        job_id: str,
+        offset: int = Query(default=0, ge=0, description="Offset of the first event to return"),
+        wait: float = Query(default=0, ge=0, description="Seconds to wait for new events"),
+        api_key: str = Depends(verify_api_key),
+):
+    job = _get_job(job_id, api_key)
+    _check_offset(job, offset)
+    if wait > 0:
+        await job.wait(offset, min(wait, Config.JOB_MAX_WAIT))
+
+    events = job.events_from(offset)
+    if events is None:
+        _check_offset(job, offset)
+    return JobEventsResponse(
+        **job.describe().model_dump(),
+        offset=offset,
+        next_offset=offset + len(events),
+        events=[json.loads(event["data"]) for event in events],
+    )
+
+
+@router.get(
+    "/v1/jobs/{job_id}/stream",
+    summary="Stream a job",
+    description=(
+        "Replays the job's events from offset (or after the Last-Event-ID header) and follows it live until "
+        "it finishes. Every event carries its offset as the SSE id, so a dropped stream can be resumed."
+    ),
+    responses=JOB_RESPONSES,
+)
+async def stream_job(
+        job_id: str,
+        offset: int = Query(default=0, ge=0, description="Offset of the first event to send"),
+        last_event_id: Optional[str] = Header(default=None),
+        api_key: str = Depends(verify_api_key),
+):
+    job = _get_job(job_id, api_key)
+    if last_event_id is not None and last_event_id.isdigit():
+        offset = max(offset, int(last_event_id) + 1)
+    _check_offset(job, offset)
+
+    async def stream_events() -> AsyncGenerator[dict, None]:
+        async for event_offset, event in job.follow(offset):
+            yield {**event, "id": str(event_offset)}
+
+    return EventSourceResponse(stream_events())
+
+
+@router.delete(
+    "/v1/jobs/{job_id}",
+    summary="Cancel a job",
+    description="Cancels a queued or running job; its buffered events stay readable until the job expires.",
+    response_model=JobResponse,
+    responses=JOB_RESPONSES,
+)
+async def cancel_job(job_id: str, api_key: str = Depends(verify_api_key)):
+    job = _get_job(job_id, api_key)
+    await job_manager.cancel(job)
+    return job.describe()
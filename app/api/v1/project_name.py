@@ -1,14 +1,18 @@
 import time
+from typing import Optional
 
-from fastapi import status, Depends, HTTPException, APIRouter
+from fastapi import status, Depends, HTTPException, APIRouter, Query
+from fastapi.responses import StreamingResponse
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionSystemMessageParam, ChatCompletionUserMessageParam
 
-from app.components.prompts.features.project_name import PROJECT_NAME_SYSTEM_PROMPT
+from app.components.prompts.registry import prompts
 from app.schemas.types import ErrorResponse, ProjectNameResponse, \
-    ProjectNameRequest
+    ProjectNameRequest, ProjectNameBatchRequest
 from app.components.config import Config
 from app.utils.client.openai.openai_client import get_client
+from app.utils.batch.batch import NDJSON_MEDIA_TYPE, run_batch
+from app.utils.cache.response_cache import is_cacheable, project_name_cache
 from app.utils.client.verify_api_key import verify_api_key
 from app.utils.logger import logger
 
@@ -37,13 +41,66 @@ async def generate_project_name(
     start_time = time.time()
 
     try:
-        logger.info(f"Generating project name for prompt: '{request.prompt[:50]}...'")
+        return await create_project_name(request, client, api_key)
 
+    except Exception as e:
+        processing_time = time.time() - start_time
+        logger.exception(f"Error generating project name: {str(e)}")
+
+        if isinstance(e, HTTPException):
+            raise e
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to generate project name: {str(e)}",
+        )
+
+
+@router.post(
+    "/project_name/batch",
+    summary="Generate project names in bulk",
+    description=(
+        "Generates a project name for every item, at most BATCH_CONCURRENCY at a time. Streams one NDJSON line "
+        "per item with its index and either the result or an error; a failed item does not fail the batch."
+    ),
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {"description": "NDJSON stream of batch item results", "content": {NDJSON_MEDIA_TYPE: {}}},
+        401: {"model": ErrorResponse, "description": "Unauthorized"},
+        403: {"model": ErrorResponse, "description": "Forbidden"},
+    },
+)
+async def generate_project_names(
+        request: ProjectNameBatchRequest,
+        ordered: bool = Query(default=True, description="Stream results in request order, else as they finish"),
+        api_key: str = Depends(verify_api_key),
+        client: AsyncOpenAI = Depends(get_client),
+):
+    logger.info(f"Generating project names for a batch of {len(request.items)} items")
+    return StreamingResponse(
+        run_batch(
+            request.items,
+            ProjectNameRequest,
+            lambda item: create_project_name(item, client, api_key),
+            Config.BATCH_CONCURRENCY,
+            ordered,
+        ),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+async def create_project_name(
+        request: ProjectNameRequest, client: AsyncOpenAI, api_key: Optional[str]
+) -> ProjectNameResponse:
+    start_time = time.time()
+    logger.info(f"Generating project name for prompt: '{request.prompt[:50]}...'")
+
+    async def generate() -> str:
         # Call the AI model to generate a project name
         completion = await client.chat.completions.create(
             model=Config.CODE_GENERATION_MODEL,
             messages=[
-                ChatCompletionSystemMessageParam(role="system", content=PROJECT_NAME_SYSTEM_PROMPT),
+                ChatCompletionSystemMessageParam(role="system", content=prompts.get("project_name")),
                 ChatCompletionUserMessageParam(role="user", content=request.prompt),
             ],
             temperature=request.temperature,
@@ -51,27 +108,23 @@ async def generate_project_name(
         )
 
         # Extract the project name from the response
-        project_name = completion.choices[0].message.content.strip()
-        if not project_name:
+        name = completion.choices[0].message.content.strip()
+        if not name:
             raise ValueError("Received empty project name from LLM")
+        return name
 
-        processing_time = time.time() - start_time
-        logger.info(
-            f"Project name '{project_name}' generated in {processing_time:.2f}s"
-        )
-
-        return ProjectNameResponse(
-            project_name=project_name, processing_time=processing_time
-        )
-
-    except Exception as e:
-        processing_time = time.time() - start_time
-        logger.exception(f"Error generating project name: {str(e)}")
+    if is_cacheable(request.cache, request.temperature):
+        # Responses are only served to the key they were generated for
+        key = (api_key, Config.CODE_GENERATION_MODEL, request.prompt, request.temperature, request.top_p)
+        project_name, cache = await project_name_cache.get_or_compute(key, generate)
+    else:
+        project_name, cache = await generate(), "bypass"
 
-        if isinstance(e, HTTPException):
-            raise e
+    processing_time = time.time() - start_time
+    logger.info(
+        f"Project name '{project_name}' generated in {processing_time:.2f}s (cache: {cache})"
+    )
 
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to generate project name: {str(e)}",
-        )
+    return ProjectNameResponse(
+        project_name=project_name, processing_time=processing_time, cache=cache
+    )
@@ -1,12 +1,23 @@
 import time
+from typing import Optional
 
-from fastapi import status, Depends, HTTPException, APIRouter
+from fastapi import status, Depends, HTTPException, APIRouter, Query
+from fastapi.responses import StreamingResponse
 from openai import AsyncOpenAI
 
-from app.components.prompts.features.prompt_enhance import ENHANCER_SYSTEM_PROMPT
-from app.schemas.types import ErrorResponse, PromptEnhanceResponse, PromptEnhanceRequest, Message
+from app.components.prompts.registry import prompts
+from app.components.config import Config
+from app.schemas.types import (
+    ErrorResponse,
+    PromptEnhanceResponse,
+    PromptEnhanceRequest,
+    PromptEnhanceBatchRequest,
+    Message,
+)
 from app.utils.client.openai.openai_client import get_client
 from app.utils.client.serialize_object import serialize_object
+from app.utils.batch.batch import NDJSON_MEDIA_TYPE, run_batch
+from app.utils.cache.response_cache import is_cacheable, prompt_enhance_cache
 from app.utils.client.verify_api_key import verify_api_key
 from app.utils.logger import logger
 
@@ -35,49 +46,99 @@ async def prompt_enhance(
     start_time = time.time()
 
     try:
-        # Input validation
-        if request.message.role != "user":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Only user messages can be enhanced",
-            )
-
-        logger.info(
-            f"Enhancing prompt with temperature={request.temperature}, top_p={request.top_p}"
+        return await enhance_prompt(request, client, api_key)
+
+    except Exception as e:
+        processing_time = time.time() - start_time
+        logger.exception(f"Error enhancing prompt: {str(e)}")
+
+        if isinstance(e, HTTPException):
+            raise e
+
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to enhance prompt: {str(e)}",
+        )
+
+
+@router.post(
+    "/prompt_enhance/batch",
+    summary="Enhance user prompts in bulk",
+    description=(
+        "Enhances every item, at most BATCH_CONCURRENCY at a time. Streams one NDJSON line per item with its "
+        "index and either the result or an error; a failed item does not fail the batch."
+    ),
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {"description": "NDJSON stream of batch item results", "content": {NDJSON_MEDIA_TYPE: {}}},
+        401: {"model": ErrorResponse, "description": "Unauthorized"},
+        403: {"model": ErrorResponse, "description": "Forbidden"},
+    },
+)
+async def prompt_enhance_batch(
+        request: PromptEnhanceBatchRequest,
+        ordered: bool = Query(default=True, description="Stream results in request order, else as they finish"),
+        api_key: str = Depends(verify_api_key),
+        client: AsyncOpenAI = Depends(get_client),
+):
+    logger.info(f"Enhancing a batch of {len(request.items)} prompts")
+    return StreamingResponse(
+        run_batch(
+            request.items,
+            PromptEnhanceRequest,
+            lambda item: enhance_prompt(item, client, api_key),
+            Config.BATCH_CONCURRENCY,
+            ordered,
+        ),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+async def enhance_prompt(
+        request: PromptEnhanceRequest, client: AsyncOpenAI, api_key: Optional[str]
+) -> PromptEnhanceResponse:
+    start_time = time.time()
+
+    # Input validation
+    if request.message.role != "user":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only user messages can be enhanced",
         )
 
+    logger.info(
+        f"Enhancing prompt with temperature={request.temperature}, top_p={request.top_p}"
+    )
+
+    async def enhance() -> str:
         completion = await client.chat.completions.create(
             model=request.model,
             messages=[
-                {"role": "system", "content": ENHANCER_SYSTEM_PROMPT},
+                {"role": "system", "content": prompts.get("prompt_enhance")},
                 serialize_object(request.message),
             ],
             temperature=request.temperature,
             top_p=request.top_p,
         )
 
-        # Create enhanced message with same role but updated content
-        enhanced_content = completion.choices[0].message.content
-        if not enhanced_content:
+        content = completion.choices[0].message.content
+        if not content:
             raise ValueError("Received empty response from LLM")
+        return content
 
-        enhanced_message = Message(role=request.message.role, content=enhanced_content)
-
-        processing_time = time.time() - start_time
-        logger.info(f"Prompt enhanced successfully in {processing_time:.2f}s")
-
-        return PromptEnhanceResponse(
-            enhanced_message=enhanced_message, processing_time=processing_time
-        )
+    if is_cacheable(request.cache, request.temperature):
+        # Responses are only served to the key they were generated for
+        key = (api_key, request.model, request.message.model_dump_json(), request.temperature, request.top_p)
+        enhanced_content, cache = await prompt_enhance_cache.get_or_compute(key, enhance)
+    else:
+        enhanced_content, cache = await enhance(), "bypass"
 
-    except Exception as e:
-        processing_time = time.time() - start_time
-        logger.exception(f"Error enhancing prompt: {str(e)}")
+    # Create enhanced message with same role but updated content
+    enhanced_message = Message(role=request.message.role, content=enhanced_content)
 
-        if isinstance(e, HTTPException):
-            raise e
+    processing_time = time.time() - start_time
+    logger.info(f"Prompt enhanced successfully in {processing_time:.2f}s (cache: {cache})")
 
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to enhance prompt: {str(e)}",
-        )
+    return PromptEnhanceResponse(
+        enhanced_message=enhanced_message, processing_time=processing_time, cache=cache
+    )
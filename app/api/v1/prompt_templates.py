@@ -0,0 +1,36 @@
+from typing import List
+
+from fastapi import status, Depends, APIRouter
+
+from app.components.prompts.registry import prompts
+from app.components.prompts.templates import TEMPLATES
+from app.schemas.types import ErrorResponse, PromptTemplateInfo
+from app.utils.client.verify_api_key import verify_api_key
+
+router = APIRouter(tags=["prompt_templates"])
+
+
+@router.get(
+    "/v1/prompt-templates",
+    summary="List prompt templates",
+    description="Server-side system prompt templates that /v1/weby requests can reference by id and version",
+    response_model=List[PromptTemplateInfo],
+    status_code=status.HTTP_200_OK,
+    responses={
+        401: {"model": ErrorResponse, "description": "Unauthorized"},
+        403: {"model": ErrorResponse, "description": "Forbidden"},
+    },
+)
+async def list_prompt_templates(api_key: str = Depends(verify_api_key)):
+    return [
+        PromptTemplateInfo(
+            id=template.id,
+            version=template.version,
+            framework=template.framework,
+            hash=template.hash,
+            tokens=prompts.tokens(template.asset),
+            parameters={name: parameter.max_length for name, parameter in template.parameters.items()},
+        )
+        for versions in TEMPLATES.values()
+        for template in versions
+    ]
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query
 
 from openai import AsyncOpenAI
 
+from app.api.v1.jobs import submit_job
 from app.schemas.types import ChatCompletionRequest, ChatCompletionResponseChunk, ErrorResponse
+from app.services.streams.resumable import resumable_response, resume_response
+from app.services.studio.snapshot import snapshot_store
 from app.services.studio.studio import Studio
+from app.utils.app.request_body import chat_request, json_body_openapi
 from app.utils.client.openai.openai_client import get_client
+from app.utils.client.verify_api_key import verify_api_key
 
 router = APIRouter(tags=["studio"])
 
@@ -16,6 +23,7 @@ async def get_studio(client: AsyncOpenAI = Depends(get_client)) -> Studio:
 
 @router.post(
     "/v1/studio",
+    openapi_extra=json_body_openapi(ChatCompletionRequest),
     summary="Create a Studio Mode chat completion",
     description="Pair-programming assistant using Studio class for planning and execution.",
     response_model=ChatCompletionResponseChunk,
@@ -28,7 +36,27 @@ async def get_studio(client: AsyncOpenAI = Depends(get_client)) -> Studio:
     },
 )
 async def studio(
-        request: ChatCompletionRequest,
+        request: ChatCompletionRequest = Depends(chat_request),
+        plan: bool = Query(default=False, description="Plan the task first and execute its steps in parallel"),
+        server_tools: bool = Query(
+            default=False, description="Answer read-only tool calls on the server from the project snapshot"
+        ),
+        x_session_id: Optional[str] = Header(
+            default=None, description="Keeps the project snapshot across requests of an editor session"
+        ),
+        job: bool = Query(
+            default=False, description="Run as a background job and answer 202 with its id instead of streaming"
+        ),
+        last_event_id: Optional[str] = Header(
+            default=None, description="Id of the last event received, resumes that stream instead of starting over"
+        ),
+        api_key: str = Depends(verify_api_key),
         svc: Studio = Depends(get_studio),
 ):
-    return await svc.execute(request)
+    resumed = resume_response(api_key, last_event_id)
+    if resumed is not None:
+        return resumed
+    snapshot = await snapshot_store.get(api_key, x_session_id, request.project_files) if server_tools else None
+    if job:
+        return submit_job("studio", api_key, svc.stream(request, plan=plan, snapshot=snapshot))
+    return resumable_response("studio", api_key, svc.stream(request, plan=plan, snapshot=snapshot))
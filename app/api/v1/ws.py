@@ -0,0 +1,235 @@
+import asyncio
+import json
+from typing import AsyncGenerator, Dict, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from openai import AsyncOpenAI
+from pydantic import ValidationError
+
+from app.api.v1.chat import chat_events
+from app.api.v1.weby import weby_events
+from app.components.config import Config
+from app.schemas.types import (
+    TOO_LARGE,
+    ErrorResponse,
+    WebSocketAuth,
+    WebSocketFrame,
+    WebSocketRequest,
+    request_limits,
+)
+from app.services.studio.snapshot import snapshot_store
+from app.services.studio.studio import Studio
+from app.utils.client.openai.openai_client import get_client
+from app.utils.client.verify_api_key import check_api_key
+from app.utils.logger import logger
+
+router = APIRouter(tags=["ws"])
+
+# Frames waiting for the writer before generations have to wait for the client
+SEND_QUEUE_SIZE = 256
+# Replies to client frames waiting for the writer before the connection is closed
+MAX_PENDING_REPLIES = 64
+# Seconds a connection without X-API-Key header has to send its key
+AUTH_TIMEOUT = 10
+
+
+def _control(frame: WebSocketFrame) -> str:
+    return frame.model_dump_json(exclude_none=True)
+
+
+def _event(generation_id: str, event: dict) -> str:
+    # The event data is already JSON, embedding it avoids decoding and encoding every chunk again
+    return f'{{"id":{json.dumps(generation_id)},"data":{event["data"]}}}'
+
+
+def _error(generation_id: Optional[str], details: str, status_code: int) -> str:
+    return _control(WebSocketFrame(id=generation_id, error=ErrorResponse(details=details, status_code=status_code)))
+
+
+async def _events(message: WebSocketRequest, client: AsyncOpenAI, api_key: Optional[str]) -> AsyncGenerator[dict, None]:
+    if message.type == "weby":
+        return await weby_events(message.request, client)
+    if message.type == "chat":
+        return await chat_events(message.request, client)
+    snapshot = (
+        await snapshot_store.get(api_key, message.session_id, message.request.project_files)
+        if message.server_tools else None
+    )
+    return Studio(client).stream(message.request, plan=message.plan, snapshot=snapshot)
+
+
+class NotReading(Exception):
+    """The client keeps sending frames without reading the replies."""
+
+
+class Connection:
+    """
+    The generations of one WebSocket, their frames are written by a single writer.
+    Generations wait for one of SEND_QUEUE_SIZE slots before queueing a frame. Replies
+    to client frames never wait, so the receive loop keeps reading cancel frames while
+    generations are held back; a client that does not read them is disconnected.
+    """
+
+    def __init__(self, websocket: WebSocket, client: AsyncOpenAI, api_key: Optional[str]):
+        self.websocket = websocket
+        self.client = client
+        self.api_key = api_key
+        # Frame and whether it holds a generation slot
+        self.outgoing: "asyncio.Queue[Tuple[str, bool]]" = asyncio.Queue()
+        self.slots = asyncio.Semaphore(SEND_QUEUE_SIZE)
+        self.pending_replies = 0
+        self.generations: Dict[str, asyncio.Task] = {}
+
+    async def write(self):
+        while True:
+            frame, slot = await self.outgoing.get()
+            await self.websocket.send_text(frame)
+            if slot:
+                self.slots.release()
+            else:
+                self.pending_replies -= 1
+
+    async def send(self, frame: str):
+        """Queues a frame of a generation, waiting while the client is behind."""
+        await self.slots.acquire()
+        self.outgoing.put_nowait((frame, True))
+
+    def reply(self, frame: str, always: bool = False):
+        """Queues a frame without waiting; raises NotReading when too many are pending, unless always."""
+        if self.pending_replies >= MAX_PENDING_REPLIES and not always:
+            raise NotReading()
+        self.pending_replies += 1
+        self.outgoing.put_nowait((frame, False))
+
+    def handle(self, raw: str):
+        if len(raw) > Config.REQUEST_MAX_BODY_BYTES:
+            self.reply(_error(
+                None,
+                f"Frame exceeds the limit of {Config.REQUEST_MAX_BODY_BYTES} bytes",
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            ))
+            return
+        try:
+            message = WebSocketRequest.model_validate_json(raw, context=request_limits())
+        except ValidationError as e:
+            too_large = any(error["type"] == TOO_LARGE for error in e.errors())
+            status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE if too_large else status.HTTP_422_UNPROCESSABLE_ENTITY
+            self.reply(_error(_frame_id(raw), str(e), status_code))
+            return
+
+        if message.type == "cancel":
+            task = self.generations.get(message.id)
+            if task is not None:
+                task.cancel()
+            return
+        if message.id in self.generations:
+            self.reply(_error(message.id, f"Generation {message.id} is already running", status.HTTP_409_CONFLICT))
+            return
+        if message.request is None:
+            self.reply(_error(message.id, f"{message.type} needs a request", status.HTTP_422_UNPROCESSABLE_ENTITY))
+            return
+        if len(self.generations) >= Config.WS_MAX_GENERATIONS:
+            self.reply(_error(
+                message.id,
+                f"At most {Config.WS_MAX_GENERATIONS} generations can run on one connection",
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ))
+            return
+
+        task = self.generations[message.id] = asyncio.create_task(self._generate(message))
+        task.add_done_callback(lambda done: self._finished(message.id, done))
+
+    def _finished(self, generation_id: str, task: asyncio.Task):
+        self.generations.pop(generation_id, None)
+        # Also covers generations cancelled before they started; at most one per generation, so it is never refused
+        if task.cancelled():
+            self.reply(_control(WebSocketFrame(id=generation_id, done=True, cancelled=True)), always=True)
+
+    async def _generate(self, message: WebSocketRequest):
+        try:
+            events = await _events(message, self.client, self.api_key)
+            async for event in events:
+                await self.send(_event(message.id, event))
+            await self.send(_control(WebSocketFrame(id=message.id, done=True)))
+        except asyncio.CancelledError:
+            logger.info(f"WebSocket generation {message.id} cancelled")
+            raise
+        except HTTPException as e:
+            await self.send(_error(message.id, str(e.detail), e.status_code))
+        except Exception as e:
+            logger.exception(f"WebSocket generation {message.id} failed: {str(e)}")
+            await self.send(_error(message.id, str(e), status.HTTP_500_INTERNAL_SERVER_ERROR))
+
+    def close(self):
+        for task in list(self.generations.values()):
+            task.cancel()
+
+
+def _frame_id(raw: str) -> Optional[str]:
+    try:
+        frame_id = json.loads(raw).get("id")
+    except (ValueError, AttributeError):
+        return None
+    return frame_id if isinstance(frame_id, str) else None
+
+
+async def _receive_text(websocket: WebSocket) -> Optional[str]:
+    """The next frame as text, None once the client disconnected."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        return None
+    # Text and binary frames carry the same JSON
+    raw = message.get("text")
+    if raw is None:
+        raw = (message.get("bytes") or b"").decode("utf-8", errors="replace")
+    return raw
+
+
+async def _first_frame_key(websocket: WebSocket) -> Optional[str]:
+    try:
+        raw = await asyncio.wait_for(_receive_text(websocket), AUTH_TIMEOUT)
+        return WebSocketAuth.model_validate_json(raw).api_key if raw is not None else None
+    except (asyncio.TimeoutError, ValidationError):
+        return None
+
+
+@router.websocket("/v1/ws")
+async def ws(websocket: WebSocket, client: AsyncOpenAI = Depends(get_client)):
+    """
+    Runs weby, chat and studio generations over one connection. Every client frame is
+    a WebSocketRequest, frames of concurrent generations are told apart by their id.
+    Browsers cannot set headers on a WebSocket, so without the X-API-Key header the
+    first frame carries the key as a WebSocketAuth.
+    """
+    api_key = websocket.headers.get("X-API-Key")
+    # The key is never taken from the URL, which ends up in access logs
+    first_frame = not api_key and bool(Config.API_KEYS)
+    if first_frame:
+        await websocket.accept()
+        api_key = await _first_frame_key(websocket)
+    try:
+        check_api_key(api_key)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+    if not first_frame:
+        await websocket.accept()
+
+    connection = Connection(websocket, client, api_key)
+    writer = asyncio.create_task(connection.write())
+    try:
+        while True:
+            raw = await _receive_text(websocket)
+            if raw is None:
+                break
+            connection.handle(raw)
+    except WebSocketDisconnect:
+        pass
+    except NotReading:
+        logger.warning("Closing WebSocket connection that does not read its replies")
+        writer.cancel()
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Replies are not being read")
+    finally:
+        connection.close()
+        writer.cancel()
+        logger.info("WebSocket connection closed")
@@ -15,3 +15,51 @@ class Config:
     DEBUG = os.getenv("DEBUG", False)
     CODE_GENERATION_MODEL = os.getenv("MODEL", "deepseek/deepseek-r1-0528")
     HTML_GENERATION_MODEL = "thudm/glm-4-9b:free"
+    CSV_TOKEN_BUDGET = int(os.getenv("CSV_TOKEN_BUDGET", 4000))
+    CSV_SAMPLE_ROWS = int(os.getenv("CSV_SAMPLE_ROWS", 20))
+    XML_TOKEN_BUDGET = int(os.getenv("XML_TOKEN_BUDGET", 4000))
+    XML_MAX_DEPTH = int(os.getenv("XML_MAX_DEPTH", 12))
+    FILES_TOKEN_BUDGET = int(os.getenv("FILES_TOKEN_BUDGET", 64000))
+    OVERSIZED_FILES_POLICY = os.getenv("OVERSIZED_FILES_POLICY", "trim")
+    IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", 1568))
+    IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "WEBP")
+    IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", 80))
+    IMAGE_DEDUPE_DISTANCE = int(os.getenv("IMAGE_DEDUPE_DISTANCE", 4))
+    STUDIO_MAX_PARALLEL_STEPS = int(os.getenv("STUDIO_MAX_PARALLEL_STEPS", 4))
+    STUDIO_MAX_TOOL_ROUNDS = int(os.getenv("STUDIO_MAX_TOOL_ROUNDS", 8))
+    STUDIO_TOOL_RESULT_TOKENS = int(os.getenv("STUDIO_TOOL_RESULT_TOKENS", 8000))
+    STUDIO_MAX_SESSIONS = int(os.getenv("STUDIO_MAX_SESSIONS", 256))
+    STUDIO_SESSION_TTL = int(os.getenv("STUDIO_SESSION_TTL", 3600))
+    COMPLETION_DEBOUNCE_MS = int(os.getenv("COMPLETION_DEBOUNCE_MS", 75))
+    COMPLETION_DEADLINE = float(os.getenv("COMPLETION_DEADLINE", 5))
+    COMPLETION_CACHE_SIZE = int(os.getenv("COMPLETION_CACHE_SIZE", 512))
+    COMPLETION_CACHE_TAIL_CHARS = int(os.getenv("COMPLETION_CACHE_TAIL_CHARS", 2048))
+    COMPLETION_MAX_SESSIONS = int(os.getenv("COMPLETION_MAX_SESSIONS", 1024))
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 3600))
+    RESPONSE_CACHE_MAX_TEMPERATURE = float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", 0.2))
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 1000))
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 8))
+    JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", 256))
+    JOB_TTL = int(os.getenv("JOB_TTL", 3600))
+    JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", 30))
+    JOB_MAX_EVENT_BYTES = int(os.getenv("JOB_MAX_EVENT_BYTES", 16 * 1024 * 1024))
+    STREAM_RESUME_TTL = float(os.getenv("STREAM_RESUME_TTL", 120))
+    STREAM_REPLAY_MAX_BYTES = int(os.getenv("STREAM_REPLAY_MAX_BYTES", 4 * 1024 * 1024))
+    STREAM_RESUME_MAX_STREAMS = int(os.getenv("STREAM_RESUME_MAX_STREAMS", 256))
+    STREAM_RESUME_GRACE = float(os.getenv("STREAM_RESUME_GRACE", 15))
+    STREAM_RESUME_MAX_LIVE_PER_KEY = int(os.getenv("STREAM_RESUME_MAX_LIVE_PER_KEY", 8))
+    WS_MAX_GENERATIONS = int(os.getenv("WS_MAX_GENERATIONS", 16))
+    REQUEST_MAX_BODY_BYTES = int(os.getenv("REQUEST_MAX_BODY_BYTES", 32 * 1024 * 1024))
+    REQUEST_MAX_FILES = int(os.getenv("REQUEST_MAX_FILES", 500))
+    REQUEST_MAX_FILE_BYTES = int(os.getenv("REQUEST_MAX_FILE_BYTES", 2 * 1024 * 1024))
+    BLOB_MAX_BYTES = int(os.getenv("BLOB_MAX_BYTES", 20 * 1024 * 1024))
+    BLOB_STORE_MAX_BYTES = int(os.getenv("BLOB_STORE_MAX_BYTES", 512 * 1024 * 1024))
+    BLOB_TTL = float(os.getenv("BLOB_TTL", 3600))
+    REQUEST_MAX_DECOMPRESSED_BYTES = int(os.getenv("REQUEST_MAX_DECOMPRESSED_BYTES", 64 * 1024 * 1024))
+    SSE_COMPRESSION = os.getenv("SSE_COMPRESSION", "false").lower() in ("1", "true")
+    SHADCN_REFERENCE = os.getenv("SHADCN_REFERENCE", "false").lower() in ("1", "true")
+    SHADCN_TOKEN_BUDGET = int(os.getenv("SHADCN_TOKEN_BUDGET", 6000))
+    PROMPT_CACHE_CONTROL = os.getenv("PROMPT_CACHE_CONTROL", "auto")
+    CODEBASE_SEARCH_EMBEDDING_MODEL = os.getenv("CODEBASE_SEARCH_EMBEDDING_MODEL", "")
@@ -0,0 +1,116 @@
+"""
+Lazy access to the prompt assets. Prompt modules are imported on first use instead
+of when the routers are imported, and their token counts are read from
+token_counts.json, which is generated at build time:
+
+    python -m app.components.prompts.registry
+"""
+import hashlib
+import importlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from app.utils.files.tokens import estimate_tokens
+
+# Prompt name -> (module, attribute)
+PROMPT_ASSETS: Dict[str, Tuple[str, str]] = {
+    "chat": ("app.components.prompts.chat", "CHAT_SYSTEM_PROMPT"),
+    "image_parsing": ("app.components.prompts.features.image_parsing", "IMAGE_PARSING_SYSTEM_PROMPT"),
+    "project_name": ("app.components.prompts.features.project_name", "PROJECT_NAME_SYSTEM_PROMPT"),
+    "prompt_enhance": ("app.components.prompts.features.prompt_enhance", "ENHANCER_SYSTEM_PROMPT"),
+    "flutter": ("app.components.prompts.generation.flutter", "FLUTTER_SYSTEM_PROMPT"),
+    "html": ("app.components.prompts.generation.html", "HTML_SYSTEM_PROMPT"),
+    "nextjs": ("app.components.prompts.generation.nextjs", "NEXTJS_SYSTEM_PROMPT"),
+    "shadcn": ("app.components.prompts.generation.shadcn", "SHADCN_DOCUMENTATION"),
+    "studio": ("app.components.prompts.studio.studio", "STUDIO"),
+    "studio_plan": ("app.components.prompts.studio.planning", "PLAN"),
+    "studio_tools": ("app.components.prompts.studio.tools", "TOOLS"),
+}
+
+TOKEN_COUNTS_PATH = os.path.join(os.path.dirname(__file__), "token_counts.json")
+
+
+def prompt_text(value: Any) -> str:
+    """The text a prompt asset is sent as; tool definitions are sent as JSON."""
+    return value if isinstance(value, str) else json.dumps(value, separators=(",", ":"))
+
+
+def prompt_hash(value: Any) -> str:
+    return hashlib.blake2b(prompt_text(value).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class PromptRegistry:
+    """Loads prompt assets on first use and answers their token counts without loading them."""
+
+    def __init__(self, assets: Dict[str, Tuple[str, str]], token_counts_path: Optional[str] = TOKEN_COUNTS_PATH):
+        self.assets = assets
+        self.token_counts_path = token_counts_path
+        self._loaded: Dict[str, Any] = {}
+        self._token_counts: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        value = self._loaded.get(name)
+        if value is None:
+            if name not in self.assets:
+                raise KeyError(f"Unknown prompt '{name}'")
+            module, attribute = self.assets[name]
+            with self._lock:
+                value = self._loaded.get(name)
+                if value is None:
+                    value = self._loaded[name] = getattr(importlib.import_module(module), attribute)
+        return value
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
+
+    def tokens(self, name: str) -> int:
+        """
+        Token count of a prompt from the build-time table. A prompt that is already
+        loaded and no longer matches its recorded hash is estimated instead.
+        """
+        cached = self._counts().get(name)
+        if cached is not None:
+            if name not in self._loaded or cached["hash"] == prompt_hash(self._loaded[name]):
+                return cached["tokens"]
+        return estimate_tokens(prompt_text(self.get(name)))
+
+    def _counts(self) -> Dict[str, Dict[str, Any]]:
+        if self._token_counts is None:
+            try:
+                with open(self.token_counts_path, encoding="utf-8") as file:
+                    self._token_counts = json.load(file)["prompts"]
+            except (OSError, TypeError, KeyError, ValueError):
+                self._token_counts = {}
+        return self._token_counts
+
+
+# Tokenizer of the build-time counts
+TOKENIZER = "cl100k_base"
+
+
+def build_token_counts(registry: "PromptRegistry") -> Dict[str, Any]:
+    """Token counts of every asset, counted with tiktoken."""
+    # Only the build needs tiktoken, estimates are not written to the table
+    import tiktoken
+
+    encoding = tiktoken.get_encoding(TOKENIZER)
+    prompts = {}
+    for name in sorted(registry.assets):
+        value = registry.get(name)
+        prompts[name] = {"hash": prompt_hash(value), "tokens": len(encoding.encode(prompt_text(value)))}
+    return {"tokenizer": TOKENIZER, "prompts": prompts}
+
+
+prompts = PromptRegistry(PROMPT_ASSETS)
+
+
+if __name__ == "__main__":
+    counts = build_token_counts(prompts)
+    with open(TOKEN_COUNTS_PATH, "w", encoding="utf-8") as file:
+        json.dump(counts, file, indent=2, sort_keys=True)
+        file.write("\n")
+    for name, entry in counts["prompts"].items():
+        print(f"{name:<16} {entry['tokens']:>7} tokens")
@@ -25,18 +25,23 @@ Respond using the following format with custom tags:
 
   <steps>
     <step>
+      <id>1</id>
       <title>Observe project to understand the project setup</title>
       <description>Explain what questions or decisions need to be resolved before starting implementation.</description>
     </step>
 
     <step>
+      <id>2</id>
       <title>Create example.py</title>
       <description>Create a new file</description>
+      <depends_on>1</depends_on>
     </step>
 
     <step>
+      <id>3</id>
       <title>Edit test_example.py</title>
       <description>Edit existing file.</description>
+      <depends_on>2</depends_on>
     </step>
 
     <!-- Add more steps as required -->
@@ -52,6 +57,9 @@ Respond using the following format with custom tags:
 - DO NOT hallucinate project structure — refer to what is separately provided.
 - ALWAYS include both `<task_title>` and `<task_description>`.
 - ALWAYS write clean, concise step titles without numbering or prefixes.
+- ALWAYS give every step a unique numeric `<id>`, in order.
+- List in `<depends_on>` the comma-separated ids of the earlier steps a step needs. Steps without `<depends_on>` can start immediately, so independent steps (e.g. creating separate files) MUST NOT depend on each other.
+- NEVER use `&` or `<` inside titles or descriptions.
 - Output ONLY the content inside the <plan> block — no headers, comments, or other explanations.
 - ALWAYS seek to this format DESPITE any task
 """
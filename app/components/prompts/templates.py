@@ -0,0 +1,110 @@
+"""
+Server-side system prompt templates for code generation, referenced by id and
+version. The template text is sent unchanged as the static, cacheable prefix; the
+optional parameters of a request are rendered into a separate message after it.
+"""
+from typing import Dict, List, Optional
+
+from app.components.prompts.registry import prompt_hash, prompts
+
+
+class TemplateParameter:
+    __slots__ = ("name", "title", "max_length")
+
+    def __init__(self, name: str, title: str, max_length: int):
+        self.name = name
+        self.title = title
+        self.max_length = max_length
+
+
+class PromptTemplate:
+    """One version of a template; asset is the name of its text in the prompt registry."""
+
+    __slots__ = ("id", "version", "framework", "asset", "parameters")
+
+    def __init__(self, template_id: str, version: str, framework: str, asset: str, parameters: List[TemplateParameter]):
+        self.id = template_id
+        self.version = version
+        self.framework = framework
+        self.asset = asset
+        self.parameters = {parameter.name: parameter for parameter in parameters}
+
+    @property
+    def text(self) -> str:
+        return prompts.get(self.asset)
+
+    @property
+    def hash(self) -> str:
+        return prompt_hash(self.text)
+
+
+class PromptTemplateError(ValueError):
+    """Unknown template or version, or parameters the template does not accept."""
+
+
+GENERATION_PARAMETERS = [
+    TemplateParameter("instructions", "Additional instructions for this project", 2000),
+    TemplateParameter("design", "Design preferences (colors, typography, tone)", 500),
+]
+
+# Template id -> versions, oldest first. A changed prompt gets a new version and a new
+# registry asset, so clients pinned to an older version keep their cached prefix.
+TEMPLATES: Dict[str, List[PromptTemplate]] = {
+    "nextjs": [PromptTemplate("nextjs", "1", "Nextjs", "nextjs", GENERATION_PARAMETERS)],
+    "html": [PromptTemplate("html", "1", "HTML", "html", GENERATION_PARAMETERS)],
+    "flutter": [PromptTemplate("flutter", "1", "Flutter", "flutter", GENERATION_PARAMETERS)],
+}
+
+# Template used when a request names none
+DEFAULT_TEMPLATES = {"Nextjs": "nextjs", "HTML": "html", "Flutter": "flutter"}
+
+
+def resolve_template(
+        framework: str, template_id: Optional[str] = None, version: Optional[str] = None
+) -> PromptTemplate:
+    """The requested template version, the latest one without a version, the framework's default without an id."""
+    if template_id is None:
+        template_id = DEFAULT_TEMPLATES.get(framework)
+        if template_id is None:
+            raise PromptTemplateError("Unsupported framework")
+    versions = TEMPLATES.get(template_id)
+    if not versions:
+        raise PromptTemplateError(f"Unknown prompt template '{template_id}'")
+    if version is None:
+        template = versions[-1]
+    else:
+        template = next((template for template in versions if template.version == version), None)
+        if template is None:
+            available = ", ".join(template.version for template in versions)
+            raise PromptTemplateError(
+                f"Unknown version '{version}' of prompt template '{template_id}', available: {available}"
+            )
+    if template.framework != framework:
+        raise PromptTemplateError(f"Prompt template '{template_id}' is for {template.framework}, not {framework}")
+    return template
+
+
+def render_parameters(template: PromptTemplate, parameters: Optional[Dict[str, str]]) -> str:
+    """
+    The request's parameters as the message that follows the template ("" without any),
+    in the template's parameter order so equal parameters always render to equal text.
+    """
+    parameters = parameters or {}
+    unknown = sorted(set(parameters) - set(template.parameters))
+    if unknown:
+        raise PromptTemplateError(
+            f"Prompt template '{template.id}' does not accept {', '.join(unknown)}; "
+            f"parameters: {', '.join(template.parameters)}"
+        )
+
+    sections = []
+    for name, parameter in template.parameters.items():
+        value = (parameters.get(name) or "").strip()
+        if not value:
+            continue
+        if len(value) > parameter.max_length:
+            raise PromptTemplateError(
+                f"Prompt template parameter '{name}' is limited to {parameter.max_length} characters"
+            )
+        sections.append(f"{parameter.title}:\n{value}")
+    return "\n\n".join(sections)
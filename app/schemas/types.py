@@ -1,11 +1,22 @@
 import time
-from typing import List, Optional, Literal, Any
+from typing import Dict, List, Optional, Literal, Any
 
 from openai.types.chat import ChatCompletionChunk
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from pydantic import BaseModel, Field, ValidationInfo, field_validator, model_validator, ConfigDict
+from pydantic_core import PydanticCustomError
 
 from app.components.config import Config
-from app.components.prompts.generation.nextjs import NEXTJS_SYSTEM_PROMPT
+
+# Error type of the request size limits, see app.utils.app.request_body
+TOO_LARGE = "too_large"
+
+
+def request_limits() -> Dict[str, int]:
+    """
+    Validation context enforcing the request size limits. Only request decoding
+    passes it, models built on the server are not limited.
+    """
+    return {"max_files": Config.REQUEST_MAX_FILES, "max_file_bytes": Config.REQUEST_MAX_FILE_BYTES}
 
 
 # Models with enhanced validation
@@ -20,7 +31,8 @@ class Message(BaseModel):
 
     @field_validator("content")
     def content_not_empty(cls, v):
-        if not v.strip():
+        # isspace() checks without copying the string like strip() would
+        if not v or v.isspace():
             raise ValueError("Message content cannot be empty")
         return v
 
@@ -28,13 +40,24 @@ class Message(BaseModel):
 class FileItem(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
-    content: str = Field(..., description="Content of the file")
+    content: Optional[str] = Field(default=None, description="Content of the file")
     filename: str = Field(..., description="Original name of the uploaded file")
+    blob_id: Optional[str] = Field(
+        default=None, description="Id returned by POST /v1/blobs, sent instead of the content"
+    )
 
     @field_validator("content")
-    def validate_content(cls, v: str) -> str:
-        if not v.strip():
+    def validate_content(cls, v: Optional[str], info: ValidationInfo) -> Optional[str]:
+        if v is None:
+            return v
+        if not v or v.isspace():
             raise ValueError("Content cannot be empty")
+        limit = (info.context or {}).get("max_file_bytes")
+        if limit is None:
+            return v
+        # A character is at most 4 bytes in UTF-8, only borderline contents are encoded to measure them
+        if len(v) > limit or (len(v) * 4 > limit and len(v.encode("utf-8")) > limit):
+            raise PydanticCustomError(TOO_LARGE, "File content exceeds the limit of {limit} bytes", {"limit": limit})
         return v
 
     @field_validator("filename")
@@ -43,6 +66,23 @@ class FileItem(BaseModel):
             raise ValueError("File name cannot be empty")
         return v.strip()
 
+    @model_validator(mode="after")
+    def content_or_blob(self) -> "FileItem":
+        if (self.content is None) == (self.blob_id is None):
+            raise ValueError("A file needs either content or a blob_id")
+        return self
+
+
+class BlobInfo(BaseModel):
+    id: str = Field(..., description="SHA-256 of the bytes, referenced as blob_id in uploaded_files")
+    filename: str
+    content_type: str
+    size: int = Field(..., description="Size in bytes")
+
+
+class BlobUploadResponse(BaseModel):
+    blobs: List[BlobInfo]
+
 
 class CodeCompletionRequest(BaseModel):
     model: str
@@ -55,6 +95,27 @@ class CodeCompletionRequest(BaseModel):
     stream: Optional[bool] = False
 
 
+class PromptTemplateRef(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    id: Optional[str] = Field(
+        default=None, description="Prompt template id, the framework's default template when omitted"
+    )
+    version: Optional[str] = Field(default=None, description="Template version, the latest when omitted")
+    parameters: Optional[Dict[str, str]] = Field(
+        default=None, description="Values for the template's parameters, see GET /v1/prompt-templates"
+    )
+
+
+class PromptTemplateInfo(BaseModel):
+    id: str
+    version: str
+    framework: str
+    hash: str = Field(..., description="Content hash of the template text")
+    tokens: int = Field(..., description="Token count of the template text")
+    parameters: Dict[str, int] = Field(..., description="Accepted parameters and their maximum length")
+
+
 class ChatCompletionRequest(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -83,8 +144,8 @@ class ChatCompletionRequest(BaseModel):
         default=Config.CODE_GENERATION_MODEL,
         description="Model for code generation",
     )
-    nextjs_system_prompt: Optional[str] = Field(
-        default=NEXTJS_SYSTEM_PROMPT, description="Nexj.js system prompt"
+    prompt_template: Optional[PromptTemplateRef] = Field(
+        default=None, description="Server-side system prompt template and its parameters"
     )
     stream: Optional[bool] = Field(
         default=True,
@@ -93,6 +154,25 @@ class ChatCompletionRequest(BaseModel):
     frequency_penalty: Optional[float] = Field(None)
     presence_penalty: Optional[float] = Field(None)
 
+    @field_validator("project_files", "uploaded_files", mode="before")
+    def limit_file_count(cls, v: Any, info: ValidationInfo) -> Any:
+        # Runs before the files themselves are validated
+        limit = (info.context or {}).get("max_files")
+        if limit is not None and isinstance(v, list) and len(v) > limit:
+            raise PydanticCustomError(
+                TOO_LARGE,
+                "{count} files exceed the limit of {limit} files",
+                {"count": len(v), "limit": limit},
+            )
+        return v
+
+    @field_validator("project_files")
+    def project_files_inline(cls, v: Optional[List[FileItem]]) -> Optional[List[FileItem]]:
+        # Project files are source text that several stages read directly
+        if v and any(file.blob_id is not None for file in v):
+            raise ValueError("Only uploaded_files can reference blobs")
+        return v
+
 
 class ErrorResponse(BaseModel):
     model_config = ConfigDict(extra="forbid")
@@ -114,6 +194,51 @@ class ChatCompletionResponseChunk(BaseModel):
     error: Optional[ErrorResponse] = Field(default=None)
 
 
+class JobResponse(BaseModel):
+    id: str = Field(..., description="Job id")
+    kind: str = Field(..., description="Endpoint that submitted the job")
+    status: Literal["queued", "running", "completed", "failed", "cancelled"]
+    created_at: float
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    events_total: int = Field(..., description="Events produced so far")
+    first_offset: int = Field(
+        default=0, description="Offset of the oldest buffered event, older ones were dropped to bound the buffer"
+    )
+
+
+class JobEventsResponse(JobResponse):
+    offset: int = Field(..., description="Offset of the first returned event")
+    next_offset: int = Field(..., description="Offset to poll from next")
+    events: List[Any] = Field(..., description="SSE event payloads from offset on, as the stream would send them")
+
+
+class WebSocketRequest(BaseModel):
+    """A frame sent by the client on /v1/ws."""
+
+    id: str = Field(..., min_length=1, max_length=64, description="Client-chosen id of the generation")
+    type: Literal["weby", "chat", "studio", "cancel"] = Field(..., description="Endpoint to run, or cancel the id")
+    request: Optional[ChatCompletionRequest] = Field(default=None, description="Body of the endpoint's POST request")
+    plan: bool = Field(default=False, description="studio: plan the task first")
+    server_tools: bool = Field(default=False, description="studio: answer read-only tool calls on the server")
+    session_id: Optional[str] = Field(default=None, description="studio: keeps the project snapshot across requests")
+
+
+class WebSocketAuth(BaseModel):
+    """The first client frame on /v1/ws when the X-API-Key header is not sent."""
+
+    api_key: str = Field(..., min_length=1, description="API key of the connection")
+
+
+class WebSocketFrame(BaseModel):
+    """A control frame sent by the server on /v1/ws; events are sent as {"id": ..., "data": ...}."""
+
+    id: Optional[str] = None
+    done: Optional[bool] = None
+    cancelled: Optional[bool] = None
+    error: Optional[ErrorResponse] = None
+
+
 # TODO: Combine with /weby, many similar fields
 class PromptEnhanceRequest(BaseModel):
     model_config = ConfigDict(extra="forbid")
@@ -129,6 +254,10 @@ class PromptEnhanceRequest(BaseModel):
         default=Config.CODE_GENERATION_MODEL,
         description="Model for prompt enhance",
     )
+    cache: Optional[bool] = Field(
+        default=None,
+        description="Serve and store the response in the response cache; by default only low-temperature requests are",
+    )
 
 
 class PromptEnhanceResponse(BaseModel):
@@ -138,6 +267,37 @@ class PromptEnhanceResponse(BaseModel):
     processing_time: float = Field(
         ..., description="Time taken to process the request in seconds"
     )
+    cache: Literal["hit", "miss", "coalesced", "bypass"] = Field(
+        default="bypass",
+        description="hit: cached response, coalesced: shared an identical in-flight request, "
+                    "miss: computed and cached, bypass: not cacheable",
+    )
+
+
+class BatchItemResult(BaseModel):
+    """One NDJSON line of a batch response, either result or error is set."""
+
+    index: int = Field(..., description="Position of the item in the request")
+    result: Optional[Any] = Field(default=None)
+    error: Optional[ErrorResponse] = Field(default=None)
+
+
+class PromptEnhanceBatchRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    items: List[Dict[str, Any]] = Field(
+        ..., min_length=1, max_length=Config.BATCH_MAX_ITEMS,
+        description="Prompt enhance requests, each validated on its own",
+    )
+
+
+class ProjectNameBatchRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    items: List[Dict[str, Any]] = Field(
+        ..., min_length=1, max_length=Config.BATCH_MAX_ITEMS,
+        description="Project name requests, each validated on its own",
+    )
 
 
 class ProjectNameRequest(BaseModel):
@@ -150,6 +310,10 @@ class ProjectNameRequest(BaseModel):
     top_p: Optional[float] = Field(
         default=0.95, ge=0.0, le=1.0, description="Controls the nucleus sampling"
     )
+    cache: Optional[bool] = Field(
+        default=None,
+        description="Serve and store the response in the response cache; by default only low-temperature requests are",
+    )
 
     @field_validator("prompt")
     def prompt_not_empty(cls, v):
@@ -165,3 +329,8 @@ class ProjectNameResponse(BaseModel):
     processing_time: float = Field(
         ..., description="Time taken to process the request in seconds"
     )
+    cache: Literal["hit", "miss", "coalesced", "bypass"] = Field(
+        default="bypass",
+        description="hit: cached response, coalesced: shared an identical in-flight request, "
+                    "miss: computed and cached, bypass: not cacheable",
+    )
@@ -0,0 +1,117 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+
+from app.components.config import Config
+from app.utils.logger import logger
+
+
+class Blob:
+    """Raw bytes of an uploaded file, addressed by their SHA-256."""
+
+    __slots__ = ("id", "data", "content_type", "created_at")
+
+    def __init__(self, data: bytes, content_type: str):
+        self.id = hashlib.sha256(data).hexdigest()
+        self.data = data
+        self.content_type = content_type
+        self.created_at = time.time()
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+class BlobStore:
+    """
+    Uploaded blobs by content hash, evicted by least recent use once they take more
+    than `max_bytes` and `ttl` seconds after their last use. Uploading the same bytes
+    twice keeps one copy.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # id -> (last use, blob)
+        self._blobs: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stored_bytes = 0
+        self.stats = {"uploads": 0, "deduplicated": 0, "hits": 0, "misses": 0, "evictions": 0}
+
+    def put(self, data: bytes, content_type: str) -> Blob:
+        self._evict_expired()
+        self.stats["uploads"] += 1
+        blob = Blob(data, content_type)
+        entry = self._blobs.get(blob.id)
+        if entry is not None:
+            self.stats["deduplicated"] += 1
+            blob = entry[1]
+        else:
+            self.stored_bytes += blob.size
+        self._blobs[blob.id] = (time.monotonic(), blob)
+        self._blobs.move_to_end(blob.id)
+
+        while self.stored_bytes > self.max_bytes and len(self._blobs) > 1:
+            _, (_, evicted) = self._blobs.popitem(last=False)
+            self.stored_bytes -= evicted.size
+            self.stats["evictions"] += 1
+        return blob
+
+    def get(self, blob_id: str) -> Optional[Blob]:
+        self._evict_expired()
+        entry = self._blobs.get(blob_id)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self._blobs[blob_id] = (time.monotonic(), entry[1])
+        self._blobs.move_to_end(blob_id)
+        return entry[1]
+
+    def _evict_expired(self):
+        deadline = time.monotonic() - self.ttl
+        while self._blobs:
+            blob_id, (last_used, blob) = next(iter(self._blobs.items()))
+            if last_used >= deadline:
+                break
+            del self._blobs[blob_id]
+            self.stored_bytes -= blob.size
+            self.stats["evictions"] += 1
+
+    def summary(self) -> Dict[str, int]:
+        return {**self.stats, "blobs": len(self._blobs), "stored_bytes": self.stored_bytes}
+
+
+blob_store = BlobStore(max_bytes=Config.BLOB_STORE_MAX_BYTES, ttl=Config.BLOB_TTL)
+
+
+def resolve_blob(blob_id: str) -> Blob:
+    """The blob a request references, 400 when it was never uploaded or has expired."""
+    blob = blob_store.get(blob_id)
+    if blob is None:
+        logger.warning(f"Unknown blob {blob_id}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Blob {blob_id} not found, upload it again with POST /v1/blobs",
+        )
+    return blob
+
+
+def blob_text(blob: Blob, max_bytes: Optional[int] = None) -> str:
+    """
+    The blob as text for consumers without a binary path, binary data is described
+    instead. Consumers inlining the text without a token budget pass the per-file
+    limit inline content gets, a larger text blob is refused with 413.
+    """
+    try:
+        text = blob.data.decode("utf-8")
+    except UnicodeDecodeError:
+        return f"(binary {blob.content_type} file of {blob.size} bytes, not included)"
+    if max_bytes is not None and blob.size > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Blob {blob.id} is {blob.size} bytes, text files are limited to {max_bytes}",
+        )
+    return text
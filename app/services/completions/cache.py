@@ -0,0 +1,121 @@
+from collections import Counter, OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from app.components.config import Config
+
+
+def normalize_prompt(prompt: str) -> str:
+    return prompt.replace("\r\n", "\n")
+
+
+class CachedCompletion:
+    __slots__ = ("text", "finish_reason")
+
+    def __init__(self, text: str, finish_reason: Optional[str]):
+        self.text = text
+        self.finish_reason = finish_reason
+
+
+class _Group:
+    """Entries sharing the request parameters: the ends of their prompts and the longest completion."""
+
+    __slots__ = ("anchors", "longest")
+
+    def __init__(self):
+        self.anchors: Counter = Counter()
+        self.longest = 0
+
+
+# Prompt end compared before building the full tail key of a lookup position
+ANCHOR_CHARS = 16
+
+
+class CompletionCache:
+    """
+    Completed /v1/completions results by API key, request parameters and prompt tail,
+    evicted by least recent use. Keys never share entries, a completion generated from
+    one tenant's code is not served to another. A prompt that extends a cached prompt with the beginning of
+    its completion, which is what typing the suggestion produces, is served the rest
+    of that completion.
+    """
+
+    def __init__(self, max_entries: int, tail_chars: int):
+        self.max_entries = max_entries
+        self.tail_chars = tail_chars
+        self._entries: "OrderedDict[Tuple[Hashable, str], CachedCompletion]" = OrderedDict()
+        self._groups: Dict[Hashable, _Group] = {}
+        self.stats = {"hits": 0, "extension_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def group_key(
+            owner: Optional[str],
+            model: str,
+            suffix: Optional[str],
+            stop: Optional[List[str]],
+            max_tokens: int,
+            temperature: float,
+    ):
+        return owner, model, suffix or "", tuple(stop or ()), max_tokens, temperature
+
+    def get(self, group: Hashable, prompt: str) -> Optional[CachedCompletion]:
+        """The cached completion of prompt, or the remainder of one whose prompt prompt extends."""
+        prompt = normalize_prompt(prompt)
+        entries = self._groups.get(group)
+        # The typed text can be at most as long as the longest cached completion
+        for typed in range(min(entries.longest, len(prompt)) + 1 if entries else 0):
+            end = len(prompt) - typed
+            if prompt[max(0, end - ANCHOR_CHARS):end] not in entries.anchors:
+                continue
+            key = (group, self._tail(prompt[:end]))
+            cached = self._entries.get(key)
+            if cached is None:
+                continue
+            typed_text = prompt[len(prompt) - typed:]
+            if len(cached.text) > typed and cached.text.startswith(typed_text):
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                if typed:
+                    self.stats["extension_hits"] += 1
+                return CachedCompletion(cached.text[typed:], cached.finish_reason)
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, group: Hashable, prompt: str, text: str, finish_reason: Optional[str]):
+        if not text:
+            return
+        key = (group, self._tail(normalize_prompt(prompt)))
+        entries = self._groups.setdefault(group, _Group())
+        if key not in self._entries:
+            entries.anchors[key[1][-ANCHOR_CHARS:]] += 1
+        self._entries[key] = CachedCompletion(text, finish_reason)
+        self._entries.move_to_end(key)
+        # An upper bound, not lowered when the longest entry is evicted
+        entries.longest = max(entries.longest, len(text))
+        self.stats["stores"] += 1
+
+        while len(self._entries) > self.max_entries:
+            (evicted_group, tail), _ = self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+            evicted = self._groups[evicted_group]
+            anchor = tail[-ANCHOR_CHARS:]
+            evicted.anchors[anchor] -= 1
+            if not evicted.anchors[anchor]:
+                del evicted.anchors[anchor]
+                if not evicted.anchors:
+                    del self._groups[evicted_group]
+
+    def summary(self) -> Dict[str, float]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+    def _tail(self, prompt: str) -> str:
+        return prompt[-self.tail_chars:]
+
+
+completion_cache = CompletionCache(
+    max_entries=Config.COMPLETION_CACHE_SIZE, tail_chars=Config.COMPLETION_CACHE_TAIL_CHARS
+)
@@ -0,0 +1,59 @@
+import asyncio
+from collections import OrderedDict
+from typing import Optional
+
+from app.components.config import Config
+
+
+class _Session:
+    __slots__ = ("generation", "task")
+
+    def __init__(self):
+        self.generation = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class CompletionSessions:
+    """
+    The in-flight completion of each editor session. Starting a completion supersedes
+    the previous one of its session: a request still debouncing sees it is no longer
+    current, and an upstream call that already started has its task cancelled, which
+    closes the upstream stream.
+    """
+
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+
+    def start(self, session_id: str) -> int:
+        """Supersedes the session's current completion and returns the generation of the new one."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session()
+        self._sessions.move_to_end(session_id)
+        session.generation += 1
+        if session.task is not None:
+            session.task.cancel()
+            session.task = None
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session.generation
+
+    def is_current(self, session_id: str, generation: int) -> bool:
+        session = self._sessions.get(session_id)
+        return session is not None and session.generation == generation
+
+    def attach(self, session_id: str, generation: int, task: asyncio.Task) -> bool:
+        """Registers the upstream task of a completion, False if it was superseded meanwhile."""
+        if not self.is_current(session_id, generation):
+            return False
+        self._sessions[session_id].task = task
+        return True
+
+    def finish(self, session_id: str, generation: int):
+        if self.is_current(session_id, generation):
+            self._sessions[session_id].task = None
+
+
+completion_sessions = CompletionSessions(max_sessions=Config.COMPLETION_MAX_SESSIONS)
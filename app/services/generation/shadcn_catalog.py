@@ -0,0 +1,212 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.components.prompts.registry import prompts
+from app.services.studio.indexes.chunking import term_frequencies
+from app.utils.files.tokens import estimate_tokens
+
+_SECTION = re.compile(r"---COMPONENT START---\s*\n(?P<body>.*?)\n---COMPONENT END---", re.DOTALL)
+_FIELD = re.compile(r"^(?P<field>Component|Description):\s*(?P<value>.+)$", re.MULTILINE)
+_IMPORT = re.compile(r"import\s*\{(?P<names>[^}]*)\}\s*from\s*[\"'](?P<module>[^\"']+)[\"']")
+_UI_MODULE = re.compile(r"[\"']@/components/ui/(?P<slug>[\w-]+)[\"']")
+
+# Words users write for a component that appear nowhere in its documentation
+ALIASES: Dict[str, Iterable[str]] = {
+    "Dialog": ("modal", "popup", "lightbox"),
+    "Alert Dialog": ("confirm", "confirmation"),
+    "Sheet": ("sidebar", "side panel", "offcanvas"),
+    "Drawer": ("bottom sheet",),
+    "Sonner": ("toast", "notification", "snackbar"),
+    "Select": ("dropdown", "picker"),
+    "Dropdown Menu": ("dropdown", "kebab", "actions menu"),
+    "Tooltip": ("hint",),
+    "Tabs": ("tab",),
+    "Table": ("grid", "list of rows"),
+    "Data Table": ("sortable", "filterable", "rows", "columns"),
+    "Date Picker": ("date", "birthday", "booking"),
+    "Calendar": ("date", "schedule", "booking"),
+    "Input": ("form", "field", "text box", "search", "email", "password", "login", "sign up"),
+    "Label": ("form", "field", "login", "sign up"),
+    "Textarea": ("message", "comment", "multiline"),
+    "Button": ("cta", "click", "submit"),
+    "Card": ("tile", "panel", "pricing", "dashboard"),
+    "Avatar": ("profile", "user picture"),
+    "Badge": ("tag", "chip", "status"),
+    "Skeleton": ("loading", "placeholder"),
+    "Progress": ("loading", "upload", "progress bar"),
+    "Switch": ("toggle", "on/off", "dark mode"),
+    "Carousel": ("slider", "slideshow", "gallery"),
+    "Navigation Menu": ("navbar", "nav", "header", "navigation"),
+    "Breadcrumb": ("path", "trail"),
+    "Input OTP": ("otp", "verification code", "2fa", "pin"),
+    "Combobox": ("autocomplete", "typeahead", "searchable select"),
+    "Command": ("command palette", "spotlight", "cmd+k"),
+    "Scroll Area": ("scroll", "scrollable"),
+    "Resizable": ("split pane", "panels"),
+    "Accordion": ("faq", "expandable"),
+    "Collapsible": ("expand", "collapse"),
+}
+
+# Score of a component by how it was found
+EXPLICIT_SCORE = 4.0  # component or one of its exports named in the messages
+PROJECT_IMPORT_SCORE = 3.0  # already imported by a project file
+ALIAS_SCORE = 2.0
+# Components used by a selected component's example (Combobox -> Popover, Command)
+DEPENDENCY_FACTOR = 0.5
+# Description and example terms only count with this weight and need this total to select a component
+TERM_WEIGHT = 0.25
+MIN_SCORE = 1.0
+
+_STOP_TERMS = frozenset({
+    "a", "an", "and", "the", "of", "to", "in", "for", "with", "on", "or", "that", "is", "it", "be", "as",
+    "by", "can", "use", "used", "set", "make", "create", "add", "page", "app", "component", "components",
+    "ui", "content", "item", "items", "value", "class", "name", "div", "span", "props", "default",
+})
+
+
+class ShadcnComponent:
+    """One ---COMPONENT START--- section of the shadcn/ui reference."""
+
+    __slots__ = ("name", "slug", "description", "exports", "dependencies", "text", "tokens", "terms")
+
+    def __init__(self, name: str, description: str, text: str, imports: Dict[str, List[str]]):
+        self.name = name
+        self.description = description
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        self.slug = name.lower().replace(" ", "-")
+        modules = {
+            module.rsplit("/", 1)[-1]: names for module, names in imports.items() if module.startswith("@/components/ui/")
+        }
+        self.exports: List[str] = modules.pop(self.slug, []) or [name.replace(" ", "")]
+        self.dependencies: List[str] = sorted(modules)
+        self.terms: Set[str] = {
+            term for term in term_frequencies(f"{name} {description}") if term not in _STOP_TERMS
+        }
+
+
+class ShadcnSelection:
+    """Components picked for one request and the tokens sending them adds to the prompt."""
+
+    def __init__(self, components: List[ShadcnComponent]):
+        self.components = components
+        self.tokens = sum(component.tokens for component in components)
+
+    def render(self) -> str:
+        if not self.components:
+            return ""
+        return "**SHADCN/UI Component Reference**\n\n" + "\n\n".join(
+            f"---COMPONENT START---\n{component.text}\n---COMPONENT END---" for component in self.components
+        )
+
+    def describe(self) -> str:
+        names = ", ".join(component.name for component in self.components) or "none"
+        return f"{len(self.components)} components ({names}), {self.tokens} tokens added"
+
+
+class ShadcnCatalog:
+    """
+    The shadcn/ui reference split into its component sections, so a request gets
+    only the components its messages and project files point at instead of the
+    whole document.
+    """
+
+    def __init__(self, components: List[ShadcnComponent]):
+        self.components = components
+        self.by_slug = {component.slug: component for component in components}
+
+        self._exports: Dict[str, ShadcnComponent] = {}
+        self._phrases: Dict[str, ShadcnComponent] = {}
+        for component in components:
+            for export in component.exports:
+                self._exports[export.lower()] = component
+            self._phrases[component.name.lower()] = component
+
+        self._aliases: Dict[str, List[ShadcnComponent]] = {}
+        for name, aliases in ALIASES.items():
+            component = self.by_slug.get(name.lower().replace(" ", "-"))
+            if component is not None:
+                for alias in aliases:
+                    self._aliases.setdefault(alias, []).append(component)
+
+        # Rare description terms say more about a component than common ones
+        document_frequency = Counter(term for component in components for term in component.terms)
+        self._idf = {
+            term: math.log(1 + len(components) / count) for term, count in document_frequency.items()
+        }
+
+    @classmethod
+    def from_documentation(cls, documentation: str) -> "ShadcnCatalog":
+        components = []
+        for section in _SECTION.finditer(documentation):
+            body = section.group("body").strip()
+            fields = {match.group("field"): match.group("value").strip() for match in _FIELD.finditer(body)}
+            if "Component" not in fields:
+                continue
+            imports: Dict[str, List[str]] = {}
+            for match in _IMPORT.finditer(body):
+                names = [name.strip() for name in match.group("names").split(",") if name.strip()]
+                imports.setdefault(match.group("module"), []).extend(names)
+            components.append(ShadcnComponent(fields["Component"], fields.get("Description", ""), body, imports))
+        return cls(components)
+
+    def select(self, text: str, project_files: Optional[Iterable[str]], budget: int) -> ShadcnSelection:
+        """
+        Components relevant to text (the user messages) and to the shadcn/ui modules the
+        project files already import, best first, that fit into budget tokens together.
+        """
+        scores: Dict[str, float] = {}
+
+        def add(component: ShadcnComponent, score: float):
+            scores[component.slug] = scores.get(component.slug, 0.0) + score
+
+        lowered = text.lower()
+        terms = term_frequencies(text)
+        for phrase, component in self._phrases.items():
+            if re.search(rf"\b{re.escape(phrase)}s?\b", lowered):
+                add(component, EXPLICIT_SCORE)
+        for term in terms:
+            component = self._exports.get(term)
+            if component is not None and term not in self._phrases:
+                add(component, EXPLICIT_SCORE)
+        for alias, components in self._aliases.items():
+            if re.search(rf"\b{re.escape(alias)}s?\b", lowered):
+                for component in components:
+                    add(component, ALIAS_SCORE)
+        for component in self.components:
+            matched = sum(self._idf[term] for term in component.terms if term in terms)
+            if matched:
+                add(component, TERM_WEIGHT * matched)
+
+        for content in project_files or ():
+            for slug in set(_UI_MODULE.findall(content)):
+                component = self.by_slug.get(slug)
+                if component is not None:
+                    add(component, PROJECT_IMPORT_SCORE)
+
+        for slug, score in list(scores.items()):
+            for dependency in self.by_slug[slug].dependencies:
+                if dependency in self.by_slug and score >= MIN_SCORE:
+                    add(self.by_slug[dependency], DEPENDENCY_FACTOR * score)
+
+        selected = []
+        remaining = budget
+        for slug in sorted(scores, key=lambda slug: (-scores[slug], slug)):
+            component = self.by_slug[slug]
+            if scores[slug] < MIN_SCORE:
+                break
+            if component.tokens <= remaining:
+                selected.append(component)
+                remaining -= component.tokens
+        # Reference order, so the same selection always renders to the same text
+        selected.sort(key=self.components.index)
+        return ShadcnSelection(selected)
+
+
+@lru_cache(maxsize=1)
+def get_shadcn_catalog() -> ShadcnCatalog:
+    """The catalog of the shadcn/ui reference, parsed on the first Next.js request."""
+    return ShadcnCatalog.from_documentation(prompts.get("shadcn"))
@@ -0,0 +1,431 @@
+import asyncio
+import base64
+import binascii
+import json
+import re
+import xml.etree.ElementTree as ET
+import zlib
+from typing import Any, List
+
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletionSystemMessageParam, ChatCompletionUserMessageParam
+
+from app.components.config import Config
+from app.components.prompts.registry import prompts
+from app.services.ingestion.registry import (
+    BinaryFileExtractor,
+    FileExtractor,
+    IngestionContext,
+    file_extension,
+    register_extractor,
+)
+from app.utils.files.csv_summary import summarize_csv
+from app.utils.files.image_preprocessing import ProcessedImage
+from app.utils.files.symbols import LANGUAGES, extract_symbols, format_outline
+from app.utils.files.tokens import estimate_tokens, truncate_to_tokens
+from app.utils.files.xml_summary import summarize_xml, summarize_xml_text
+from app.utils.logger import logger
+
+# Upper bound for the description returned by the vision model
+IMAGE_DESCRIPTION_MAX_TOKENS = 1024
+
+
+def is_image_file(file_name: str) -> bool:
+    if not file_name or "." not in file_name:
+        return False
+
+    return file_extension(file_name) in ImageExtractor.extensions
+
+
+async def describe_image(content: str, file_name: str, client: AsyncOpenAI) -> str:
+    try:
+        logger.debug(f"Generating description for image: {file_name}")
+
+        # Prepare the image for the API call, assuming content is in base64
+        image_data = content
+        if not content.startswith("data:image"):
+            # If it's raw base64, add the data URL prefix
+            extension = file_extension(file_name)
+            mime_type = f"image/{'jpeg' if extension in ['jpg', 'jpeg'] else extension}"
+            image_data = f"data:{mime_type};base64,{content}"
+
+        messages = [
+            ChatCompletionSystemMessageParam(
+                role="system", content=prompts.get("image_parsing")
+            ),
+            ChatCompletionUserMessageParam(
+                role="user",
+                content=[
+                    {
+                        "type": "text",
+                        "text": f"Please describe this image from file '{file_name}' in detail. Focus on elements that might be relevant for web development or UI design.",
+                    },
+                    {"type": "image_url", "image_url": {"url": image_data}},
+                ],
+            ),
+        ]
+
+        response = await client.chat.completions.create(
+            model="google/gemma-3-27b-it",
+            messages=messages,
+            max_tokens=IMAGE_DESCRIPTION_MAX_TOKENS,
+            temperature=0.3,
+            extra_body={
+                "provider": {
+                    "order": ["deepinfra/bf16"],
+                    "allow_fallbacks": False,
+                }
+            },
+        )
+
+        description = response.choices[0].message.content
+        return f"Image Description for {file_name}:\n{description}"
+
+    except Exception as e:
+        logger.error(f"Error generating description for image {file_name}: {str(e)}")
+        return f"Image: {file_name} (description unavailable: {str(e)})"
+
+
+def _fenced(file_name: str, content: str) -> str:
+    return f"File: {file_name}\n```\n{content}\n```"
+
+
+@register_extractor
+class ImageExtractor(BinaryFileExtractor):
+    name = "image"
+    extensions = ("jpg", "jpeg", "png", "webp", "gif")
+    magic = (b"\x89PNG", b"\xff\xd8\xff", b"GIF8", b"RIFF")
+    fixed_cost = True
+
+    def matches_magic(self, head: bytes) -> bool:
+        # RIFF also starts WAV and AVI files, WebP names its format at offset 8
+        if head.startswith(b"RIFF"):
+            return head[8:12] == b"WEBP"
+        return super().matches_magic(head)
+
+    def estimate_tokens(self, file_name: str, content: str) -> int:
+        return IMAGE_DESCRIPTION_MAX_TOKENS + estimate_tokens(file_name) + 8
+
+    def estimate_blob_tokens(self, file_name: str, data: bytes) -> int:
+        return self.estimate_tokens(file_name, "")
+
+    def extract_text(self, file_name: str, content: str, token_budget: int) -> str:
+        # Images are described by the vision model in extract, they have no text of their own
+        return f"Image: {file_name}"
+
+    async def extract(
+            self, file_name: str, content: str, ctx: IngestionContext, token_budget: int
+    ) -> str:
+        logger.debug(f"Processing image file: {file_name}")
+        processed = await ctx.images.process(content, file_name)
+        if processed is None:
+            return await describe_image(content, file_name, ctx.client)
+        return await self._describe(processed, file_name, ctx)
+
+    async def extract_blob(
+            self, file_name: str, data: bytes, ctx: IngestionContext, token_budget: int
+    ) -> str:
+        logger.debug(f"Processing image blob: {file_name}")
+        processed = await ctx.images.process(data, file_name)
+        if processed is None:
+            return f"Image: {file_name} (could not be decoded)"
+        return await self._describe(processed, file_name, ctx)
+
+    async def _describe(self, processed: ProcessedImage, file_name: str, ctx: IngestionContext) -> str:
+        duplicate_of = ctx.images.find_duplicate(processed.fingerprint)
+        if duplicate_of is not None:
+            logger.info(f"Skipping image {file_name}: near-duplicate of {duplicate_of}")
+            return f"Image: {file_name} (near-duplicate of {duplicate_of}, see its description)"
+
+        ctx.images.remember(processed.fingerprint, file_name)
+        return await describe_image(processed.data_url(), file_name, ctx.client)
+
+
+@register_extractor
+class CSVExtractor(FileExtractor):
+    name = "csv"
+    extensions = ("csv",)
+
+    def estimate_tokens(self, file_name: str, content: str) -> int:
+        return min(super().estimate_tokens(file_name, content), Config.CSV_TOKEN_BUDGET)
+
+    def extract_text(self, file_name: str, content: str, token_budget: int) -> str:
+        budget = min(token_budget, Config.CSV_TOKEN_BUDGET)
+        try:
+            return summarize_csv(
+                content,
+                file_name,
+                token_budget=budget,
+                sample_rows=Config.CSV_SAMPLE_ROWS,
+            )
+
+        except Exception as e:
+            logger.warning(f"Failed to summarize CSV file {file_name}: {str(e)}")
+            # Last resort: return raw content, bounded by the same budget
+            return f"Data from {file_name} (raw format):\n" + truncate_to_tokens(content, budget)
+
+
+@register_extractor
+class XMLExtractor(FileExtractor):
+    name = "xml"
+    extensions = ("xml",)
+
+    def estimate_tokens(self, file_name: str, content: str) -> int:
+        return min(super().estimate_tokens(file_name, content), Config.XML_TOKEN_BUDGET)
+
+    def extract_text(self, file_name: str, content: str, token_budget: int) -> str:
+        budget = min(token_budget, Config.XML_TOKEN_BUDGET)
+        try:
+            return summarize_xml(
+                content,
+                file_name,
+                token_budget=budget,
+                max_depth=Config.XML_MAX_DEPTH,
+            )
+
+        except ET.ParseError as e:
+            # If XML parsing fails, try to extract key information
+            logger.debug(f"Falling back to text extraction for XML file {file_name}: {str(e)}")
+            return summarize_xml_text(content, file_name, token_budget=budget)
+
+
+# Array items and object keys rendered in a JSON sample
+JSON_SAMPLE_ITEMS = 3
+JSON_SAMPLE_KEYS = 25
+
+
+def _json_schema(value: Any, depth: int = 0) -> Any:
+    """Compact structural description of a JSON value; arrays are described by their first items."""
+    if isinstance(value, dict):
+        if depth >= 6:
+            return "object"
+        return {k: _json_schema(v, depth + 1) for k, v in list(value.items())[:JSON_SAMPLE_KEYS]}
+    if isinstance(value, list):
+        if not value:
+            return "array(0)"
+        schemas = []
+        for item in value[:JSON_SAMPLE_ITEMS]:
+            schema = _json_schema(item, depth + 1)
+            if schema not in schemas:
+                schemas.append(schema)
+        return {f"array({len(value)})": schemas[0] if len(schemas) == 1 else schemas}
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if value is None:
+        return "null"
+    return "string"
+
+
+def _json_sample(value: Any, depth: int = 0) -> Any:
+    """Copy of a JSON value with arrays, objects and long strings cut down."""
+    if isinstance(value, dict):
+        if depth >= 6:
+            return "{...}"
+        return {k: _json_sample(v, depth + 1) for k, v in list(value.items())[:JSON_SAMPLE_KEYS]}
+    if isinstance(value, list):
+        sample = [_json_sample(item, depth + 1) for item in value[:JSON_SAMPLE_ITEMS]]
+        if len(value) > JSON_SAMPLE_ITEMS:
+            sample.append(f"... {len(value) - JSON_SAMPLE_ITEMS} more items")
+        return sample
+    if isinstance(value, str) and len(value) > 120:
+        return value[:119] + "…"
+    return value
+
+
+@register_extractor
+class JSONExtractor(FileExtractor):
+    name = "json"
+    extensions = ("json",)
+
+    def extract_text(self, file_name: str, content: str, token_budget: int) -> str:
+        # Documents are only described when they do not fit, e.g. package.json is sent verbatim
+        if estimate_tokens(content) <= token_budget:
+            return _fenced(file_name, content)
+
+        try:
+            document = json.loads(content)
+        except ValueError:
+            return _fenced(file_name, truncate_to_tokens(content, token_budget))
+
+        schema = json.dumps(_json_schema(document), indent=1)
+        sample = json.dumps(_json_sample(document), indent=1, ensure_ascii=False)
+        output = f"JSON file {file_name} ({len(content)} characters)\nSchema:\n```json\n{schema}\n```"
+        remaining = token_budget - estimate_tokens(output)
+        if remaining > 32:
+            output += f"\nSample:\n```json\n{truncate_to_tokens(sample, remaining - 16)}\n```"
+        return truncate_to_tokens(output, token_budget)
+
+
+_HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+
+@register_extractor
+class MarkdownExtractor(FileExtractor):
+    name = "markdown"
+    extensions = ("md", "markdown", "mdx")
+
+    def extract_text(self, file_name: str, content: str, token_budget: int) -> str:
+        # Markdown is sent as-is, without a code fence that nested fences would break
+        if estimate_tokens(content) <= token_budget:
+            return f"File: {file_name}\n{content}"
+
+        outline = "\n".join(
+            f"{'  ' * (len(level) - 1)}- {title}"
+            for level, title in _HEADING_PATTERN.findall(content)
+        )
+        output = f"File: {file_name} (outline, document truncated)\n{outline}\n\n"
+        remaining = token_budget - estimate_tokens(output)
+        if remaining <= 0:
+            return truncate_to_tokens(output, token_budget)
+        return output + truncate_to_tokens(content, remaining)
+
+
+_PDF_STREAM_PATTERN = re.compile(rb"stream\r?\n(.*?)\r?\n?endstream", re.DOTALL)
+_PDF_TEXT_PATTERN = re.compile(rb"\((?:\\.|[^\\)])*\)\s*(?:Tj|'|\")|\[(?:\\.|[^\]])*\]\s*TJ|T\*|Td|TD|ET")
+_PDF_STRING_PATTERN = re.compile(rb"\((?:\\.|[^\\)])*\)")
+_PDF_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+
+def _decode_pdf_string(literal: bytes) -> str:
+    body = literal[1:-1]
+    decoded = re.sub(
+        rb"\\([nrtbf()\\]|[0-7]{1,3})",
+        lambda m: _PDF_ESCAPES.get(m.group(1), None)
+        or (bytes([int(m.group(1), 8) & 0xFF]) if m.group(1)[:1].isdigit() else m.group(1)),
+        body,
+    )
+    return decoded.decode("latin-1")
+
+
+def extract_pdf_text(data: bytes, max_chars: int) -> str:
+    """
+    Best-effort text extraction from a PDF without external dependencies.
+
+    Decompresses Flate content streams and collects the literal strings shown by
+    Tj/TJ text operators. Text drawn with hex-encoded or CID fonts is not recovered.
+    """
+    parts: List[str] = []
+    size = 0
+    for match in _PDF_STREAM_PATTERN.finditer(data):
+        stream = match.group(1)
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+
+        for operator in _PDF_TEXT_PATTERN.finditer(stream):
+            token = operator.group(0)
+            if token in (b"T*", b"Td", b"TD", b"ET"):
+                if parts and not parts[-1].endswith("\n"):
+                    parts.append("\n")
+                continue
+            for literal in _PDF_STRING_PATTERN.findall(token):
+                text = _decode_pdf_string(literal)
+                parts.append(text)
+                size += len(text)
+
+        if size >= max_chars:
+            break
+
+    return re.sub(r"\n{3,}", "\n\n", "".join(parts)).strip()[:max_chars]
+
+
+def _decode_binary(content: str) -> bytes:
+    if content.startswith("data:") and "," in content[:128]:
+        content = content.split(",", 1)[1]
+    if content.lstrip().startswith("%PDF"):
+        return content.encode("latin-1", errors="ignore")
+    try:
+        return base64.b64decode(content)
+    except (binascii.Error, ValueError):
+        return content.encode("latin-1", errors="ignore")
+
+
+@register_extractor
+class PDFExtractor(BinaryFileExtractor):
+    name = "pdf"
+    extensions = ("pdf",)
+    magic = (b"%PDF",)
+
+    def estimate_tokens(self, file_name: str, content: str) -> int:
+        # Compressed content streams expand several times when decoded
+        return estimate_tokens(content) * 2 + estimate_tokens(file_name) + 8
+
+    def estimate_blob_tokens(self, file_name: str, data: bytes) -> int:
+        return len(data) // 2 + estimate_tokens(file_name) + 8
+
+    async def extract_blob(
+            self, file_name: str, data: bytes, ctx: IngestionContext, token_budget: int
+    ) -> str:
+        text = await asyncio.to_thread(extract_pdf_text, data, token_budget * 4)
+        return self._render(file_name, text, token_budget)
+
+    def extract_text(self, file_name: str, content: str, token_budget: int) -> str:
+        text = extract_pdf_text(_decode_binary(content), max_chars=token_budget * 4)
+        return self._render(file_name, text, token_budget)
+
+    @staticmethod
+    def _render(file_name: str, text: str, token_budget: int) -> str:
+        if not text:
+            return f"PDF file {file_name} (no extractable text)"
+        return f"Text extracted from PDF {file_name}:\n" + truncate_to_tokens(text, token_budget)
+
+
+# Average line length above which a script is treated as minified
+MINIFIED_LINE_LENGTH = 500
+# Tokens of the start of a minified script that are sent
+MINIFIED_HEAD_TOKENS = 512
+
+
+@register_extractor
+class MinifiedJSExtractor(FileExtractor):
+    name = "minified_js"
+    extensions = ("js", "mjs", "cjs")
+
+    def accepts(self, file_name: str, content: str) -> bool:
+        if file_name.lower().endswith((".min.js", ".min.mjs")):
+            return True
+        lines = content.count("\n") + 1
+        return len(content) > 4096 and len(content) / lines > MINIFIED_LINE_LENGTH
+
+    def estimate_tokens(self, file_name: str, content: str) -> int:
+        return min(super().estimate_tokens(file_name, content), MINIFIED_HEAD_TOKENS + 64)
+
+    def extract_text(self, file_name: str, content: str, token_budget: int) -> str:
+        lines = content.count("\n") + 1
+        header = f"File: {file_name} (minified JavaScript, {len(content)} characters in {lines} lines, truncated)\n"
+        remaining = min(token_budget, MINIFIED_HEAD_TOKENS + 64) - estimate_tokens(header) - 8
+        if remaining <= 0:
+            return truncate_to_tokens(header, token_budget)
+        return header + f"```\n{truncate_to_tokens(content, remaining)}\n```"
+
+
+@register_extractor
+class CodeExtractor(FileExtractor):
+    name = "code"
+    extensions = tuple(LANGUAGES)
+
+    def extract_text(self, file_name: str, content: str, token_budget: int) -> str:
+        if estimate_tokens(content) <= token_budget:
+            return _fenced(file_name, content)
+
+        # The symbol outline summarizes what the truncated part of the file defines
+        outline = format_outline(extract_symbols(file_name, content))
+        if not outline:
+            return _fenced(file_name, truncate_to_tokens(content, token_budget))
+        header = f"File: {file_name} (outline, file truncated)\n{outline}\n\n"
+        remaining = token_budget - estimate_tokens(header) - 8
+        if remaining <= 0:
+            return truncate_to_tokens(header, token_budget)
+        return header + f"```\n{truncate_to_tokens(content, remaining)}\n```"
+
+
+@register_extractor(default=True)
+class TextExtractor(FileExtractor):
+    name = "text"
+
+    def extract_text(self, file_name: str, content: str, token_budget: int) -> str:
+        # For all other file types, return content as-is
+        return _fenced(file_name, truncate_to_tokens(content, token_budget))
@@ -0,0 +1,107 @@
+from typing import List, Optional
+
+from app.schemas.types import FileItem
+from app.services.blobs.store import blob_text, resolve_blob
+from app.services.ingestion import extractors  # noqa: F401 (registers the built-in extractors)
+from app.services.ingestion.registry import (
+    FileExtractor,
+    IngestionContext,
+    select_binary_extractor,
+    select_extractor,
+)
+from app.utils.logger import logger
+
+
+class PlannedFile:
+    """
+    A file paired with its extractor, estimated output cost and allotted token budget.
+    Blobs read by a binary extractor keep their bytes in data.
+    """
+
+    __slots__ = ("file", "extractor", "cost", "budget", "data")
+
+    def __init__(self, file: FileItem, extractor: FileExtractor, cost: int, data: Optional[bytes] = None):
+        self.file = file
+        self.extractor = extractor
+        self.cost = cost
+        self.budget = cost
+        self.data = data
+
+
+def plan_files(files: Optional[List[FileItem]]) -> List[PlannedFile]:
+    """
+    Selects an extractor for every file and estimates its cost, without extracting anything.
+    Raises HTTPException if a file references an unknown blob.
+    """
+    plans = []
+    for file in files or []:
+        if file.blob_id is not None:
+            blob = resolve_blob(file.blob_id)
+            extractor = select_binary_extractor(file.filename, blob.data[:16])
+            if extractor is not None:
+                cost = extractor.estimate_blob_tokens(file.filename, blob.data)
+                plans.append(PlannedFile(file, extractor, cost, blob.data))
+                continue
+            # Text blobs take the same path as inline content
+            file = FileItem.model_construct(filename=file.filename, content=blob_text(blob), blob_id=None)
+        extractor = select_extractor(file.filename, file.content)
+        plans.append(PlannedFile(file, extractor, extractor.estimate_tokens(file.filename, file.content)))
+    return plans
+
+
+def total_cost(plans: List[PlannedFile]) -> int:
+    return sum(plan.cost for plan in plans)
+
+
+def allocate_budgets(plans: List[PlannedFile], token_budget: int) -> bool:
+    """
+    Splits token_budget across the planned files.
+
+    Fixed-cost files keep their estimate. The remainder is water-filled over the
+    trimmable files: cheap files keep their full cost and the largest files share
+    what is left equally. Returns False if the fixed costs alone exceed the budget.
+    """
+    fixed = [plan for plan in plans if plan.extractor.fixed_cost]
+    remaining = token_budget - total_cost(fixed)
+    if remaining < 0:
+        return False
+
+    trimmable = sorted(
+        (plan for plan in plans if not plan.extractor.fixed_cost), key=lambda plan: plan.cost
+    )
+    for index, plan in enumerate(trimmable):
+        share = remaining // (len(trimmable) - index)
+        plan.budget = min(plan.cost, share)
+        remaining -= plan.budget
+
+    trimmed = [plan for plan in trimmable if plan.budget < plan.cost]
+    if trimmed:
+        logger.info(
+            f"Trimming {len(trimmed)} files to fit the {token_budget} token budget: "
+            + ", ".join(f"{plan.file.filename} ({plan.cost} -> {plan.budget})" for plan in trimmed)
+        )
+    return True
+
+
+async def process_files(plans: List[PlannedFile], ctx: IngestionContext) -> Optional[str]:
+    if not plans:
+        return None
+
+    processed_contents = []
+    for plan in plans:
+        logger.debug(f"Using {plan.extractor.name} extractor for {plan.file.filename}")
+        if plan.data is not None:
+            processed_content = await plan.extractor.extract_blob(plan.file.filename, plan.data, ctx, plan.budget)
+        else:
+            processed_content = await plan.extractor.extract(
+                plan.file.filename, plan.file.content, ctx, plan.budget
+            )
+        processed_contents.append(f"\n{processed_content}")
+
+    if ctx.images.bytes_in:
+        logger.info(
+            f"Image preprocessing saved {ctx.images.bytes_saved} bytes "
+            f"({ctx.images.bytes_in} -> {ctx.images.bytes_out})"
+        )
+
+    return "\n".join(processed_contents)
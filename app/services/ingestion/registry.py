@@ -0,0 +1,158 @@
+import asyncio
+import base64
+import binascii
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+from openai import AsyncOpenAI
+
+from app.components.config import Config
+from app.utils.files.image_preprocessing import ImagePreprocessor
+from app.utils.files.tokens import estimate_tokens
+
+# Content larger than this is extracted on a worker thread to keep the event loop free
+THREAD_OFFLOAD_CHARS = 64 * 1024
+
+
+class IngestionContext:
+    """Per-request state shared by the extractors of a single request."""
+
+    def __init__(self, client: AsyncOpenAI):
+        self.client = client
+        self.images = ImagePreprocessor(
+            max_edge=Config.IMAGE_MAX_EDGE,
+            image_format=Config.IMAGE_FORMAT,
+            quality=Config.IMAGE_QUALITY,
+            dedupe_distance=Config.IMAGE_DEDUPE_DISTANCE,
+        )
+
+
+class FileExtractor(ABC):
+    """
+    Base class for file extractors.
+
+    Subclasses declare the extensions and magic byte prefixes they handle, give a
+    token cost estimate for their output before any work is done, and implement
+    extract_text (CPU-bound, run off the event loop for large inputs). Extractors
+    that call upstream services also override extract.
+    """
+
+    name: str = "text"
+    extensions: Tuple[str, ...] = ()
+    magic: Tuple[bytes, ...] = ()
+    # Output cost that cannot be reduced by trimming (e.g. vision descriptions)
+    fixed_cost: bool = False
+
+    def matches_magic(self, head: bytes) -> bool:
+        """Whether the leading bytes of a file are one of this extractor's formats."""
+        return bool(self.magic) and head.startswith(self.magic)
+
+    def accepts(self, file_name: str, content: str) -> bool:
+        """Final check once the extension or magic bytes matched."""
+        return True
+
+    def estimate_tokens(self, file_name: str, content: str) -> int:
+        """Estimated tokens of the extracted output, computed without extracting."""
+        return estimate_tokens(content) + estimate_tokens(file_name) + 8
+
+    @abstractmethod
+    def extract_text(self, file_name: str, content: str, token_budget: int) -> str:
+        """The file rendered for the prompt in about token_budget tokens."""
+
+    async def extract(
+            self, file_name: str, content: str, ctx: IngestionContext, token_budget: int
+    ) -> str:
+        if len(content) > THREAD_OFFLOAD_CHARS:
+            return await asyncio.to_thread(self.extract_text, file_name, content, token_budget)
+        return self.extract_text(file_name, content, token_budget)
+
+
+class BinaryFileExtractor(FileExtractor):
+    """
+    Extractor that also reads uploaded blobs as raw bytes. Blobs of other formats
+    are decoded and handled as text content.
+    """
+
+    def estimate_blob_tokens(self, file_name: str, data: bytes) -> int:
+        """estimate_tokens for the raw bytes of a blob."""
+        return len(data) // 4 + estimate_tokens(file_name) + 8
+
+    @abstractmethod
+    async def extract_blob(
+            self, file_name: str, data: bytes, ctx: IngestionContext, token_budget: int
+    ) -> str:
+        """extract for the raw bytes of a blob."""
+
+
+_EXTRACTORS: List[FileExtractor] = []
+_DEFAULT_EXTRACTOR: Optional[FileExtractor] = None
+
+
+def register_extractor(cls=None, *, default: bool = False):
+    """
+    Class decorator registering an extractor. Extractors registered first win ties.
+    The default extractor handles files that no other extractor accepts.
+    """
+
+    def wrap(extractor_cls):
+        global _DEFAULT_EXTRACTOR
+        extractor = extractor_cls()
+        if default:
+            _DEFAULT_EXTRACTOR = extractor
+        else:
+            _EXTRACTORS.append(extractor)
+        return extractor_cls
+
+    return wrap(cls) if cls is not None else wrap
+
+
+def file_extension(file_name: str) -> str:
+    return file_name.lower().rsplit(".", 1)[-1] if "." in file_name else ""
+
+
+def sniff_bytes(content: str, size: int = 16) -> bytes:
+    """
+    Returns the leading bytes of the file, decoding base64 payloads and data URLs,
+    so magic numbers can be matched regardless of how the client encoded the file.
+    """
+    head = content[: size * 2 + 64].lstrip()
+    if head.startswith("data:") and "," in head:
+        head = head.split(",", 1)[1]
+
+    # 24 base64 characters decode to 18 bytes, enough for every registered magic
+    candidate = head[:24]
+    if len(candidate) == 24:
+        try:
+            return base64.b64decode(candidate, validate=True)[:size]
+        except (binascii.Error, ValueError):
+            pass
+    return head[:size].encode("utf-8", errors="ignore")
+
+
+def select_binary_extractor(file_name: str, head: bytes) -> Optional[BinaryFileExtractor]:
+    """The binary extractor for a blob by its leading bytes first, then by extension."""
+    binary = [extractor for extractor in _EXTRACTORS if isinstance(extractor, BinaryFileExtractor)]
+    for extractor in binary:
+        if extractor.matches_magic(head):
+            return extractor
+
+    extension = file_extension(file_name)
+    for extractor in binary:
+        if extension in extractor.extensions:
+            return extractor
+    return None
+
+
+def select_extractor(file_name: str, content: str) -> FileExtractor:
+    """Picks the extractor for a file by magic bytes first, then by extension."""
+    head = sniff_bytes(content)
+    for extractor in _EXTRACTORS:
+        if extractor.matches_magic(head) and extractor.accepts(file_name, content):
+            return extractor
+
+    extension = file_extension(file_name)
+    for extractor in _EXTRACTORS:
+        if extension in extractor.extensions and extractor.accepts(file_name, content):
+            return extractor
+
+    return _DEFAULT_EXTRACTOR
@@ -0,0 +1,205 @@
+import asyncio
+import itertools
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from app.components.config import Config
+from app.schemas.types import JobResponse
+from app.utils.logger import logger
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = frozenset({COMPLETED, FAILED, CANCELLED})
+
+
+class JobLimitError(Exception):
+    """Too many jobs are waiting for a worker."""
+
+
+class Job:
+    """
+    A generation running detached from the request that submitted it. Its SSE events
+    are buffered in order, so readers can poll or stream them from any offset. Past
+    max_bytes of events the oldest are dropped, offsets keep counting from the start.
+    """
+
+    def __init__(self, kind: str, owner: Optional[str], max_bytes: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.max_bytes = max_bytes
+        # (sse_event payload, size); the first one has offset first_offset
+        self._events: Deque[Tuple[dict, int]] = deque()
+        self.first_offset = 0
+        self.buffered_bytes = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def next_offset(self) -> int:
+        return self.first_offset + len(self._events)
+
+    def events_from(self, offset: int) -> Optional[List[dict]]:
+        """The buffered events from offset on, None if some of them were already dropped."""
+        if offset < self.first_offset:
+            return None
+        return [event for event, _ in itertools.islice(self._events, offset - self.first_offset, None)]
+
+    def append(self, event: dict):
+        size = len(event.get("data", ""))
+        self._events.append((event, size))
+        self.buffered_bytes += size
+        while self.buffered_bytes > self.max_bytes and len(self._events) > 1:
+            _, dropped = self._events.popleft()
+            self.buffered_bytes -= dropped
+            self.first_offset += 1
+        self._notify()
+
+    def finish(self, status: str, error: Optional[str] = None):
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        self._notify()
+
+    async def wait(self, offset: int, timeout: float) -> bool:
+        """Waits until there are events past offset or the job finished, False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self.next_offset <= offset and not self.finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def follow(self, offset: int) -> AsyncIterator[tuple]:
+        """
+        (offset, event) from offset on, live until the job finishes. Ends early if the
+        reader falls behind the buffer, resuming from its last offset then answers 410.
+        """
+        while True:
+            events = self.events_from(offset)
+            if events is None:
+                return
+            for event in events:
+                yield offset, event
+                offset += 1
+            if self.finished:
+                return
+            await self.wait(offset, Config.JOB_MAX_WAIT)
+
+    def describe(self) -> JobResponse:
+        return JobResponse(
+            id=self.id,
+            kind=self.kind,
+            status=self.status,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+            error=self.error,
+            events_total=self.next_offset,
+            first_offset=self.first_offset,
+        )
+
+    def _notify(self):
+        # Wakes every current waiter; later waiters wait on a fresh event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+class JobManager:
+    """
+    Runs jobs in the background with at most `workers` running at a time and keeps
+    finished jobs for `ttl` seconds.
+    """
+
+    def __init__(self, workers: int, max_queued: int, ttl: float):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def submit(self, kind: str, owner: Optional[str], events: AsyncIterator[dict]) -> Job:
+        self._evict_expired()
+        queued = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+        if queued >= self.max_queued:
+            raise JobLimitError(f"{queued} jobs are already waiting for a worker")
+        if self._semaphore is None:
+            # Created lazily so it belongs to the server's event loop
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+        job = Job(kind, owner, Config.JOB_MAX_EVENT_BYTES)
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, events))
+        logger.info(f"Submitted {kind} job {job.id}")
+        return job
+
+    def get(self, job_id: str, owner: Optional[str]) -> Optional[Job]:
+        self._evict_expired()
+        job = self._jobs.get(job_id)
+        # Other API keys' jobs look like missing ones
+        if job is None or job.owner != owner:
+            return None
+        return job
+
+    async def cancel(self, job: Job):
+        if not job.finished and job.task is not None:
+            job.task.cancel()
+            # Let the generation unwind so the job reports cancelled
+            await asyncio.wait({job.task}, timeout=5)
+
+    async def _run(self, job: Job, events: AsyncIterator[dict]):
+        try:
+            async with self._semaphore:
+                job.status = RUNNING
+                async for event in events:
+                    job.append(event)
+            job.finish(COMPLETED)
+            logger.info(f"Job {job.id} completed with {job.next_offset} events")
+        except asyncio.CancelledError:
+            job.finish(CANCELLED)
+            logger.info(f"Job {job.id} cancelled")
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed: {str(e)}")
+            job.finish(FAILED, str(e))
+        finally:
+            await _close(events)
+
+    def _evict_expired(self):
+        deadline = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < deadline]:
+            del self._jobs[job_id]
+
+    def summary(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, RUNNING: 0, COMPLETED: 0, FAILED: 0, CANCELLED: 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+
+async def _close(events: AsyncIterator[dict]):
+    close = getattr(events, "aclose", None)
+    if close is not None:
+        try:
+            await close()
+        except Exception:
+            pass
+
+
+job_manager = JobManager(workers=Config.JOB_WORKERS, max_queued=Config.JOB_MAX_QUEUED, ttl=Config.JOB_TTL)
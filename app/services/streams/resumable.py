@@ -0,0 +1,252 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sse_starlette import EventSourceResponse
+
+from app.components.config import Config
+from app.utils.logger import logger
+
+
+class ResumableStream:
+    """
+    An SSE stream whose events are produced by a task that outlives the connection.
+    The most recent events are kept in a ring buffer capped at max_bytes, so a client
+    that reconnects with Last-Event-ID is sent what it missed and then follows live.
+    """
+
+    def __init__(self, kind: str, owner: Optional[str], max_bytes: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner
+        self.max_bytes = max_bytes
+        # (seq, event, size), seq increases by one per event
+        self.buffer: Deque[Tuple[int, dict, int]] = deque()
+        self.buffered_bytes = 0
+        self.next_seq = 0
+        self.finished = False
+        self.finished_at: Optional[float] = None
+        self.readers = 0
+        self.detached_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def first_seq(self) -> int:
+        return self.buffer[0][0] if self.buffer else self.next_seq
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.id}:{seq}"
+
+    def append(self, event: dict):
+        size = len(event.get("data", ""))
+        self.buffer.append((self.next_seq, event, size))
+        self.buffered_bytes += size
+        self.next_seq += 1
+        # The newest event always stays, even if it alone exceeds the cap
+        while self.buffered_bytes > self.max_bytes and len(self.buffer) > 1:
+            self.buffered_bytes -= self.buffer.popleft()[2]
+        self._notify()
+
+    def finish(self):
+        self.finished = True
+        self.finished_at = time.time()
+        self._notify()
+
+    def can_resume(self, seq: int) -> bool:
+        """Whether every event after seq is still buffered."""
+        return self.first_seq <= seq + 1 <= self.next_seq
+
+    async def follow(self, after: int) -> AsyncIterator[Tuple[int, dict]]:
+        """(seq, event) after seq `after`, live until the stream finishes or the reader falls out of the buffer."""
+        seq = after + 1
+        while True:
+            # The buffer may have moved on while the reader was suspended at the yield
+            if seq < self.first_seq:
+                logger.warning(f"Reader of {self.kind} stream {self.id} fell behind its replay buffer")
+                return
+            if seq < self.next_seq:
+                # Seqs are consecutive, so an event's position follows from the oldest buffered one
+                yield seq, self.buffer[seq - self.first_seq][1]
+                seq += 1
+            elif self.finished:
+                return
+            else:
+                await self._changed.wait()
+
+    def _notify(self):
+        # Wakes every current waiter; later waiters wait on a fresh event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+class ResumableStreams:
+    """
+    The streams that can still be resumed. A stream without readers keeps generating
+    for `grace` seconds before it is cancelled, and a finished one stays resumable for
+    `ttl` seconds. At most `max_streams` are kept; the oldest finished ones go first.
+    An owner runs at most `max_live_per_owner` generations at a time.
+    """
+
+    def __init__(self, max_streams: int, max_bytes: int, ttl: float, grace: float, max_live_per_owner: int):
+        self.max_streams = max_streams
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.grace = grace
+        self.max_live_per_owner = max_live_per_owner
+        self._streams: "OrderedDict[str, ResumableStream]" = OrderedDict()
+        self.stats = {"opened": 0, "resumed": 0, "expired": 0, "abandoned": 0, "refused": 0}
+
+    def open(self, kind: str, owner: Optional[str], events: AsyncIterator[dict]) -> ResumableStream:
+        """Starts producing events into a new stream, 429 when the owner has too many live streams."""
+        self._evict_expired()
+        self._limit_live(owner)
+        finished = [stream_id for stream_id, stream in self._streams.items() if stream.finished]
+        for stream_id in finished[:max(0, len(self._streams) - self.max_streams + 1)]:
+            del self._streams[stream_id]
+            self.stats["expired"] += 1
+
+        stream = ResumableStream(kind, owner, self.max_bytes)
+        self._streams[stream.id] = stream
+        stream.task = asyncio.create_task(self._produce(stream, events))
+        self.stats["opened"] += 1
+        return stream
+
+    def get(self, stream_id: str, owner: Optional[str]) -> Optional[ResumableStream]:
+        self._evict_expired()
+        stream = self._streams.get(stream_id)
+        # Other API keys' streams look like expired ones
+        if stream is None or stream.owner != owner:
+            return None
+        return stream
+
+    async def send(self, stream: ResumableStream, after: int) -> AsyncIterator[dict]:
+        """The stream's events after seq `after` with their ids, as EventSourceResponse sends them."""
+        stream.readers += 1
+        try:
+            async for seq, event in stream.follow(after):
+                yield {**event, "id": stream.event_id(seq)}
+        finally:
+            stream.readers -= 1
+            if not stream.readers and not stream.finished:
+                stream.detached_at = time.monotonic()
+                logger.info(f"{stream.kind} stream {stream.id} detached at event {stream.next_seq}")
+                asyncio.get_running_loop().call_later(self.grace, self._abandon_if_detached, stream)
+
+    async def _produce(self, stream: ResumableStream, events: AsyncIterator[dict]):
+        try:
+            async for event in events:
+                stream.append(event)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.exception(f"{stream.kind} stream {stream.id} failed: {str(e)}")
+        finally:
+            stream.finish()
+            close = getattr(events, "aclose", None)
+            if close is not None:
+                try:
+                    await close()
+                except Exception:
+                    pass
+
+    def _abandon_if_detached(self, stream: ResumableStream):
+        detached = not stream.readers and time.monotonic() - stream.detached_at >= self.grace
+        if detached:
+            # Nobody came back for it, stop paying for the generation
+            self._abandon(stream)
+
+    def _abandon(self, stream: ResumableStream):
+        if not stream.finished and stream.task is not None and not stream.task.cancelled():
+            logger.info(f"Cancelling abandoned {stream.kind} stream {stream.id}")
+            self.stats["abandoned"] += 1
+            stream.task.cancel()
+
+    def _limit_live(self, owner: Optional[str]):
+        live = [
+            stream for stream in self._streams.values()
+            if stream.owner == owner and not stream.finished and not stream.task.cancelled()
+        ]
+        excess = len(live) - self.max_live_per_owner + 1
+        if excess <= 0:
+            return
+        # Generations whose client already left make room first, oldest first
+        detached = [stream for stream in live if not stream.readers and stream.detached_at is not None]
+        for stream in detached[:excess]:
+            self._abandon(stream)
+        if len(detached) < excess:
+            self.stats["refused"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"At most {self.max_live_per_owner} generations can run at the same time per API key",
+            )
+
+    def _evict_expired(self):
+        deadline = time.time() - self.ttl
+        for stream_id in [
+            stream_id for stream_id, stream in self._streams.items()
+            if stream.finished and stream.finished_at < deadline
+        ]:
+            del self._streams[stream_id]
+            self.stats["expired"] += 1
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            **self.stats,
+            "streams": len(self._streams),
+            "live": sum(1 for stream in self._streams.values() if not stream.finished),
+            "buffered_bytes": sum(stream.buffered_bytes for stream in self._streams.values()),
+        }
+
+
+resumable_streams = ResumableStreams(
+    max_streams=Config.STREAM_RESUME_MAX_STREAMS,
+    max_bytes=Config.STREAM_REPLAY_MAX_BYTES,
+    ttl=Config.STREAM_RESUME_TTL,
+    grace=Config.STREAM_RESUME_GRACE,
+    max_live_per_owner=Config.STREAM_RESUME_MAX_LIVE_PER_KEY,
+)
+
+
+def _parse_event_id(last_event_id: str) -> Optional[Tuple[str, int]]:
+    stream_id, _, seq = last_event_id.rpartition(":")
+    if not stream_id or not seq.isdigit():
+        return None
+    return stream_id, int(seq)
+
+
+def resumable_response(kind: str, owner: Optional[str], events: AsyncIterator[dict]) -> EventSourceResponse:
+    """
+    Streams events as SSE with ids that a reconnecting client can resume from. Without
+    an API key there is no scope to resume in or to count generations against, so the
+    events are streamed as they are and the generation ends with the connection.
+    """
+    if owner is None:
+        return EventSourceResponse(events)
+    stream = resumable_streams.open(kind, owner, events)
+    return EventSourceResponse(resumable_streams.send(stream, -1))
+
+
+def resume_response(owner: Optional[str], last_event_id: Optional[str]) -> Optional[EventSourceResponse]:
+    """
+    The rest of the stream that last_event_id belongs to, None if the header does not
+    name a stream of this server or there is no API key. Raises 410 when the stream expired or the events
+    after last_event_id are no longer buffered, the client has to start over then.
+    """
+    parsed = _parse_event_id(last_event_id) if last_event_id and owner is not None else None
+    if parsed is None:
+        return None
+
+    stream_id, seq = parsed
+    stream = resumable_streams.get(stream_id, owner)
+    if stream is None or not stream.can_resume(seq):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Stream {stream_id} cannot be resumed after event {seq}, send the request again without Last-Event-ID",
+        )
+    resumable_streams.stats["resumed"] += 1
+    logger.info(f"Resuming {stream.kind} stream {stream.id} after event {seq} of {stream.next_seq}")
+    return EventSourceResponse(resumable_streams.send(stream, seq))
@@ -0,0 +1,163 @@
+import contextlib
+import re
+import time
+from typing import Any, Dict, List
+
+from app.components.config import Config
+from app.services.studio.indexes.codebase_search import CodebaseSearchIndex, load_embedding_backend
+from app.services.studio.indexes.path_trie import PathTrie
+from app.services.studio.indexes.symbols import SymbolIndex
+from app.services.studio.indexes.trigram import TrigramIndex
+from app.services.studio.snapshot import ProjectSnapshot, normalize_path
+from app.utils.files.tokens import truncate_to_tokens
+from app.utils.logger import logger
+
+# Tools that only read the project and can be answered from the server-side snapshot
+READ_ONLY_TOOLS = frozenset({
+    "codebase_search", "view_file", "find", "grep_search", "list_directory", "view_code_item",
+})
+
+MAX_SEARCH_RESULTS = 50
+MAX_FIND_RESULTS = 200
+MAX_GREP_MATCHES = 100
+MAX_GREP_LINE_LENGTH = 200
+MAX_GREP_PATTERN_LENGTH = 512
+# Seconds after which grep_search stops and returns the matches found so far
+GREP_TIME_LIMIT = 5.0
+# Tools that take the snapshot lock themselves, grep_search runs the model's regex without it
+UNLOCKED_TOOLS = frozenset({"grep_search"})
+
+
+class ToolExecutionError(ValueError):
+    """Raised when a server-side tool call cannot be answered."""
+
+
+class ToolExecutor:
+    """Executes the read-only Studio tools against a project snapshot."""
+
+    def __init__(self, snapshot: ProjectSnapshot, result_tokens: int):
+        self.snapshot = snapshot
+        self.result_tokens = result_tokens
+
+    def execute(self, name: str, arguments: Dict[str, Any]) -> str:
+        """Runs a tool call and returns its result, or an error message the model can act on."""
+        handler = getattr(self, f"_tool_{name}", None) if name in READ_ONLY_TOOLS else None
+        if handler is None:
+            return f"Error: {name} cannot be executed on the server"
+        # Tools iterate the snapshot files, a concurrent sync of the session must not change them meanwhile
+        lock = contextlib.nullcontext() if name in UNLOCKED_TOOLS else self.snapshot.lock
+        try:
+            with lock:
+                result = handler(**arguments)
+        except TypeError as e:
+            return f"Error: invalid arguments for {name}: {str(e)}"
+        except ToolExecutionError as e:
+            return f"Error: {str(e)}"
+        except Exception as e:
+            # Arguments of the wrong type fail anywhere in a tool, the model gets to correct them
+            logger.warning(f"Tool {name} failed: {str(e)}")
+            return f"Error: {name} failed: {str(e)}"
+        return truncate_to_tokens(result, self.result_tokens)
+
+    def _read(self, path: str) -> str:
+        content = self.snapshot.read(path)
+        if content is None:
+            raise ToolExecutionError(f"File not found: {path}")
+        return content
+
+    def _paths_under(self, base: str, recursive: bool = True) -> List[str]:
+        base = normalize_path(base or "")
+        if base in self.snapshot.files:
+            return [base]
+        prefix = f"{base}/" if base else ""
+        return sorted(
+            path for path in self.snapshot.files
+            if path.startswith(prefix) and (recursive or "/" not in path[len(prefix):])
+        )
+
+    def _tool_codebase_search(self, query: str, top_k: int = 10) -> str:
+        index = self.snapshot.get_index(
+            "codebase_search",
+            lambda snapshot: CodebaseSearchIndex.from_snapshot(
+                snapshot, load_embedding_backend(Config.CODEBASE_SEARCH_EMBEDDING_MODEL)
+            ),
+        )
+        results = index.search(query, max(1, min(top_k, MAX_SEARCH_RESULTS)))
+        if not results:
+            return f"No results for {query}"
+        return "\n\n".join(
+            f"{chunk.path}:{chunk.start_line}-{chunk.end_line}"
+            + (f" ({chunk.symbol})" if chunk.symbol else "")
+            + f"\n{chunk.text}"
+            for chunk, _ in results
+        )
+
+    def _tool_view_file(self, path: str) -> str:
+        return self._read(path)
+
+    def _tool_find(self, pattern: str, base_path: str = "") -> str:
+        trie = self.snapshot.get_index("paths", PathTrie.from_snapshot)
+        matches = trie.glob(pattern, normalize_path(base_path or ""), limit=MAX_FIND_RESULTS)
+        return "\n".join(matches) if matches else f"No files match {pattern}"
+
+    def _tool_grep_search(self, pattern: str, path: str = "", recursive: bool = True) -> str:
+        if len(pattern) > MAX_GREP_PATTERN_LENGTH:
+            raise ToolExecutionError(f"Pattern is longer than {MAX_GREP_PATTERN_LENGTH} characters")
+        try:
+            regex = re.compile(pattern, re.MULTILINE)
+        except re.error:
+            regex = re.compile(re.escape(pattern), re.MULTILINE)
+
+        with self.snapshot.lock:
+            paths = self._paths_under(path, recursive)
+            candidates = self.snapshot.get_index("trigrams", TrigramIndex.from_snapshot).candidates(regex.pattern)
+            if candidates is not None:
+                paths = [file_path for file_path in paths if file_path in candidates]
+            files = [(file_path, self.snapshot.files[file_path]) for file_path in paths]
+
+        matches = []
+        deadline = time.monotonic() + GREP_TIME_LIMIT
+        for file_path, content in files:
+            if time.monotonic() > deadline:
+                matches.append(f"[search stopped after {GREP_TIME_LIMIT:g}s, simplify the pattern]")
+                break
+            # One pass over the whole file rejects most candidates before splitting lines
+            if not regex.search(content):
+                continue
+            for number, line in enumerate(content.splitlines(), 1):
+                if regex.search(line):
+                    matches.append(f"{file_path}:{number}: {line.strip()[:MAX_GREP_LINE_LENGTH]}")
+                    if len(matches) == MAX_GREP_MATCHES:
+                        return "\n".join(matches)
+        return "\n".join(matches) if matches else f"No matches for {pattern}"
+
+    def _tool_list_directory(self, directory: str = "") -> str:
+        base = normalize_path(directory)
+        prefix = f"{base}/" if base else ""
+        files: Dict[str, int] = {}
+        children: Dict[str, int] = {}
+        for path, content in self.snapshot.files.items():
+            if not path.startswith(prefix):
+                continue
+            parts = path[len(prefix):].split("/", 1)
+            if len(parts) == 1:
+                files[parts[0]] = len(content.encode("utf-8"))
+            else:
+                children[parts[0]] = children.get(parts[0], 0) + 1
+
+        if not files and not children:
+            raise ToolExecutionError(f"Directory not found: {directory}")
+        lines = [f"{name}/ ({count} files)" for name, count in sorted(children.items())]
+        lines += [f"{name} ({size} bytes)" for name, size in sorted(files.items())]
+        return "\n".join(lines)
+
+    def _tool_view_code_item(self, item_name: str, path: str) -> str:
+        path = normalize_path(path)
+        self._read(path)
+        index = self.snapshot.get_index("symbols", SymbolIndex)
+        found = index.lookup(path, item_name.strip()) or index.lookup(path, item_name.strip().rsplit(".", 1)[-1])
+        if found is None:
+            outline = index.outline(path)
+            hint = f"\nDefined symbols:\n{outline}" if outline else ""
+            raise ToolExecutionError(f"{item_name} not found in {path}{hint}")
+        return found[1]
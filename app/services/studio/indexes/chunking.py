@@ -0,0 +1,86 @@
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# Lines that start a top-level definition in the languages generated by the API
+_TOP_LEVEL_DEFINITION = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:abstract\s+)?(?:async\s+)?"
+    r"(?:def|class|function|interface|type|enum|mixin|extension|const|let|var)\s+(?P<name>[A-Za-z_$][\w$]*)"
+)
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*|\d+")
+_CAMEL_PARTS = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+WINDOW_LINES = 60
+WINDOW_OVERLAP = 10
+
+
+class Chunk:
+    """A searchable slice of a file: a top-level definition or a window of lines."""
+
+    __slots__ = ("path", "start_line", "end_line", "text", "symbol")
+
+    def __init__(self, path: str, start_line: int, end_line: int, text: str, symbol: Optional[str] = None):
+        self.path = path
+        self.start_line = start_line
+        self.end_line = end_line
+        self.text = text
+        self.symbol = symbol
+
+
+def chunk_file(path: str, content: str, window: int = WINDOW_LINES, overlap: int = WINDOW_OVERLAP) -> List[Chunk]:
+    """
+    Splits a file at its top-level definitions. Code between definitions and
+    definitions longer than window lines are split into overlapping windows.
+    """
+    lines = content.splitlines()
+    starts = [0]
+    symbols: List[Optional[str]] = [None]
+    for number, line in enumerate(lines):
+        match = _TOP_LEVEL_DEFINITION.match(line)
+        if match:
+            if number == 0:
+                symbols[0] = match.group("name")
+            else:
+                starts.append(number)
+                symbols.append(match.group("name"))
+    starts.append(len(lines))
+
+    chunks = []
+    for index, symbol in enumerate(symbols):
+        start, end = starts[index], starts[index + 1]
+        for window_start in range(start, max(end, start + 1), window - overlap):
+            window_end = min(window_start + window, end)
+            text = "\n".join(lines[window_start:window_end])
+            if text.strip():
+                chunks.append(Chunk(path, window_start + 1, window_end, text, symbol))
+            if window_end == end:
+                break
+    return chunks
+
+
+@lru_cache(maxsize=65536)
+def _identifier_terms(identifier: str) -> Tuple[str, ...]:
+    lowered = identifier.lower()
+    parts = [part.lower() for word in re.split(r"[_$]+", identifier) for part in _CAMEL_PARTS.findall(word)]
+    if len(parts) > 1:
+        return (lowered, *(part for part in parts if len(part) > 1))
+    return (lowered,)
+
+
+def term_frequencies(text: str) -> Counter:
+    """
+    Lower-cased search terms of text with their counts. Identifiers are indexed
+    whole and split into their camelCase / snake_case parts, so 'getUserName' also
+    matches 'user name'.
+    """
+    frequencies: Counter = Counter()
+    for identifier, count in Counter(_IDENTIFIER.findall(text)).items():
+        for term in _identifier_terms(identifier):
+            frequencies[term] += count
+    return frequencies
+
+
+def tokenize(text: str) -> List[str]:
+    """Distinct search terms of text, see term_frequencies."""
+    return list(term_frequencies(text))
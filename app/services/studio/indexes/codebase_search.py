@@ -0,0 +1,191 @@
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.studio.indexes.chunking import Chunk, chunk_file, term_frequencies, tokenize
+from app.utils.logger import logger
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Weight of path and symbol terms relative to terms of the chunk text
+NAME_BOOST = 3
+# Reciprocal rank fusion constant used to merge BM25 and embedding rankings
+RRF_K = 60
+
+
+class EmbeddingBackend:
+    """CPU sentence embeddings through the optional sentence-transformers package."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(texts, batch_size=32, normalize_embeddings=True, show_progress_bar=False),
+            dtype=np.float32,
+        )
+
+
+_BACKENDS: Dict[str, Optional[EmbeddingBackend]] = {}
+
+
+def load_embedding_backend(model_name: str) -> Optional[EmbeddingBackend]:
+    """Returns the shared backend for model_name, or None if embeddings are disabled or unavailable."""
+    if not model_name:
+        return None
+    if model_name not in _BACKENDS:
+        try:
+            _BACKENDS[model_name] = EmbeddingBackend(model_name)
+        except Exception as e:
+            logger.warning(f"Embedding backend {model_name} unavailable, codebase_search uses BM25 only: {str(e)}")
+            _BACKENDS[model_name] = None
+    return _BACKENDS[model_name]
+
+
+class CodebaseSearchIndex:
+    """
+    BM25 index over the chunks of a project snapshot, optionally fused with
+    embedding similarity.
+
+    Postings are kept per term and updated file by file. Query-time arrays are
+    built lazily per term and dropped when the term's postings change, so a
+    query over tens of thousands of chunks is a handful of vectorised operations.
+    Ids of removed chunks are reused, so the id space and the per-chunk arrays stay
+    at the largest size the project had, however often its files are updated.
+    """
+
+    def __init__(self, embeddings: Optional[EmbeddingBackend] = None):
+        self.embeddings = embeddings
+        self.chunks: Dict[int, Chunk] = {}
+        self._file_chunks: Dict[str, List[int]] = {}
+        self._chunk_terms: Dict[int, Counter] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lengths: List[int] = []
+        self._lengths_array: Optional[np.ndarray] = None
+        self._total_length = 0
+        self._vectors: Dict[int, np.ndarray] = {}
+        self._matrix: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._free_ids: List[int] = []
+
+    @classmethod
+    def from_snapshot(cls, snapshot, embeddings: Optional[EmbeddingBackend] = None) -> "CodebaseSearchIndex":
+        index = cls(embeddings)
+        for path, content in snapshot.files.items():
+            index.update(path, content)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def update(self, path: str, content: str):
+        self.remove(path)
+        chunks = chunk_file(path, content)
+        ids = []
+        for chunk in chunks:
+            terms = term_frequencies(chunk.text)
+            for term, count in term_frequencies(f"{chunk.path} {chunk.symbol or ''}").items():
+                terms[term] += count * NAME_BOOST
+            length = sum(terms.values())
+
+            if self._free_ids:
+                chunk_id = self._free_ids.pop()
+                self._lengths[chunk_id] = length
+            else:
+                chunk_id = len(self._lengths)
+                self._lengths.append(length)
+            ids.append(chunk_id)
+
+            self.chunks[chunk_id] = chunk
+            self._chunk_terms[chunk_id] = terms
+            self._total_length += length
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[chunk_id] = frequency
+                self._arrays.pop(term, None)
+
+        self._file_chunks[path] = ids
+        self._lengths_array = None
+        if self.embeddings is not None and chunks:
+            vectors = self.embeddings.embed([f"{chunk.path}\n{chunk.text}" for chunk in chunks])
+            self._vectors.update(zip(ids, vectors))
+            self._matrix = None
+
+    def remove(self, path: str):
+        for chunk_id in self._file_chunks.pop(path, []):
+            del self.chunks[chunk_id]
+            self._total_length -= self._lengths[chunk_id]
+            # No postings refer to a free id until it is reused, its length is not read meanwhile
+            self._free_ids.append(chunk_id)
+            for term in self._chunk_terms.pop(chunk_id):
+                postings = self._postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self._postings[term]
+                self._arrays.pop(term, None)
+            if self._vectors.pop(chunk_id, None) is not None:
+                self._matrix = None
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[Chunk, float]]:
+        """Returns the top_k chunks for query with their scores, best first."""
+        if not self.chunks:
+            return []
+
+        ranking = self._bm25(query, top_k if self.embeddings is None else top_k * 4)
+        if self.embeddings is None:
+            return [(self.chunks[chunk_id], score) for chunk_id, score in ranking]
+
+        fused: Dict[int, float] = {}
+        for rank, (chunk_id, _) in enumerate(ranking):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+        for rank, (chunk_id, _) in enumerate(self._similar(query, top_k * 4)):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+        best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(self.chunks[chunk_id], score) for chunk_id, score in best]
+
+    def _bm25(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        if self._lengths_array is None:
+            self._lengths_array = np.asarray(self._lengths, dtype=np.float32)
+        lengths = self._lengths_array
+
+        count = len(self.chunks)
+        average_length = self._total_length / count
+        scores = np.zeros(len(lengths), dtype=np.float32)
+        matched = False
+        for term in tokenize(query):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            matched = True
+            arrays = self._arrays.get(term)
+            if arrays is None:
+                arrays = self._arrays[term] = (
+                    np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                    np.fromiter(postings.values(), dtype=np.float32, count=len(postings)),
+                )
+            ids, frequencies = arrays
+            idf = math.log(1 + (count - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[ids] / average_length)
+            scores[ids] += idf * frequencies * (BM25_K1 + 1) / (frequencies + norm)
+
+        if not matched:
+            return []
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(scores[candidates], -top_k)[-top_k:]]
+        best = candidates[np.argsort(scores[candidates])[::-1]]
+        return [(int(chunk_id), float(scores[chunk_id])) for chunk_id in best]
+
+    def _similar(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        if not self._vectors:
+            return []
+        if self._matrix is None:
+            ids = np.fromiter(self._vectors.keys(), dtype=np.int64, count=len(self._vectors))
+            self._matrix = (ids, np.stack(list(self._vectors.values())))
+        ids, matrix = self._matrix
+        similarities = matrix @ self.embeddings.embed([query])[0]
+        best = np.argsort(similarities)[::-1][:top_k]
+        return [(int(ids[position]), float(similarities[position])) for position in best]
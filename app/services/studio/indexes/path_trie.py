@@ -0,0 +1,126 @@
+import fnmatch
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Set
+
+_GLOB_MAGIC = re.compile(r"[*?\[]")
+
+
+@lru_cache(maxsize=1024)
+def _segment_matcher(segment: str):
+    return re.compile(fnmatch.translate(segment)).match
+
+
+class _Node:
+    __slots__ = ("children", "is_file", "files")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.is_file = False
+        # Number of files below this node, used to prune empty directories
+        self.files = 0
+
+
+class PathTrie:
+    """
+    Trie of project paths split into segments, for glob matching without
+    testing every path: literal segments are dictionary lookups and only
+    wildcard segments look at the children of the directories reached.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        # File name -> paths, for the common lookup of one file by its exact name
+        self._names: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "PathTrie":
+        trie = cls()
+        for path in snapshot.files:
+            trie.add(path)
+        return trie
+
+    def update(self, path: str, content: str):
+        self.add(path)
+
+    def add(self, path: str):
+        nodes = [self.root]
+        for segment in path.split("/"):
+            nodes.append(nodes[-1].children.setdefault(segment, _Node()))
+        if nodes[-1].is_file:
+            return
+        nodes[-1].is_file = True
+        for node in nodes:
+            node.files += 1
+        self._names.setdefault(path.rsplit("/", 1)[-1], set()).add(path)
+
+    def remove(self, path: str):
+        segments = path.split("/")
+        nodes = [self.root]
+        for segment in segments:
+            node = nodes[-1].children.get(segment)
+            if node is None:
+                return
+            nodes.append(node)
+        if not nodes[-1].is_file:
+            return
+
+        nodes[-1].is_file = False
+        for node in nodes:
+            node.files -= 1
+        for parent, segment, node in zip(reversed(nodes[:-1]), reversed(segments), reversed(nodes[1:])):
+            if node.files:
+                break
+            del parent.children[segment]
+
+        names = self._names[segments[-1]]
+        names.discard(path)
+        if not names:
+            del self._names[segments[-1]]
+
+    def glob(self, pattern: str, base_path: str = "", limit: Optional[int] = None) -> List[str]:
+        """
+        Paths under base_path matching pattern, sorted. '*' and '?' match within a
+        segment and '**' matches any number of segments; a pattern without '/'
+        matches file names at any depth.
+        """
+        pattern = pattern.strip().strip("/")
+        base = "/".join(segment for segment in base_path.split("/") if segment)
+        if "/" not in pattern and not _GLOB_MAGIC.search(pattern):
+            base_prefix = f"{base}/" if base else ""
+            matches = sorted(path for path in self._names.get(pattern, ()) if path.startswith(base_prefix))
+            return matches[:limit] if limit is not None else matches
+        segments = pattern.split("/") if "/" in pattern else ["**", pattern]
+
+        node = self.root
+        prefix: List[str] = []
+        for segment in base.split("/") if base else []:
+            node = node.children.get(segment)
+            if node is None:
+                return []
+            prefix.append(segment)
+
+        matches = sorted(set(self._match(node, segments, prefix)))
+        return matches[:limit] if limit is not None else matches
+
+    def _match(self, node: _Node, segments: List[str], prefix: List[str]) -> Iterator[str]:
+        if not segments:
+            if node.is_file:
+                yield "/".join(prefix)
+            return
+
+        segment, rest = segments[0], segments[1:]
+        if segment == "**":
+            # Zero segments, then one more directory level with '**' still pending
+            yield from self._match(node, rest, prefix)
+            for name, child in node.children.items():
+                yield from self._match(child, segments, prefix + [name])
+        elif not _GLOB_MAGIC.search(segment):
+            child = node.children.get(segment)
+            if child is not None:
+                yield from self._match(child, rest, prefix + [segment])
+        else:
+            matches = _segment_matcher(segment)
+            for name, child in node.children.items():
+                if matches(name):
+                    yield from self._match(child, rest, prefix + [name])
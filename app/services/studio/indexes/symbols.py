@@ -0,0 +1,57 @@
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.files.symbols import Symbol, extract_symbols, format_outline
+
+
+class _FileSymbols:
+    __slots__ = ("hash", "symbols", "by_name")
+
+    def __init__(self, content_hash: str, symbols: List[Symbol]):
+        self.hash = content_hash
+        self.symbols = symbols
+        self.by_name: Dict[str, Symbol] = {}
+        for symbol in symbols:
+            # The first definition wins for both the plain and the qualified name
+            self.by_name.setdefault(symbol.qualified_name, symbol)
+            self.by_name.setdefault(symbol.name, symbol)
+
+
+class SymbolIndex:
+    """
+    Symbol tables of the snapshot files, parsed on first lookup and reparsed only
+    when the file's content hash changed, so a name resolves to a slice of the
+    file content with a dictionary lookup.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self._files: Dict[str, _FileSymbols] = {}
+
+    def update(self, path: str, content: str):
+        # Parsed lazily in symbols(); the content hash tells whether the table is stale
+        pass
+
+    def remove(self, path: str):
+        self._files.pop(path, None)
+
+    def symbols(self, path: str) -> List[Symbol]:
+        return self._table(path).symbols if path in self.snapshot.files else []
+
+    def lookup(self, path: str, name: str) -> Optional[Tuple[Symbol, str]]:
+        """Returns the symbol called name (plain or Class.member) in path and its source."""
+        if path not in self.snapshot.files:
+            return None
+        symbol = self._table(path).by_name.get(name)
+        if symbol is None:
+            return None
+        return symbol, self.snapshot.files[path][symbol.start:symbol.end]
+
+    def outline(self, path: str) -> str:
+        return format_outline(self.symbols(path))
+
+    def _table(self, path: str) -> _FileSymbols:
+        content_hash = self.snapshot.hashes[path]
+        table = self._files.get(path)
+        if table is None or table.hash != content_hash:
+            table = self._files[path] = _FileSymbols(content_hash, extract_symbols(path, self.snapshot.files[path]))
+        return table
@@ -0,0 +1,142 @@
+import re
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+
+def _trigrams(data: bytes) -> np.ndarray:
+    """Distinct trigrams of data, each packed into one integer."""
+    if len(data) < 3:
+        return np.empty(0, dtype=np.int64)
+    codes = np.frombuffer(data, dtype=np.uint8).astype(np.int64)
+    return np.unique((codes[:-2] << 16) | (codes[1:-1] << 8) | codes[2:])
+
+
+def required_literals(pattern: str) -> Optional[List[List[str]]]:
+    """
+    Literal strings a regex match must contain, as alternatives of AND-ed literals:
+    'foo.*bar' -> [['foo', 'bar']], 'foo|bar' -> [['foo'], ['bar']]. Returns None
+    when some alternative requires no literal, i.e. every file is a candidate.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, sre_constants.error, OverflowError, RecursionError):
+        return [[pattern]]
+
+    items = list(parsed)
+    if len(items) == 1 and items[0][0] is sre_constants.BRANCH:
+        branches = [list(branch) for branch in items[0][1][1]]
+    else:
+        branches = [items]
+
+    alternatives = []
+    for branch in branches:
+        literals = [literal for literal in _sequence_literals(branch) if len(literal.encode("utf-8")) >= 3]
+        if not literals:
+            return None
+        alternatives.append(literals)
+    return alternatives
+
+
+def _sequence_literals(items) -> List[str]:
+    literals: List[str] = []
+    run: List[str] = []
+    for op, argument in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(argument))
+            continue
+        if run:
+            literals.append("".join(run))
+            run = []
+        if op is sre_constants.SUBPATTERN:
+            # Groups are required as a whole, their inner literals are too
+            literals.extend(_sequence_literals(argument[-1]))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and argument[0] >= 1:
+            literals.extend(_sequence_literals(argument[2]))
+    if run:
+        literals.append("".join(run))
+    return literals
+
+
+class TrigramIndex:
+    """
+    Inverted index from byte trigrams of lower-cased file content to files.
+
+    Used to narrow the files a regex has to run on: a file can only match if it
+    contains every trigram of the literals the regex requires. Lower-casing makes
+    the candidates a superset for case-insensitive patterns as well.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._paths: Dict[int, str] = {}
+        self._file_trigrams: Dict[int, np.ndarray] = {}
+        self._postings: Dict[int, Set[int]] = {}
+        self._next_id = 0
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "TrigramIndex":
+        index = cls()
+        for path, content in snapshot.files.items():
+            index.update(path, content)
+        return index
+
+    def update(self, path: str, content: str):
+        self.remove(path)
+        file_id = self._next_id
+        self._next_id += 1
+        self._ids[path] = file_id
+        self._paths[file_id] = path
+
+        trigrams = _trigrams(content.lower().encode("utf-8", errors="surrogatepass"))
+        self._file_trigrams[file_id] = trigrams
+        postings = self._postings
+        for trigram in trigrams.tolist():
+            files = postings.get(trigram)
+            if files is None:
+                postings[trigram] = {file_id}
+            else:
+                files.add(file_id)
+
+    def remove(self, path: str):
+        file_id = self._ids.pop(path, None)
+        if file_id is None:
+            return
+        del self._paths[file_id]
+        for trigram in self._file_trigrams.pop(file_id).tolist():
+            files = self._postings[trigram]
+            files.discard(file_id)
+            if not files:
+                del self._postings[trigram]
+
+    def candidates(self, pattern: str) -> Optional[Set[str]]:
+        """Paths of the files that may match pattern, or None if the index cannot narrow them."""
+        alternatives = required_literals(pattern)
+        if alternatives is None:
+            return None
+
+        paths: Set[str] = set()
+        for literals in alternatives:
+            trigrams = set()
+            for literal in literals:
+                trigrams.update(_trigrams(literal.lower().encode("utf-8", errors="surrogatepass")).tolist())
+            postings = [self._postings.get(trigram) for trigram in trigrams]
+            if not all(postings):
+                continue
+
+            # Intersect starting from the rarest trigram to keep the working set small
+            postings.sort(key=len)
+            matched = set(postings[0])
+            for files in postings[1:]:
+                matched &= files
+                if not matched:
+                    break
+            paths.update(self._paths[file_id] for file_id in matched)
+        return paths
@@ -0,0 +1,171 @@
+import re
+import xml.etree.ElementTree as ET
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+# Titles of steps that only add new files and can run next to each other
+_INDEPENDENT_STEP = re.compile(r"^\s*(create|add|write|generate)\b", re.IGNORECASE)
+_UNESCAPED_AMPERSAND = re.compile(r"&(?!(?:amp|lt|gt|quot|apos|#\d+|#x[0-9a-fA-F]+);)")
+_STEP_PATTERN = re.compile(r"<step>(.*?)</step>", re.DOTALL)
+_PLAN_END = "</plan>"
+
+
+class PlanStep(BaseModel):
+    id: str
+    title: str
+    description: str = ""
+    depends_on: List[str] = Field(default_factory=list)
+
+
+class Plan(BaseModel):
+    task_title: str = ""
+    task_description: str = ""
+    steps: List[PlanStep] = Field(default_factory=list)
+
+
+def _tag_text(fragment: str, tag: str) -> str:
+    match = re.search(rf"<{tag}>(.*?)</{tag}>", fragment, re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+
+class PlanParser:
+    """
+    Incremental parser for the <plan> document produced in planning mode.
+
+    Text deltas are fed as they stream in and every <step> is returned as soon as
+    its closing tag arrives, with its dependencies resolved, so execution can start
+    before the rest of the plan is generated. If the model emits XML that does not
+    parse, the parser falls back to a regex pass over the full plan once it ends.
+    """
+
+    def __init__(self):
+        self.plan = Plan()
+        self.complete = False
+        self._parser = ET.XMLPullParser(events=("end",))
+        self._started = False
+        self._broken = False
+        self._pending = ""
+        self._raw: List[str] = []
+        self._explicit_ids: Optional[bool] = None
+
+    def feed(self, text: str) -> List[PlanStep]:
+        """Consumes a text delta and returns the steps completed by it."""
+        if self.complete or not text:
+            return []
+
+        text = self._pending + text
+        self._pending = ""
+
+        if not self._started:
+            # Anything the model writes before the <plan> tag is ignored
+            start = text.find("<plan")
+            if start == -1:
+                self._pending = text[-5:]
+                return []
+            text = text[start:]
+            self._started = True
+
+        end = text.find(_PLAN_END)
+        if end != -1:
+            text = text[: end + len(_PLAN_END)]
+            self.complete = True
+        else:
+            # Hold back a trailing entity or tag fragment until the next delta
+            cut = max(text.rfind("&"), text.rfind("<"))
+            if cut != -1 and ">" not in text[cut:] and ";" not in text[cut:]:
+                text, self._pending = text[:cut], text[cut:]
+
+        self._raw.append(text)
+        if self._broken:
+            return self._parse_fallback() if self.complete else []
+
+        try:
+            self._parser.feed(_UNESCAPED_AMPERSAND.sub("&amp;", text))
+            steps = self._read_events()
+        except ET.ParseError:
+            self._broken = True
+            return self._parse_fallback() if self.complete else []
+
+        return steps
+
+    def close(self) -> List[PlanStep]:
+        """Finishes parsing once the planning stream ended and returns any remaining steps."""
+        if self._broken or not self.complete:
+            self.complete = True
+            return self._parse_fallback()
+        return []
+
+    def _read_events(self) -> List[PlanStep]:
+        steps = []
+        for _, elem in self._parser.read_events():
+            if elem.tag == "task_title":
+                self.plan.task_title = (elem.text or "").strip()
+            elif elem.tag == "task_description":
+                self.plan.task_description = (elem.text or "").strip()
+            elif elem.tag == "step":
+                steps.append(
+                    self._add_step(
+                        (elem.findtext("id") or "").strip(),
+                        (elem.findtext("title") or "").strip(),
+                        (elem.findtext("description") or "").strip(),
+                        elem.findtext("depends_on"),
+                    )
+                )
+        return steps
+
+    def _parse_fallback(self) -> List[PlanStep]:
+        raw = "".join(self._raw)
+        if not self.plan.task_title:
+            self.plan.task_title = _tag_text(raw, "task_title")
+        if not self.plan.task_description:
+            self.plan.task_description = _tag_text(raw, "task_description")
+
+        known = len(self.plan.steps)
+        steps = []
+        for fragment in _STEP_PATTERN.findall(raw)[known:]:
+            depends_on = _tag_text(fragment, "depends_on") if "<depends_on>" in fragment else None
+            steps.append(
+                self._add_step(
+                    _tag_text(fragment, "id"),
+                    _tag_text(fragment, "title"),
+                    _tag_text(fragment, "description"),
+                    depends_on,
+                )
+            )
+        return steps
+
+    def _add_step(self, step_id: str, title: str, description: str, depends_on: Optional[str]) -> PlanStep:
+        if self._explicit_ids is None:
+            # The first step decides whether the model followed the id/depends_on format
+            self._explicit_ids = bool(step_id)
+
+        known = {step.id for step in self.plan.steps}
+        if not step_id or step_id in known:
+            # Missing or repeated ids get the next number no step uses yet
+            number = len(self.plan.steps) + 1
+            while str(number) in known:
+                number += 1
+            step_id = str(number)
+
+        if self._explicit_ids:
+            # Only earlier steps are accepted as dependencies, which rules out cycles
+            dependencies = [d.strip() for d in (depends_on or "").split(",") if d.strip() in known]
+        else:
+            dependencies = self._infer_dependencies(title)
+
+        step = PlanStep(id=step_id, title=title, description=description, depends_on=dependencies)
+        self.plan.steps.append(step)
+        return step
+
+    def _infer_dependencies(self, title: str) -> List[str]:
+        """
+        Dependencies for plans without explicit <depends_on>: steps run in order,
+        except that consecutive file-creating steps share the same predecessor.
+        """
+        steps = self.plan.steps
+        if not steps:
+            return []
+        if _INDEPENDENT_STEP.match(title) and _INDEPENDENT_STEP.match(steps[-1].title):
+            return list(steps[-1].depends_on)
+        return [steps[-1].id]
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import posixpath
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.components.config import Config
+from app.schemas.types import FileItem
+
+
+def normalize_path(path: str) -> str:
+    """Normalizes a project path to the form used as snapshot key, e.g. './src//a.ts' -> 'src/a.ts'."""
+    path = posixpath.normpath(path.strip().replace("\\", "/")).lstrip("/")
+    return "" if path == "." else path
+
+
+def content_hash(content: str) -> str:
+    return hashlib.blake2b(content.encode("utf-8", errors="surrogatepass"), digest_size=16).hexdigest()
+
+
+class ProjectSnapshot:
+    """
+    In-memory copy of a session's project files.
+
+    Indexes built over the snapshot are registered through get_index() and are
+    updated file by file whenever the snapshot changes, so a follow-up request that
+    only changed a few files does not rebuild them.
+
+    Tools read the snapshot in worker threads while another request of the same
+    session may sync it, so readers iterating files and index builds hold lock.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, str] = {}
+        self.hashes: Dict[str, str] = {}
+        self.version = 0
+        self.last_used = time.monotonic()
+        self._indexes: Dict[str, Any] = {}
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def read(self, path: str) -> Optional[str]:
+        return self.files.get(normalize_path(path))
+
+    def write(self, path: str, content: str):
+        path = normalize_path(path)
+        digest = content_hash(content)
+        with self.lock:
+            if self.hashes.get(path) == digest:
+                return
+            self.files[path] = content
+            self.hashes[path] = digest
+            self.version += 1
+            for index in self._indexes.values():
+                index.update(path, content)
+
+    def remove(self, path: str):
+        path = normalize_path(path)
+        with self.lock:
+            if self.files.pop(path, None) is None:
+                return
+            del self.hashes[path]
+            self.version += 1
+            for index in self._indexes.values():
+                index.remove(path)
+
+    def sync(self, files: Optional[List[FileItem]]):
+        """
+        Brings the snapshot in line with the project files sent by the client. A
+        non-empty list is the full project state; an empty one keeps the snapshot.
+        """
+        self.last_used = time.monotonic()
+        if not files:
+            return
+
+        seen = set()
+        with self.lock:
+            for file in files:
+                path = normalize_path(file.filename)
+                seen.add(path)
+                self.write(path, file.content)
+
+            for path in [path for path in self.files if path not in seen]:
+                self.remove(path)
+
+    def get_index(self, name: str, factory: Callable[["ProjectSnapshot"], Any]) -> Any:
+        """
+        Returns the index registered under name, building it on first use.
+        Indexes must implement update(path, content) and remove(path).
+        """
+        with self.lock:
+            index = self._indexes.get(name)
+            if index is None:
+                index = self._indexes[name] = factory(self)
+            return index
+
+
+class SnapshotStore:
+    """
+    Project snapshots of recent sessions, evicted by TTL and least recent use.
+    Sessions are scoped to the API key, another key sending the same session id
+    gets a snapshot of its own.
+    """
+
+    def __init__(self, max_sessions: int, ttl: float):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._snapshots: "OrderedDict[Tuple[Optional[str], str], ProjectSnapshot]" = OrderedDict()
+
+    async def get(
+            self, owner: Optional[str], session_id: Optional[str], files: Optional[List[FileItem]]
+    ) -> ProjectSnapshot:
+        """Returns the session's snapshot synced with files, or a throwaway one without a session id."""
+        if not session_id:
+            snapshot = ProjectSnapshot()
+        else:
+            self._evict_expired()
+            key = (owner, session_id)
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                snapshot = self._snapshots[key] = ProjectSnapshot()
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > self.max_sessions:
+                self._snapshots.popitem(last=False)
+
+        # Hashing the files and updating the indexes is CPU work, keep it off the event loop
+        await asyncio.to_thread(snapshot.sync, files)
+        return snapshot
+
+    def _evict_expired(self):
+        deadline = time.monotonic() - self.ttl
+        while self._snapshots:
+            key, snapshot = next(iter(self._snapshots.items()))
+            if snapshot.last_used >= deadline:
+                break
+            del self._snapshots[key]
+
+
+snapshot_store = SnapshotStore(max_sessions=Config.STUDIO_MAX_SESSIONS, ttl=Config.STUDIO_SESSION_TTL)
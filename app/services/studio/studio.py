@@ -1,83 +1,337 @@
+import asyncio
 import json
-from typing import Any, Dict
+from typing import Any, AsyncGenerator, Dict, List, Optional
 from openai import AsyncOpenAI
-from openai.types.chat import ChatCompletionSystemMessageParam
+from openai.types.chat import ChatCompletionSystemMessageParam, ChatCompletionUserMessageParam
 from pydantic import BaseModel
 from sse_starlette import EventSourceResponse
 
-from app.components.prompts.studio.studio import STUDIO
-from app.components.prompts.studio.tools import TOOLS
+from app.components.config import Config
+from app.components.prompts.registry import prompts
 from app.schemas.types import ChatCompletionRequest
+from app.services.studio.executor import READ_ONLY_TOOLS, ToolExecutor
+from app.services.studio.indexes.symbols import SymbolIndex
+from app.services.studio.planner import PlanParser, PlanStep
+from app.services.studio.snapshot import ProjectSnapshot
+from app.services.studio.tool_calls import STREAMED_FIELDS, ToolCallAccumulator, ToolCallDelta, ToolCallError
+from app.utils.client.prompt_cache import STREAM_USAGE, prefix_cache_stats, static_system_message
+from app.utils.files.tokens import truncate_to_tokens
+from app.utils.logger import logger
 from app.utils.schemas.sse_event import sse_event
 
+# Events buffered per response before running steps wait for the client to catch up
+STEP_QUEUE_SIZE = 256
+# Top-level symbol names listed per file in the project structure
+PROJECT_STRUCTURE_SYMBOLS = 8
+
 
 class SSEData(BaseModel):
     content: Any = None
     tool_calls: Any = None
+    tool_call_delta: Optional[ToolCallDelta] = None
+    error: Optional[ToolCallError] = None
+    step_id: Optional[str] = None
 
 
 class Studio:
     def __init__(self, client: AsyncOpenAI):
         self.client = client
 
-    async def execute(self, request: ChatCompletionRequest) -> EventSourceResponse:
-        system_prompt = STUDIO
+    async def execute(
+            self,
+            request: ChatCompletionRequest,
+            plan: bool = False,
+            snapshot: Optional[ProjectSnapshot] = None,
+    ) -> EventSourceResponse:
+        """
+        Streams the response as Server-Sent Events, see stream() for the arguments.
+        """
+        return EventSourceResponse(self.stream(request, plan=plan, snapshot=snapshot))
+
+    def stream(
+            self,
+            request: ChatCompletionRequest,
+            plan: bool = False,
+            snapshot: Optional[ProjectSnapshot] = None,
+    ) -> AsyncGenerator[dict, None]:
+        """
+        The SSE events of the response.
+
+        Args:
+            request: The chat completion request
+            plan: Plan the task first and execute its steps concurrently
+            snapshot: Project snapshot to answer read-only tool calls from on the server;
+                without it every tool call is forwarded to the client
+        """
+        executor = ToolExecutor(snapshot, Config.STUDIO_TOOL_RESULT_TOKENS) if snapshot is not None else None
+        if plan:
+            return self._plan_and_execute(request, executor)
 
         async def stream_response():
-            stream = await self.client.chat.completions.create(
-                model=request.model,
-                messages=[
-                    ChatCompletionSystemMessageParam(role="system", content=system_prompt),
-                ] + request.messages,
-                stream=True,
-                temperature=request.temperature,
-                top_p=request.top_p,
-                max_tokens=request.max_tokens,
-                tools=TOOLS,
-                tool_choice="auto"
-            )
+            structure = await asyncio.to_thread(self._project_structure, request, executor) if executor else None
+            messages = self._system_messages(request.model, structure) + request.messages
+            async for data in self._run_agent(request, messages, executor=executor):
+                yield sse_event(data)
+
+        return stream_response()
+
+    async def _stream_completion(self, request: ChatCompletionRequest, messages: list, step_id: Optional[str] = None):
+        stream = await self.client.chat.completions.create(
+            model=request.model,
+            messages=messages,
+            stream=True,
+            temperature=request.temperature,
+            top_p=request.top_p,
+            max_tokens=request.max_tokens,
+            tools=prompts.get("studio_tools"),
+            tool_choice="auto",
+            stream_options=STREAM_USAGE,
+        )
 
-            ongoing_call: Dict[str, str] | None = None
-            async for chunk in stream:
-                delta = chunk.choices[0].delta
-                finish = getattr(chunk.choices[0], 'finish_reason', None)
-                tool_calls = getattr(delta, 'tool_calls', []) or []
+        accumulator = ToolCallAccumulator()
+        async for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                prefix_cache_stats.record("studio", chunk.usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            finish = getattr(chunk.choices[0], 'finish_reason', None)
+            tool_calls = getattr(delta, 'tool_calls', []) or []
 
-                if tool_calls is not None and len(tool_calls) > 0:
-                    call = delta.tool_calls[0]
+            for call in tool_calls:
+                completed, deltas, errors = accumulator.feed(call)
+                for data in self._tool_events(completed, deltas, errors, step_id):
+                    yield data
 
-                    if call.function.name is not None:
-                        if ongoing_call is not None:
-                            try:
-                                parsed_args = json.loads(ongoing_call["arguments"])
-                            except Exception as e:
-                                print(e)
-                                parsed_args = {}
+            if (finish == "tool_calls" or len(tool_calls) == 0) and accumulator.pending:
+                names = accumulator.pending_names
+                completed, errors = accumulator.complete()
+                for data in self._tool_events(completed, [], errors, step_id):
+                    yield data
 
-                            calls = [{"name": ongoing_call["name"], "arguments": parsed_args}]
-                            yield sse_event(SSEData(content=None, tool_calls=calls))
-                            ongoing_call = None
+                if finish == "tool_calls" and any(name not in STREAMED_FIELDS for name in names):
+                    await stream.close()
 
-                        ongoing_call = {"name": call.function.name, "arguments": ""}
+            if delta.content:
+                yield SSEData(content=delta.content, tool_calls=None, step_id=step_id)
 
-                    ongoing_call["arguments"] += call.function.arguments or ""
+    async def _run_agent(
+            self,
+            request: ChatCompletionRequest,
+            messages: list,
+            step_id: Optional[str] = None,
+            executor: Optional[ToolExecutor] = None,
+    ):
+        """
+        Streams a tool-enabled completion. With an executor, rounds whose tool calls are
+        all read-only are answered on the server and the conversation continues there;
+        the client only receives the text and the calls it has to execute itself.
+        """
+        if executor is None:
+            async for data in self._stream_completion(request, messages, step_id=step_id):
+                yield data
+            return
+
+        messages = list(messages)
+        for tool_round in range(Config.STUDIO_MAX_TOOL_ROUNDS):
+            text: List[str] = []
+            server_calls: List[dict] = []
+            client_calls = False
+            async for data in self._stream_completion(request, messages, step_id=step_id):
+                if data.tool_calls and all(call["name"] in READ_ONLY_TOOLS for call in data.tool_calls):
+                    server_calls.extend(data.tool_calls)
                     continue
+                client_calls = client_calls or bool(data.tool_calls)
+                if isinstance(data.content, str):
+                    text.append(data.content)
+                yield data
+
+            if not server_calls:
+                return
+            if client_calls or tool_round == Config.STUDIO_MAX_TOOL_ROUNDS - 1:
+                # The client continues the conversation, so it also needs this round's reads
+                for call in server_calls:
+                    yield SSEData(content=None, tool_calls=[call], step_id=step_id)
+                return
+
+            for number, call in enumerate(server_calls):
+                call["id"] = call["id"] or f"call_{tool_round}_{number}"
+            results = await asyncio.to_thread(
+                lambda: [executor.execute(call["name"], call["arguments"]) for call in server_calls]
+            )
+            logger.info(f"Executed {len(server_calls)} tool calls on the server (round {tool_round + 1})")
+
+            messages.append({
+                "role": "assistant",
+                "content": "".join(text) or None,
+                "tool_calls": [
+                    {
+                        "id": call["id"],
+                        "type": "function",
+                        "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])},
+                    }
+                    for call in server_calls
+                ],
+            })
+            messages.extend(
+                {"role": "tool", "tool_call_id": call["id"], "content": result}
+                for call, result in zip(server_calls, results)
+            )
 
-                if (finish == "tool_calls" or len(tool_calls) == 0) and ongoing_call is not None:
-                    try:
-                        parsed_args = json.loads(ongoing_call["arguments"])
-                    except Exception as e:
-                        parsed_args = {}
+    async def _plan_and_execute(self, request: ChatCompletionRequest, executor: Optional[ToolExecutor] = None):
+        """
+        Streams the PLAN call, then runs every step as its own tool-enabled call.
 
-                    calls = [{"name": ongoing_call["name"], "arguments": parsed_args}]
-                    yield sse_event(SSEData(content=None, tool_calls=calls))
+        Steps are started as soon as their <step> element is parsed and all of their
+        dependencies have completed, at most STUDIO_MAX_PARALLEL_STEPS at a time.
+        Their events are multiplexed into one stream and tagged with the step id.
+        """
+        parser = PlanParser()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STEP_QUEUE_SIZE)
+        semaphore = asyncio.Semaphore(Config.STUDIO_MAX_PARALLEL_STEPS)
+        tasks: Dict[str, asyncio.Task] = {}
+        statuses: Dict[str, str] = {}
+        # Summarizing a large snapshot parses its files, keep that off the event loop
+        structure = await asyncio.to_thread(self._project_structure, request, executor)
 
-                    if finish == "tool_calls" and ongoing_call["name"] not in ["write_file", "edit_file"]:
+        def step_event(step: PlanStep, status: str) -> SSEData:
+            statuses[step.id] = status
+            return SSEData(
+                content={
+                    "type": "step",
+                    "step_id": step.id,
+                    "title": step.title,
+                    "depends_on": step.depends_on,
+                    "status": status,
+                },
+                step_id=step.id,
+            )
+
+        async def run_step(step: PlanStep):
+            dependencies = [tasks[step_id] for step_id in step.depends_on]
+            if dependencies:
+                await asyncio.wait(dependencies)
+            if any(statuses[step_id] != "completed" for step_id in step.depends_on):
+                await queue.put(step_event(step, "skipped"))
+                return
+
+            async with semaphore:
+                await queue.put(step_event(step, "running"))
+                messages = self._system_messages(request.model, structure if executor else None)
+                messages += request.messages + [
+                    ChatCompletionUserMessageParam(role="user", content=self._step_instruction(parser, step))
+                ]
+                try:
+                    async for data in self._run_agent(request, messages, step_id=step.id, executor=executor):
+                        await queue.put(data)
+                except Exception as e:
+                    logger.error(f"Studio step {step.id} ({step.title}) failed: {str(e)}")
+                    await queue.put(step_event(step, "failed"))
+                    return
+                await queue.put(step_event(step, "completed"))
+
+        async def schedule(steps: List[PlanStep]):
+            for step in steps:
+                await queue.put(step_event(step, "planned"))
+                tasks[step.id] = asyncio.create_task(run_step(step))
+
+        async def plan_and_run():
+            try:
+                stream = await self.client.chat.completions.create(
+                    model=request.model,
+                    messages=[
+                        static_system_message(prompts.get("studio_plan"), request.model),
+                        ChatCompletionSystemMessageParam(role="system", content=structure),
+                    ] + request.messages,
+                    stream=True,
+                    temperature=request.temperature,
+                    top_p=request.top_p,
+                    max_tokens=request.max_tokens,
+                    stream_options=STREAM_USAGE,
+                )
+                async for chunk in stream:
+                    if getattr(chunk, "usage", None) is not None:
+                        prefix_cache_stats.record("studio_plan", chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        await schedule(parser.feed(content))
+                    if parser.complete:
                         await stream.close()
+                        break
+                remaining = parser.close()
+
+                # The plan is complete once parsed, announce it before the last steps are scheduled
+                await queue.put(SSEData(content={
+                    "type": "plan",
+                    "task_title": parser.plan.task_title,
+                    "task_description": parser.plan.task_description,
+                    "steps": [step.title for step in parser.plan.steps],
+                    "graph": {step.id: step.depends_on for step in parser.plan.steps},
+                }))
+                await schedule(remaining)
+                if tasks:
+                    await asyncio.wait(list(tasks.values()))
+            except Exception as e:
+                logger.error(f"Studio planning failed: {str(e)}")
+                await queue.put(SSEData(content={"type": "plan", "status": "failed"}))
+            finally:
+                await queue.put(None)
+
+        runner = asyncio.create_task(plan_and_run())
+        try:
+            while (data := await queue.get()) is not None:
+                yield sse_event(data)
+        finally:
+            # The client disconnected or the stream finished, stop everything still running
+            for task in [runner, *tasks.values()]:
+                task.cancel()
+
+    @staticmethod
+    def _system_messages(model: Optional[str], structure: Optional[str] = None) -> list:
+        # STUDIO and TOOLS form the cacheable prefix, the project structure changes per request
+        messages = [static_system_message(prompts.get("studio"), model)]
+        if structure is not None:
+            # Server-side tools need paths the model can refer to
+            messages.append(ChatCompletionSystemMessageParam(role="system", content=structure))
+        return messages
+
+    @staticmethod
+    def _project_structure(request: ChatCompletionRequest, executor: Optional[ToolExecutor] = None) -> str:
+        if executor is None:
+            paths = [file.filename for file in request.project_files or []]
+            return "Project structure:\n" + ("\n".join(paths) if paths else "(empty project)")
+
+        # With a snapshot, every file is summarized by its top-level symbols
+        lines = []
+        with executor.snapshot.lock:
+            symbols = executor.snapshot.get_index("symbols", SymbolIndex)
+            for path in sorted(executor.snapshot.files):
+                names = [symbol.name for symbol in symbols.symbols(path) if symbol.parent is None]
+                if len(names) > PROJECT_STRUCTURE_SYMBOLS:
+                    names = names[:PROJECT_STRUCTURE_SYMBOLS] + ["..."]
+                lines.append(f"{path}: {', '.join(names)}" if names else path)
+        structure = "Project structure:\n" + ("\n".join(lines) if lines else "(empty project)")
+        return truncate_to_tokens(structure, Config.STUDIO_TOOL_RESULT_TOKENS)
+
+    @staticmethod
+    def _step_instruction(parser: PlanParser, step: PlanStep) -> str:
+        return (
+            f"You are executing one step of the plan \"{parser.plan.task_title}\".\n"
+            f"Step {step.id}: {step.title}\n"
+            f"{step.description}\n\n"
+            "Perform ONLY this step. Other steps of the plan are executed separately, possibly at the same time."
+        )
 
-                    ongoing_call = None
+    @staticmethod
+    def _tool_events(completed, deltas, errors, step_id: Optional[str] = None):
+        for call in completed:
+            yield SSEData(content=None, tool_calls=[call], step_id=step_id)
 
-                if delta.content:
-                    yield sse_event(SSEData(content=delta.content, tool_calls=None))
+        for tool_call_delta in deltas:
+            yield SSEData(tool_call_delta=tool_call_delta, step_id=step_id)
 
-        return EventSourceResponse(stream_response())
+        for error in errors:
+            logger.warning(f"Malformed arguments for tool call {error.name}: {error.details}")
+            yield SSEData(error=error, step_id=step_id)
@@ -0,0 +1,379 @@
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Top-level string arguments streamed to the client while they are still being generated
+STREAMED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "write_file": ("content",),
+    "edit_file": ("edits",),
+}
+
+_WHITESPACE = " \t\r\n"
+_LITERAL_START = "-0123456789tfn"
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class ToolArgumentsError(ValueError):
+    """Raised when streamed tool call arguments are not a valid JSON object."""
+
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for the JSON object carried in streamed tool call arguments.
+
+    Chunks are validated as they arrive. Decoded text of the top-level string
+    fields listed in stream_fields is returned from feed() as soon as it is
+    received, other top-level string fields are available in values once they
+    are complete. Nested objects and arrays are only validated structurally;
+    finish() returns the fully decoded object.
+    """
+
+    def __init__(self, stream_fields: Iterable[str] = ()):
+        self.stream_fields = set(stream_fields)
+        self.values: Dict[str, str] = {}
+        self.error: Optional[str] = None
+        self._chunks: List[str] = []
+        self._state = "start"
+        self._key: Optional[str] = None
+        self._buffer: List[str] = []
+        # Incomplete escape sequence carried over to the next chunk, e.g. "\\u00"
+        self._escape = ""
+        self._high_surrogate: Optional[str] = None
+        # Nesting depth and string state inside a nested object/array value
+        self._depth = 0
+        self._nested_string = False
+        self._nested_escape = False
+
+    @property
+    def complete(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consumes a chunk and returns (field, decoded text) deltas for streamed fields."""
+        if not chunk or self.error is not None:
+            return []
+
+        self._chunks.append(chunk)
+        deltas: List[Tuple[str, str]] = []
+        i = 0
+        length = len(chunk)
+
+        while i < length and self.error is None:
+            state = self._state
+
+            if state in ("string", "key"):
+                i = self._consume_string(chunk, i, deltas)
+                continue
+
+            if state == "nested":
+                i = self._consume_nested(chunk, i)
+                continue
+
+            char = chunk[i]
+            if state == "literal":
+                if char in ",}" or char in _WHITESPACE:
+                    self._state = "after_value"
+                    continue
+                i += 1
+                continue
+
+            i += 1
+            if char in _WHITESPACE:
+                continue
+
+            if state == "start":
+                self._expect(char == "{", char, "'{'", "key_or_end")
+            elif state == "key_or_end":
+                if char == "}":
+                    self._state = "done"
+                else:
+                    self._expect(char == '"', char, "a quoted key", "key")
+            elif state == "next_key":
+                self._expect(char == '"', char, "a quoted key", "key")
+            elif state == "colon":
+                self._expect(char == ":", char, "':'", "value")
+            elif state == "value":
+                if char == '"':
+                    self._state = "string"
+                elif char in "{[":
+                    self._state = "nested"
+                    self._depth = 1
+                elif char in _LITERAL_START:
+                    self._state = "literal"
+                else:
+                    self._fail(char, "a value")
+            elif state == "after_value":
+                if char == ",":
+                    self._state = "next_key"
+                elif char == "}":
+                    self._state = "done"
+                else:
+                    self._fail(char, "',' or '}'")
+            elif state == "done":
+                self._fail(char, "end of arguments")
+
+        return deltas
+
+    def finish(self) -> Dict[str, Any]:
+        """Returns the decoded arguments or raises ToolArgumentsError."""
+        if self.error is not None:
+            raise ToolArgumentsError(self.error)
+
+        raw = "".join(self._chunks)
+        if not raw.strip():
+            return {}
+        if not self.complete:
+            raise ToolArgumentsError("Tool call arguments ended before the JSON object was closed")
+
+        try:
+            arguments = json.loads(raw)
+        except ValueError as e:
+            raise ToolArgumentsError(f"Invalid tool call arguments: {str(e)}")
+        return arguments
+
+    def _expect(self, ok: bool, char: str, expected: str, next_state: str):
+        if ok:
+            self._state = next_state
+        else:
+            self._fail(char, expected)
+
+    def _fail(self, char: str, expected: str):
+        self.error = f"Unexpected {char!r} in tool call arguments, expected {expected}"
+
+    def _consume_string(self, chunk: str, i: int, deltas: List[Tuple[str, str]]) -> int:
+        is_key = self._state == "key"
+        streamed = not is_key and self._key in self.stream_fields
+        out: List[str] = []
+        length = len(chunk)
+
+        while i < length:
+            if self._escape:
+                i = self._consume_escape(chunk, i, out)
+                continue
+
+            match = _STRING_SPECIAL.search(chunk, i)
+            end = match.start() if match else length
+            if end > i:
+                self._flush_surrogate(out)
+                out.append(chunk[i:end])
+            i = end
+            if match is None:
+                break
+
+            if chunk[i] == "\\":
+                self._escape = "\\"
+                i += 1
+                continue
+
+            # Closing quote
+            i += 1
+            self._flush_surrogate(out)
+            text = "".join(out)
+            if streamed:
+                if text:
+                    deltas.append((self._key, text))
+            else:
+                self._buffer.append(text)
+                value = "".join(self._buffer)
+                self._buffer = []
+                if is_key:
+                    self._key = value
+                else:
+                    self.values[self._key] = value
+            self._state = "colon" if is_key else "after_value"
+            return i
+
+        text = "".join(out)
+        if streamed:
+            if text:
+                deltas.append((self._key, text))
+        else:
+            self._buffer.append(text)
+        return i
+
+    def _consume_escape(self, chunk: str, i: int, out: List[str]) -> int:
+        length = len(chunk)
+        while i < length:
+            self._escape += chunk[i]
+            i += 1
+            escape = self._escape
+            if len(escape) == 2 and escape[1] != "u":
+                if escape[1] not in _ESCAPES:
+                    self.error = f"Invalid escape sequence {escape!r} in tool call arguments"
+                    return length
+                self._flush_surrogate(out)
+                out.append(_ESCAPES[escape[1]])
+                self._escape = ""
+                return i
+            if len(escape) == 6:
+                self._escape = ""
+                try:
+                    code = int(escape[2:], 16)
+                except ValueError:
+                    self.error = f"Invalid unicode escape {escape!r} in tool call arguments"
+                    return length
+                self._decode_code_unit(code, out)
+                return i
+        return i
+
+    def _decode_code_unit(self, code: int, out: List[str]):
+        if 0xD800 <= code <= 0xDBFF:
+            self._flush_surrogate(out)
+            self._high_surrogate = chr(code)
+        elif 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+            pair = self._high_surrogate + chr(code)
+            self._high_surrogate = None
+            out.append(pair.encode("utf-16", "surrogatepass").decode("utf-16"))
+        else:
+            self._flush_surrogate(out)
+            out.append(chr(code))
+
+    def _flush_surrogate(self, out: List[str]):
+        if self._high_surrogate is not None:
+            # Unpaired surrogate, replace it like a lenient decoder would
+            out.append("�")
+            self._high_surrogate = None
+
+    def _consume_nested(self, chunk: str, i: int) -> int:
+        length = len(chunk)
+        while i < length:
+            char = chunk[i]
+            i += 1
+            if self._nested_string:
+                if self._nested_escape:
+                    self._nested_escape = False
+                elif char == "\\":
+                    self._nested_escape = True
+                elif char == '"':
+                    self._nested_string = False
+            elif char == '"':
+                self._nested_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._state = "after_value"
+                    return i
+        return i
+
+
+class ToolCallDelta(BaseModel):
+    index: int
+    id: Optional[str] = None
+    name: str
+    field: str
+    delta: str
+    path: Optional[str] = None
+
+
+class ToolCallError(BaseModel):
+    type: str = "invalid_tool_arguments"
+    index: int
+    id: Optional[str] = None
+    name: Optional[str] = None
+    details: str
+
+
+class _ToolCallState:
+    __slots__ = ("index", "id", "name", "parser", "failed")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.id: Optional[str] = None
+        self.name: Optional[str] = None
+        self.parser: Optional[IncrementalJSONParser] = None
+        self.failed = False
+
+
+class ToolCallAccumulator:
+    """
+    Collects streamed tool call deltas by their index, so several parallel tool
+    calls can be assembled from one stream.
+    """
+
+    def __init__(self):
+        self._calls: Dict[int, _ToolCallState] = {}
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._calls)
+
+    @property
+    def pending_names(self) -> List[Optional[str]]:
+        return [call.name for call in self._calls.values()]
+
+    def feed(self, delta: Any) -> Tuple[List[dict], List[ToolCallDelta], List[ToolCallError]]:
+        """
+        Consumes one streamed tool call delta.
+
+        Returns the calls completed because a later call started, the argument
+        deltas of streamed fields and any argument errors detected so far.
+        """
+        index = getattr(delta, "index", None) or 0
+        completed: List[dict] = []
+        errors: List[ToolCallError] = []
+
+        call = self._calls.get(index)
+        if call is None:
+            # Providers stream parallel calls one after another, so an earlier call is finished
+            earlier = [i for i in self._calls if i < index]
+            if earlier:
+                completed, errors = self.complete(earlier)
+            call = self._calls[index] = _ToolCallState(index)
+
+        if getattr(delta, "id", None):
+            call.id = delta.id
+        function = getattr(delta, "function", None)
+        if function is not None and function.name:
+            call.name = function.name
+
+        deltas: List[ToolCallDelta] = []
+        arguments = getattr(function, "arguments", None) if function is not None else None
+        if arguments and not call.failed:
+            if call.parser is None:
+                call.parser = IncrementalJSONParser(STREAMED_FIELDS.get(call.name, ()))
+
+            for field, text in call.parser.feed(arguments):
+                deltas.append(
+                    ToolCallDelta(
+                        index=index,
+                        id=call.id,
+                        name=call.name,
+                        field=field,
+                        delta=text,
+                        path=call.parser.values.get("path"),
+                    )
+                )
+
+            if call.parser.error is not None:
+                call.failed = True
+                errors.append(self._error(call, call.parser.error))
+
+        return completed, deltas, errors
+
+    def complete(self, indexes: Optional[List[int]] = None) -> Tuple[List[dict], List[ToolCallError]]:
+        """Finishes the given (default: all) pending calls and returns them with their errors."""
+        completed: List[dict] = []
+        errors: List[ToolCallError] = []
+
+        for index in sorted(indexes if indexes is not None else list(self._calls)):
+            call = self._calls.pop(index)
+            if call.failed:
+                # Already reported while streaming
+                continue
+            try:
+                arguments = call.parser.finish() if call.parser is not None else {}
+            except ToolArgumentsError as e:
+                errors.append(self._error(call, str(e)))
+                continue
+            completed.append({"id": call.id, "name": call.name, "arguments": arguments})
+
+        return completed, errors
+
+    @staticmethod
+    def _error(call: _ToolCallState, details: str) -> ToolCallError:
+        return ToolCallError(index=call.index, id=call.id, name=call.name, details=details)
@@ -0,0 +1,288 @@
+import zlib
+from typing import Dict, Optional, Tuple
+
+from fastapi import status
+
+from app.schemas.types import ErrorResponse
+from app.utils.logger import logger
+
+try:
+    import zstandard
+except ImportError:  # zstd is only offered when the package is installed
+    zstandard = None
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# zstd input per decompress call. zstd turns a few bytes into at most a 128 KiB block and
+# its decompressor has no output limit, so a call inflates at most a few MiB past the limit
+ZSTD_FEED_BYTES = 256
+
+compression_stats = {
+    "requests_decompressed": 0,
+    "request_bytes_compressed": 0,
+    "request_bytes": 0,
+    "streams_compressed": 0,
+    "stream_bytes": 0,
+    "stream_bytes_compressed": 0,
+}
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+class _TooLarge(Exception):
+    pass
+
+
+class _Decompressor:
+    """
+    Incremental decompression of one request body. Output is bounded while it is
+    produced, so a small body that inflates to gigabytes is stopped at the limit.
+    """
+
+    def __init__(self, encoding: str, limit: int):
+        self.encoding = encoding
+        self.limit = limit
+        self.size = 0
+        self._inflate = self._new_inflate()
+
+    def _new_inflate(self):
+        if self.encoding == "gzip":
+            # 16 + MAX_WBITS: gzip header and trailer
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    def feed(self, data: bytes) -> bytes:
+        """Raises _TooLarge past the limit and ValueError for corrupt data."""
+        if self.encoding == "gzip":
+            outputs = []
+            while True:
+                try:
+                    output = self._inflate.decompress(data, self.limit - self.size + 1)
+                except zlib.error as e:
+                    raise ValueError(str(e))
+                # Output was cut at the limit with input left over
+                if len(output) > self.limit - self.size or self._inflate.unconsumed_tail:
+                    raise _TooLarge()
+                self.size += len(output)
+                outputs.append(output)
+                # A body may hold several gzip members (RFC 1952), each is inflated in turn
+                data = self._inflate.unused_data if self._inflate.eof else b""
+                if not data:
+                    return b"".join(outputs)
+                self._inflate = self._new_inflate()
+
+        outputs = []
+        for start in range(0, len(data), ZSTD_FEED_BYTES):
+            piece = data[start:start + ZSTD_FEED_BYTES]
+            while piece:
+                # Like gzip members, several zstd frames are inflated in turn
+                if self._inflate.eof:
+                    self._inflate = self._new_inflate()
+                try:
+                    output = self._inflate.decompress(piece)
+                except zstandard.ZstdError as e:
+                    raise ValueError(str(e))
+                self.size += len(output)
+                if self.size > self.limit:
+                    raise _TooLarge()
+                outputs.append(output)
+                piece = self._inflate.unused_data if self._inflate.eof else b""
+        return b"".join(outputs)
+
+    @property
+    def complete(self) -> bool:
+        """Whether the body ended with its last gzip member or zstd frame."""
+        return self._inflate.eof
+
+
+async def _send_error(send, status_code: int, details: str):
+    body = ErrorResponse(details=details, status_code=status_code).model_dump_json().encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RequestDecompressionMiddleware:
+    """
+    Decompresses gzip and zstd request bodies chunk by chunk as they arrive, and
+    hands the app the plain body with its real Content-Length. A body that
+    decompresses to more than max_bytes is refused with 413 before it is inflated
+    any further.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        encoding = dict(scope["headers"]).get(b"content-encoding", b"").decode("latin-1").strip().lower()
+        if encoding in ("", "identity"):
+            return await self.app(scope, receive, send)
+        if encoding == "x-gzip":
+            encoding = "gzip"
+        if encoding not in supported_encodings():
+            return await _send_error(
+                send,
+                status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                f"Content-Encoding {encoding} is not supported, use one of: {', '.join(supported_encodings())}",
+            )
+
+        decompressor = _Decompressor(encoding, self.max_bytes)
+        chunks = []
+        received = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            data = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            received += len(data)
+            try:
+                chunks.append(decompressor.feed(data))
+            except _TooLarge:
+                logger.warning(f"Refused {encoding} request body decompressing past {self.max_bytes} bytes")
+                return await _send_error(
+                    send,
+                    status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    f"Request body decompresses to more than {self.max_bytes} bytes",
+                )
+            except ValueError as e:
+                return await _send_error(send, status.HTTP_400_BAD_REQUEST, f"Invalid {encoding} body: {e}")
+        if not decompressor.complete:
+            return await _send_error(send, status.HTTP_400_BAD_REQUEST, f"Truncated {encoding} body")
+
+        body = b"".join(chunks)
+        compression_stats["requests_decompressed"] += 1
+        compression_stats["request_bytes_compressed"] += received
+        compression_stats["request_bytes"] += len(body)
+        logger.info(f"Decompressed {encoding} request body: {received} -> {len(body)} bytes")
+
+        # The app sees an uncompressed body, so the body size limits apply to what it decodes
+        scope = {
+            **scope,
+            "headers": [
+                (name, value) for name, value in scope["headers"]
+                if name not in (b"content-encoding", b"content-length")
+            ] + [(b"content-length", str(len(body)).encode())],
+        }
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return await self.app(scope, replay_receive, send)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """The preferred supported encoding that Accept-Encoding allows, None for none."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class _StreamCompressor:
+    """Compresses a response batch by batch, flushing each so the client can decode it at once."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._deflate = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:
+            self._zstd = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        # The compression context carries over, later events reuse what earlier ones contained
+        if self.encoding == "gzip":
+            return self._deflate.compress(data) + self._deflate.flush(zlib.Z_SYNC_FLUSH)
+        return self._zstd.compress(data) + self._zstd.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self.encoding == "gzip":
+            return self._deflate.flush(zlib.Z_FINISH)
+        return self._zstd.flush()
+
+
+class SSECompressionMiddleware:
+    """
+    Compresses text/event-stream responses for clients that accept zstd or gzip.
+    Every body message, i.e. every event or batch of events sse_starlette sends,
+    is flushed on its own, so compression does not hold events back.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate_encoding(dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        compressor: Optional[_StreamCompressor] = None
+        sizes = [0, 0]
+
+        async def compressing_send(message):
+            nonlocal compressor
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                content_type = next((value for name, value in headers if name.lower() == b"content-type"), b"")
+                encoded = any(name.lower() == b"content-encoding" for name, _ in headers)
+                if content_type.startswith(b"text/event-stream") and not encoded:
+                    compressor = _StreamCompressor(encoding)
+                    headers = [(name, value) for name, value in headers if name.lower() != b"content-length"]
+                    headers += [(b"content-encoding", encoding.encode()), (b"vary", b"Accept-Encoding")]
+                    message = {**message, "headers": headers}
+                    compression_stats["streams_compressed"] += 1
+                return await send(message)
+
+            if compressor is None or message["type"] != "http.response.body":
+                return await send(message)
+
+            data = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            output = compressor.compress(data) if data else b""
+            if not more_body:
+                output += compressor.finish()
+                compression_stats["stream_bytes"] += sizes[0] + len(data)
+                compression_stats["stream_bytes_compressed"] += sizes[1] + len(output)
+            sizes[0] += len(data)
+            sizes[1] += len(output)
+            await send({**message, "body": output})
+
+        await self.app(scope, receive, compressing_send)
+
+
+def compression_summary() -> Dict[str, object]:
+    requests, streams = compression_stats["request_bytes"], compression_stats["stream_bytes"]
+    return {
+        **compression_stats,
+        "request_ratio": round(compression_stats["request_bytes_compressed"] / requests, 4) if requests else 0.0,
+        "stream_ratio": round(compression_stats["stream_bytes_compressed"] / streams, 4) if streams else 0.0,
+        "encodings": list(supported_encodings()),
+    }
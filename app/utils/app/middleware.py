@@ -5,6 +5,7 @@ from starlette.requests import Request as StarletteRequest
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.components.config import Config
+from app.utils.app.compression import RequestDecompressionMiddleware, SSECompressionMiddleware
 from app.utils.logger import logger
 
 
@@ -15,11 +16,17 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         response = await call_next(request)
         process_time = time.time() - start_time
 
+        # Set by routes that decode their body themselves, see app.utils.app.request_body
+        parse_time = getattr(request.state, "parse_time", None)
+        if parse_time is not None:
+            response.headers["Server-Timing"] = f"parse;dur={parse_time * 1000:.2f}"
+
         logger.info(
             f"Request: {request.method} {request.url.path} - "
             f"Status: {response.status_code} - "
             f"Time: {process_time:.4f}s - "
-            f"Client: {request.client.host}"
+            + (f"Parse: {parse_time:.4f}s - " if parse_time is not None else "")
+            + f"Client: {request.client.host}"
         )
 
         return response
@@ -27,11 +34,19 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
 
 def init_middleware(app):
     """
-    Attach CORS, request logging, and rate limiting middleware to the app.
+    Attach CORS, request logging, compression, and rate limiting middleware to the app.
     """
     logger.info("Initializing middleware stack")
 
-    # CORS
+    # Request logging
+    app.add_middleware(RequestLoggingMiddleware)
+
+    # Compression, around the app and its logging so they only see and produce plain bodies
+    if Config.SSE_COMPRESSION:
+        app.add_middleware(SSECompressionMiddleware)
+    app.add_middleware(RequestDecompressionMiddleware, max_bytes=Config.REQUEST_MAX_DECOMPRESSED_BYTES)
+
+    # CORS, outermost so responses refused by the decompression middleware carry its headers too
     app.add_middleware(
         CORSMiddleware,
         allow_origins=Config.ALLOWED_ORIGINS,
@@ -39,6 +54,3 @@ def init_middleware(app):
         allow_methods=["*"],
         allow_headers=["*"],
     )
-
-    # Request logging
-    app.add_middleware(RequestLoggingMiddleware)
@@ -0,0 +1,88 @@
+import time
+from typing import Any, Dict, Type, TypeVar
+
+from fastapi import HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+from app.components.config import Config
+from app.schemas.types import TOO_LARGE, ChatCompletionRequest, request_limits
+from app.utils.logger import logger
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+async def read_body(request: Request, max_bytes: int) -> bytes:
+    """The request body, refused with 413 as soon as it is known to exceed max_bytes."""
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Request body is {content_length} bytes, the limit is {max_bytes}",
+        )
+
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Request body exceeds the limit of {max_bytes} bytes",
+            )
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def parse_json_body(body: bytes, model: Type[Model]) -> Model:
+    """
+    Validates the raw JSON with pydantic's JSON parser, without building the
+    intermediate dicts and lists of json.loads first. The request size limits
+    apply to the files in it.
+    """
+    try:
+        return model.model_validate_json(body, context=request_limits())
+    except ValidationError as e:
+        too_large = [error["msg"] for error in e.errors() if error["type"] == TOO_LARGE]
+        if too_large:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="; ".join(too_large))
+        # Located like the errors of FastAPI's own body validation
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=None)
+
+
+async def chat_request(request: Request) -> ChatCompletionRequest:
+    """Dependency decoding a ChatCompletionRequest body within the request size limits."""
+    body = await read_body(request, Config.REQUEST_MAX_BODY_BYTES)
+    start_time = time.perf_counter()
+    parsed = parse_json_body(body, ChatCompletionRequest)
+    parse_time = time.perf_counter() - start_time
+
+    # Reported by the request logging middleware
+    request.state.parse_time = parse_time
+    files = len(parsed.project_files or []) + len(parsed.uploaded_files or [])
+    logger.info(f"Parsed {len(body)} byte request with {files} files in {parse_time * 1000:.2f}ms")
+    return parsed
+
+
+def json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """openapi_extra documenting model as the JSON body of a route that decodes it itself."""
+    schema = model.model_json_schema()
+    definitions = schema.pop("$defs", {})
+
+    def inline(node: Any) -> Any:
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref is not None and ref.startswith("#/$defs/"):
+                return inline(definitions[ref[len("#/$defs/"):]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(value) for value in node]
+        return node
+
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": inline(schema)}},
+        }
+    }
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Iterator, List, Tuple, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+
+from app.schemas.types import BatchItemResult, ErrorResponse
+from app.utils.logger import logger
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _error(details: str, status_code: int) -> ErrorResponse:
+    return ErrorResponse(details=details, status_code=status_code, timestamp=time.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+async def _run_item(
+        index: int,
+        item: Dict[str, Any],
+        request_model: Type[BaseModel],
+        handler: Callable[[Any], Awaitable[BaseModel]],
+) -> BatchItemResult:
+    # Items are validated one by one so an invalid item fails alone
+    try:
+        request = request_model.model_validate(item)
+    except ValidationError as e:
+        return BatchItemResult(index=index, error=_error(str(e), status.HTTP_422_UNPROCESSABLE_ENTITY))
+
+    try:
+        return BatchItemResult(index=index, result=await handler(request))
+    except HTTPException as e:
+        return BatchItemResult(index=index, error=_error(str(e.detail), e.status_code))
+    except Exception as e:
+        logger.warning(f"Batch item {index} failed: {str(e)}")
+        return BatchItemResult(index=index, error=_error(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR))
+
+
+async def _worker(
+        pending: Iterator[Tuple[int, Dict[str, Any]]],
+        request_model: Type[BaseModel],
+        handler: Callable[[Any], Awaitable[BaseModel]],
+        results: "asyncio.Queue[BatchItemResult]",
+):
+    # Workers share the iterator, each takes the next item once its previous one is done
+    for index, item in pending:
+        results.put_nowait(await _run_item(index, item, request_model, handler))
+
+
+async def run_batch(
+        items: List[Dict[str, Any]],
+        request_model: Type[BaseModel],
+        handler: Callable[[Any], Awaitable[BaseModel]],
+        concurrency: int,
+        ordered: bool = True,
+) -> AsyncGenerator[str, None]:
+    """
+    Runs handler for every item with at most concurrency calls at a time and yields
+    one NDJSON line per item: in input order, or as items finish when not ordered.
+    Failed items produce an error line instead of failing the batch.
+    """
+    pending = enumerate(items)
+    results: "asyncio.Queue[BatchItemResult]" = asyncio.Queue()
+    workers = [
+        asyncio.create_task(_worker(pending, request_model, handler, results))
+        for _ in range(min(concurrency, len(items)))
+    ]
+    # Results that finished before an earlier item, when ordered
+    finished: Dict[int, BatchItemResult] = {}
+    next_index = 0
+    failed = 0
+    start_time = time.time()
+    try:
+        for _ in range(len(items)):
+            result = await results.get()
+            ready = [result]
+            if ordered:
+                finished[result.index] = result
+                ready = []
+                while next_index in finished:
+                    ready.append(finished.pop(next_index))
+                    next_index += 1
+            for result in ready:
+                failed += result.error is not None
+                yield result.model_dump_json(exclude_none=True) + "\n"
+    finally:
+        # The client went away or the batch finished: nothing left should keep calling upstream
+        for worker in workers:
+            worker.cancel()
+        logger.info(f"Batch of {len(items)} items done in {time.time() - start_time:.2f}s, {failed} failed")
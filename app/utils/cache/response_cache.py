@@ -0,0 +1,72 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.components.config import Config
+
+
+def is_cacheable(cache: Optional[bool], temperature: Optional[float]) -> bool:
+    """Explicit opt-in or opt-out wins, otherwise only low-temperature requests are cached."""
+    if cache is not None:
+        return cache
+    return temperature is not None and temperature <= Config.RESPONSE_CACHE_MAX_TEMPERATURE
+
+
+class ResponseCache:
+    """
+    Results of pure upstream calls by key, evicted by TTL and least recent use.
+    Concurrent calls with the same key share one upstream call (singleflight).
+    The call runs in its own task, so it completes for the other waiters and
+    the cache even if the request that started it is cancelled.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (expiry, value)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """Returns the value and how it was obtained: "hit", "coalesced" or "miss"."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1], "hit"
+            del self._entries[key]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task), "coalesced"
+
+        self.stats["misses"] += 1
+        task = self._in_flight[key] = asyncio.create_task(compute())
+        task.add_done_callback(lambda done: self._store(key, done))
+        return await asyncio.shield(task), "miss"
+
+    def _store(self, key: Hashable, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            # Failures are not cached, the next request retries
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def summary(self) -> Dict[str, float]:
+        requests = sum(self.stats.values())
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round((self.stats["hits"] + self.stats["coalesced"]) / requests, 4) if requests else 0.0,
+        }
+
+
+project_name_cache = ResponseCache(max_entries=Config.RESPONSE_CACHE_SIZE, ttl=Config.RESPONSE_CACHE_TTL)
+prompt_enhance_cache = ResponseCache(max_entries=Config.RESPONSE_CACHE_SIZE, ttl=Config.RESPONSE_CACHE_TTL)
@@ -0,0 +1,84 @@
+from typing import Any, Dict, Optional
+
+from openai.types.chat import ChatCompletionSystemMessageParam
+
+from app.components.config import Config
+from app.utils.logger import logger
+
+# Providers that only cache a prompt prefix when it is marked with cache_control;
+# OpenAI and DeepSeek models cache long prefixes automatically
+CACHE_CONTROL_MODELS = ("anthropic/", "claude", "google/gemini")
+
+# Asks for a final usage chunk in streamed completions
+STREAM_USAGE = {"include_usage": True}
+
+
+def supports_cache_control(model: Optional[str]) -> bool:
+    if Config.PROMPT_CACHE_CONTROL == "always":
+        return True
+    if Config.PROMPT_CACHE_CONTROL == "never":
+        return False
+    model = (model or "").lower()
+    return any(marker in model for marker in CACHE_CONTROL_MODELS)
+
+
+def static_system_message(prompt: str, model: Optional[str]) -> ChatCompletionSystemMessageParam:
+    """
+    System message for a prompt that is identical across requests. It has to be the
+    first message and must not have request data appended, so the provider sees the
+    same prefix every time; models that need it get a cache_control breakpoint.
+    """
+    if supports_cache_control(model):
+        return ChatCompletionSystemMessageParam(
+            role="system",
+            content=[{"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}],
+        )
+    return ChatCompletionSystemMessageParam(role="system", content=prompt)
+
+
+def cached_prompt_tokens(usage: Any) -> int:
+    """Cached prompt tokens from the usage fields of the different providers."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached is None:
+        # DeepSeek and Anthropic-compatible usage fields
+        cached = getattr(usage, "prompt_cache_hit_tokens", None) or getattr(usage, "cache_read_input_tokens", None)
+    return int(cached or 0)
+
+
+class PrefixCacheStats:
+    """Prompt-prefix cache hit rates per route, collected from completion usage."""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, int]] = {}
+
+    def record(self, route: str, usage: Any) -> int:
+        """Adds one completion's usage and returns its cached prompt tokens."""
+        if usage is None:
+            return 0
+        prompt_tokens = int(getattr(usage, "prompt_tokens", 0) or 0)
+        cached = cached_prompt_tokens(usage)
+
+        stats = self._routes.setdefault(route, {"requests": 0, "hits": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        stats["requests"] += 1
+        stats["hits"] += 1 if cached else 0
+        stats["prompt_tokens"] += prompt_tokens
+        stats["cached_tokens"] += cached
+
+        logger.info(f"Prompt cache ({route}): {cached}/{prompt_tokens} prompt tokens cached")
+        return cached
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            route: {
+                **stats,
+                "hit_rate": round(stats["hits"] / stats["requests"], 4) if stats["requests"] else 0.0,
+                "cached_token_ratio": (
+                    round(stats["cached_tokens"] / stats["prompt_tokens"], 4) if stats["prompt_tokens"] else 0.0
+                ),
+            }
+            for route, stats in self._routes.items()
+        }
+
+
+prefix_cache_stats = PrefixCacheStats()
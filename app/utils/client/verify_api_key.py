@@ -1,3 +1,5 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader
 
@@ -10,6 +12,11 @@ api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 # Dependency for API key validation
 async def verify_api_key(api_key: str = Depends(api_key_header)):
+    return check_api_key(api_key)
+
+
+def check_api_key(api_key: str):
+    """Raises 401 or 403 unless api_key is configured, for transports that cannot use the dependency."""
     if Config.API_KEYS:
         if not api_key:
             raise HTTPException(
@@ -27,3 +34,13 @@ async def verify_api_key(api_key: str = Depends(api_key_header)):
             )
 
     return api_key
+
+
+def verified_api_key(api_key: Optional[str]) -> Optional[str]:
+    """The key if check_api_key accepts it, None otherwise, for routes that also serve anonymous callers."""
+    if not api_key:
+        return None
+    try:
+        return check_api_key(api_key)
+    except HTTPException:
+        return None
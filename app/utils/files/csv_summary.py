@@ -0,0 +1,273 @@
+import math
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+from app.utils.files.string_source import StringSource
+from app.utils.files.tokens import estimate_tokens, truncate_to_tokens
+
+if TYPE_CHECKING:
+    # pandas is imported on first use, it is the slowest import of the app
+    import pandas as pd
+
+# Rows parsed per pandas chunk; bounds the memory held at any time
+CHUNK_ROWS = 50_000
+# Longest cell value rendered in sample rows
+MAX_CELL_CHARS = 80
+# Distinct values tracked per column before it is reported as high-cardinality
+MAX_DISTINCT_VALUES = 1000
+TOP_VALUES = 3
+
+_BOOL_VALUES = ["true", "false"]
+
+
+class ColumnStats:
+    """Statistics for a single CSV column, merged chunk by chunk."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.missing = 0
+        # Candidate types are dropped as soon as a chunk contradicts them
+        self.candidates = {"int", "float", "bool", "date"}
+        self.min_length = math.inf
+        self.max_length = 0
+        # Running mean/M2 merged with Chan's parallel variance algorithm
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.values: Dict[str, int] = {}
+        self.overflow = False
+
+    @property
+    def type(self) -> Optional[str]:
+        if not self.count:
+            return None
+        for candidate in ("bool", "int", "float", "date"):
+            if candidate in self.candidates:
+                return candidate
+        return "string"
+
+    def update(self, column: "pd.Series"):
+        import pandas as pd
+
+        present = column[column != ""]
+        self.missing += len(column) - len(present)
+        if present.empty:
+            return
+
+        lengths = present.str.len()
+        self.min_length = min(self.min_length, int(lengths.min()))
+        self.max_length = max(self.max_length, int(lengths.max()))
+
+        if "bool" in self.candidates and not present.str.lower().isin(_BOOL_VALUES).all():
+            self.candidates.discard("bool")
+
+        if self.candidates & {"int", "float"}:
+            numbers = pd.to_numeric(present, errors="coerce")
+            if numbers.isna().any():
+                self.candidates -= {"int", "float"}
+            else:
+                if "int" in self.candidates and present.str.contains(r"[.eE]", regex=True).any():
+                    self.candidates.discard("int")
+                self._merge_numbers(numbers.to_numpy(dtype=np.float64))
+
+        if "date" in self.candidates:
+            dates = pd.to_datetime(present, errors="coerce", format="ISO8601")
+            if dates.isna().any():
+                self.candidates.discard("date")
+
+        self.count += len(present)
+
+        for value, occurrences in present.value_counts(sort=False).items():
+            if value in self.values:
+                self.values[value] += int(occurrences)
+            elif len(self.values) < MAX_DISTINCT_VALUES:
+                self.values[value] = int(occurrences)
+            else:
+                self.overflow = True
+
+    def _merge_numbers(self, numbers: np.ndarray):
+        count = self.count
+        batch = len(numbers)
+        batch_mean = float(numbers.mean())
+        batch_m2 = float(((numbers - batch_mean) ** 2).sum())
+
+        delta = batch_mean - self.mean
+        total = count + batch
+        self.mean += delta * batch / total
+        self.m2 += batch_m2 + delta * delta * count * batch / total
+        self.minimum = min(self.minimum, float(numbers.min()))
+        self.maximum = max(self.maximum, float(numbers.max()))
+
+    def describe(self) -> str:
+        if not self.count:
+            return "empty"
+
+        if self.type in ("int", "float"):
+            std = math.sqrt(self.m2 / self.count)
+            return (
+                f"min={self.minimum:g}, max={self.maximum:g}, "
+                f"mean={self.mean:.4g}, std={std:.4g}"
+            )
+
+        distinct = f">{MAX_DISTINCT_VALUES}" if self.overflow else str(len(self.values))
+        top = sorted(self.values.items(), key=lambda kv: kv[1], reverse=True)[:TOP_VALUES]
+        top_values = ", ".join(f"{_clip(v, 24)} ({c})" for v, c in top)
+        return f"distinct={distinct}, len={self.min_length}-{self.max_length}, top: {top_values}"
+
+
+def _clip(value: str, limit: int = MAX_CELL_CHARS) -> str:
+    value = str(value).replace("|", "\\|").replace("\n", " ")
+    return value if len(value) <= limit else value[: limit - 1] + "…"
+
+
+def _table_row(values: List[str]) -> str:
+    return "| " + " | ".join(values) + " |"
+
+
+def summarize_csv(
+        content: str,
+        file_name: str,
+        token_budget: int = 4000,
+        head_rows: int = 5,
+        tail_rows: int = 5,
+        sample_rows: int = 10,
+        seed: int = 0,
+) -> str:
+    """
+    Summarizes CSV content in a single streaming pass.
+
+    Rows are parsed in fixed-size pandas chunks; only the head, a tail window and a
+    uniform random sample of the rows in between are kept, together with per-column
+    statistics. Small files whose rows all fit into the sample are rendered in full.
+
+    Args:
+        content (str): Raw CSV text
+        file_name (str): Name used in the summary header
+        token_budget (int): Upper bound for the estimated tokens of the summary
+        head_rows (int): Number of leading rows to keep
+        tail_rows (int): Number of trailing rows to keep
+        sample_rows (int): Size of the random sample taken from the remaining rows
+        seed (int): Seed for the sampler, so summaries are reproducible
+
+    Returns:
+        str: Markdown summary of the CSV file
+    """
+    import pandas as pd
+
+    try:
+        chunks = pd.read_csv(
+            StringSource(content),
+            dtype=str,
+            keep_default_na=False,
+            skipinitialspace=True,
+            skip_blank_lines=True,
+            on_bad_lines="skip",
+            chunksize=CHUNK_ROWS,
+        )
+    except pd.errors.EmptyDataError:
+        return f"The CSV file '{file_name}' is empty."
+
+    rng = np.random.default_rng(seed)
+    headers: List[str] = []
+    columns: List[ColumnStats] = []
+    head: Optional["pd.DataFrame"] = None
+    tail: Optional["pd.DataFrame"] = None
+    # Bottom-k sampling: every row gets a random key and the rows with the smallest
+    # keys are kept, which is a uniform sample without replacement across chunks
+    sample: Optional["pd.DataFrame"] = None
+    sample_keys = np.empty(0)
+    # Extra candidates so the sample survives removing rows that end up in head or tail
+    keep = sample_rows + head_rows + tail_rows
+    total = 0
+
+    for chunk in chunks:
+        if not columns:
+            headers = [str(h).strip() or f"column_{i + 1}" for i, h in enumerate(chunk.columns)]
+            columns = [ColumnStats(h) for h in headers]
+
+        for stats, name in zip(columns, chunk.columns):
+            stats.update(chunk[name])
+
+        total += len(chunk)
+        if head is None:
+            head = chunk.iloc[:head_rows]
+        tail = chunk if tail is None else pd.concat([tail, chunk])
+        tail = tail.iloc[len(tail) - min(tail_rows, len(tail)):]
+
+        keys = rng.random(len(chunk))
+        if sample is None:
+            sample, sample_keys = chunk, keys
+        else:
+            sample = pd.concat([sample, chunk])
+            sample_keys = np.concatenate([sample_keys, keys])
+        if len(sample) > keep:
+            selected = np.argpartition(sample_keys, keep)[:keep]
+            sample, sample_keys = sample.iloc[selected], sample_keys[selected]
+
+    if not total:
+        if not headers:
+            return f"The CSV file '{file_name}' is empty."
+        return truncate_to_tokens(
+            f"Data from {file_name} (0 rows x {len(headers)} columns):\n"
+            f"Columns: {', '.join(_clip(h, 40) for h in headers)}",
+            token_budget,
+        )
+
+    tail_start = max(total - tail_rows, len(head))
+    in_middle = (sample.index >= len(head)) & (sample.index < tail_start)
+    middle = sample[in_middle].iloc[np.argsort(sample_keys[in_middle])[:sample_rows]]
+    sampled = pd.concat([head, middle.sort_index(), tail[tail.index >= tail_start]])
+
+    width = len(headers)
+    is_complete = len(sampled) == total
+
+    output = [
+        f"Data from {file_name} ({total} rows x {width} columns):\n",
+        "Columns:",
+        "| column | type | non-empty | missing | stats |",
+        "|---|---|---|---|---|",
+    ]
+    used = estimate_tokens("\n".join(output))
+    for index, stats in enumerate(columns):
+        line = _table_row(
+            [
+                _clip(stats.name, 40),
+                stats.type or "empty",
+                str(stats.count),
+                str(stats.missing),
+                stats.describe(),
+            ]
+        )
+        # Leave at least half of the budget for sample rows
+        if used + estimate_tokens(line) > token_budget // 2:
+            output.append(f"[{width - index} columns omitted to fit the token budget]")
+            break
+        output.append(line)
+        used += estimate_tokens(line) + 1
+
+    header_lines = [
+        "",
+        "Rows:" if is_complete else f"Sample rows ({len(sampled)} of {total}):",
+        _table_row([_clip(h, 40) for h in headers]),
+        "|" + " | ".join(["---"] * width) + "|",
+    ]
+    output.extend(header_lines)
+    used += estimate_tokens("\n".join(header_lines))
+
+    shown = 0
+    for row in sampled.itertuples(index=False, name=None):
+        line = _table_row([_clip(v) for v in row])
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        output.append(line)
+        used += cost
+        shown += 1
+
+    if shown < len(sampled):
+        output.append(f"[{len(sampled) - shown} sampled rows omitted to fit the token budget]")
+
+    return "\n".join(output)
@@ -0,0 +1,143 @@
+import asyncio
+import base64
+import binascii
+import io
+from typing import Dict, Optional, Union
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.utils.logger import logger
+
+_MIME_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg", "PNG": "image/png"}
+
+
+class ProcessedImage:
+    """An image after downscaling and recompression, ready to be sent as a data URL."""
+
+    __slots__ = ("data", "mime_type", "width", "height", "fingerprint", "original_size")
+
+    def __init__(self, data: bytes, mime_type: str, width: int, height: int, fingerprint: int, original_size: int):
+        self.data = data
+        self.mime_type = mime_type
+        self.width = width
+        self.height = height
+        self.fingerprint = fingerprint
+        self.original_size = original_size
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_size - len(self.data)
+
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+
+def decode_image_payload(content: str) -> bytes:
+    """Decodes a base64 payload, with or without a data URL prefix."""
+    if content.startswith("data:") and "," in content[:128]:
+        content = content.split(",", 1)[1]
+    return base64.b64decode(content)
+
+
+def difference_hash(image: Image.Image, size: int = 8) -> int:
+    """64-bit perceptual hash: compares each pixel of a 9x8 grayscale thumbnail with its right neighbour."""
+    pixels = list(image.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR).getdata())
+    fingerprint = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            fingerprint = (fingerprint << 1) | (left > right)
+    return fingerprint
+
+
+def preprocess_image(data: bytes, max_edge: int = 1568, image_format: str = "WEBP", quality: int = 80) -> ProcessedImage:
+    """
+    Decodes an image once, downscales it so its longest edge is at most max_edge,
+    and recompresses it. The original bytes are kept if recompression does not
+    make the image smaller and no downscale was needed.
+
+    Raises:
+        UnidentifiedImageError: If the data is not an image Pillow can decode
+        Image.DecompressionBombError: If the image has more pixels than Pillow allows
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        original_format = source.format
+        fingerprint = difference_hash(image)
+
+        resized = max(image.size) > max_edge
+        if resized:
+            image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+        image_format = image_format.upper()
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        if image_format == "JPEG" and has_alpha:
+            # JPEG cannot carry transparency; WEBP keeps it at a similar size
+            image_format = "WEBP"
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+        options = {"quality": quality}
+        if image_format == "WEBP":
+            options["method"] = 4
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, **options)
+        encoded = buffer.getvalue()
+        width, height = image.size
+
+    if not resized and len(encoded) >= len(data) and original_format in _MIME_TYPES:
+        return ProcessedImage(data, _MIME_TYPES[original_format], width, height, fingerprint, len(data))
+    return ProcessedImage(encoded, _MIME_TYPES[image_format], width, height, fingerprint, len(data))
+
+
+class ImagePreprocessor:
+    """
+    Preprocesses the images of a single request and detects near-duplicates
+    among them by the Hamming distance of their perceptual hashes.
+    """
+
+    def __init__(self, max_edge: int, image_format: str, quality: int, dedupe_distance: int):
+        self.max_edge = max_edge
+        self.image_format = image_format
+        self.quality = quality
+        self.dedupe_distance = dedupe_distance
+        self.seen: Dict[int, str] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+    def find_duplicate(self, fingerprint: int) -> Optional[str]:
+        for seen_fingerprint, file_name in self.seen.items():
+            if bin(seen_fingerprint ^ fingerprint).count("1") <= self.dedupe_distance:
+                return file_name
+        return None
+
+    async def process(self, content: Union[str, bytes], file_name: str) -> Optional[ProcessedImage]:
+        """
+        Decodes and preprocesses an image off the event loop, from a base64 payload
+        or from raw bytes. Returns None if the payload cannot be decoded as an image.
+        """
+        try:
+            processed = await asyncio.to_thread(self._decode_and_preprocess, content)
+        except (binascii.Error, ValueError, UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+            logger.warning(f"Could not preprocess image {file_name}: {str(e)}")
+            return None
+
+        self.bytes_in += processed.original_size
+        self.bytes_out += len(processed.data)
+        logger.debug(
+            f"Preprocessed image {file_name}: {processed.original_size} -> {len(processed.data)} bytes, "
+            f"{processed.width}x{processed.height} {processed.mime_type}"
+        )
+        return processed
+
+    def _decode_and_preprocess(self, content: Union[str, bytes]) -> ProcessedImage:
+        data = content if isinstance(content, bytes) else decode_image_payload(content)
+        return preprocess_image(data, self.max_edge, self.image_format, self.quality)
+
+    def remember(self, fingerprint: int, file_name: str):
+        self.seen[fingerprint] = file_name
@@ -1,8 +1,42 @@
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _read_file_entry(item_path, formatted_path, max_file_size):
+    """
+    Reads a single file into a {"file_path", "content"} entry.
+
+    Mirrors the per-file handling of the serial traversal, so the same entry is
+    produced whether the file is read inline or on a worker thread.
+    """
+    try:
+        # Skip files that are too large
+        file_size = os.path.getsize(item_path)
+        if file_size > max_file_size:
+            return {
+                "file_path": formatted_path,
+                "content": f"[File too large: {file_size} bytes]",
+            }
+
+        # Try to read the file as text
+        with open(item_path, "r", encoding="utf-8") as f:
+            content = f.read()
+
+        return {"file_path": formatted_path, "content": content}
+    except UnicodeDecodeError:
+        # For binary files, just note that
+        return {"file_path": formatted_path, "content": "[Binary file]"}
+    except (PermissionError, IsADirectoryError, FileNotFoundError) as e:
+        # For files we can't read, just note that
+        return {
+            "file_path": formatted_path,
+            "content": f"[Unable to read content: {str(e)}]",
+        }
 
 
 def get_project_structure_detailed(
-        project_path, exclude=None, max_file_size=1024 * 1024
+        project_path, exclude=None, max_file_size=1024 * 1024, max_workers=None
 ):
     """
     Returns the structure of a project as a JSON-serializable list with file contents.
@@ -11,9 +45,11 @@ def get_project_structure_detailed(
         project_path (str): Path to the project directory
         exclude (list, optional): List of folder names to exclude. Defaults to None.
         max_file_size (int, optional): Maximum file size to read in bytes. Defaults to 1MB.
+        max_workers (int, optional): Number of threads used to read files concurrently.
+            Defaults to None, which reads files serially on the calling thread.
 
     Returns:
-        list: A list of dictionaries with file paths and contents
+        list: A list of dictionaries with file paths and contents, in sorted path order
     """
     if exclude is None:
         exclude = []
@@ -22,7 +58,9 @@ def get_project_structure_detailed(
     if not os.path.exists(project_path):
         return [{"error": f"Path {project_path} does not exist"}]
 
-    result = []
+    # Files are collected first, in traversal order, so reads can be overlapped
+    # without affecting the order of the result
+    files = []
 
     def _traverse(path):
         # Skip if the current directory should be excluded
@@ -40,12 +78,8 @@ def get_project_structure_detailed(
             # Get the full path
             item_path = os.path.join(path, item)
 
-            # Skip excluded directories
-            if os.path.isdir(item_path) and item in exclude:
-                continue
-
-            # Skip excluded files
-            if os.path.isfile(item_path) and item in exclude:
+            # Skip excluded files and directories
+            if item in exclude:
                 continue
 
             # Create the properly formatted path starting with "project_path/"
@@ -53,37 +87,7 @@ def get_project_structure_detailed(
             formatted_path = os.path.join(project_path, rel_path)
 
             if os.path.isfile(item_path):
-                try:
-                    # Skip files that are too large
-                    file_size = os.path.getsize(item_path)
-                    if file_size > max_file_size:
-                        result.append(
-                            {
-                                "file_path": formatted_path,
-                                "content": f"[File too large: {file_size} bytes]",
-                            }
-                        )
-                        continue
-
-                    # Try to read the file as text
-                    with open(item_path, "r", encoding="utf-8") as f:
-                        content = f.read()
-
-                    # Add file information to result
-                    result.append({"file_path": formatted_path, "content": content})
-                except UnicodeDecodeError:
-                    # For binary files, just note that
-                    result.append(
-                        {"file_path": formatted_path, "content": "[Binary file]"}
-                    )
-                except (PermissionError, IsADirectoryError) as e:
-                    # For files we can't read, just note that
-                    result.append(
-                        {
-                            "file_path": formatted_path,
-                            "content": f"[Unable to read content: {str(e)}]",
-                        }
-                    )
+                files.append((item_path, formatted_path))
             elif os.path.isdir(item_path):
                 # Recurse into subdirectories
                 _traverse(item_path)
@@ -91,4 +95,35 @@ def get_project_structure_detailed(
     # Start traversal from the root
     _traverse(project_path)
 
-    return result
+    if not max_workers or max_workers <= 1 or len(files) <= 1:
+        return [
+            _read_file_entry(item_path, formatted_path, max_file_size)
+            for item_path, formatted_path in files
+        ]
+
+    # Executor.map yields results in submission order, which keeps the sorted path order
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(
+            executor.map(
+                lambda entry: _read_file_entry(entry[0], entry[1], max_file_size),
+                files,
+            )
+        )
+
+
+async def get_project_structure_detailed_async(
+        project_path, exclude=None, max_file_size=1024 * 1024, max_workers=8
+):
+    """
+    Async variant of get_project_structure_detailed.
+
+    The traversal and file reads run on a worker thread, so awaiting this does not
+    block the event loop. Arguments and return value match the sync version.
+    """
+    return await asyncio.to_thread(
+        get_project_structure_detailed,
+        project_path,
+        exclude=exclude,
+        max_file_size=max_file_size,
+        max_workers=max_workers,
+    )
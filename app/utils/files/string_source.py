@@ -0,0 +1,22 @@
+class StringSource:
+    """Read-only file-like view over a string that hands out slices without copying it whole."""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.position = 0
+
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            size = len(self.content) - self.position
+        chunk = self.content[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+    def __iter__(self):
+        while True:
+            end = self.content.find("\n", self.position)
+            if end == -1:
+                break
+            yield self.read(end + 1 - self.position)
+        if self.position < len(self.content):
+            yield self.read()
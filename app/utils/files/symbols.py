@@ -0,0 +1,322 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Languages with a symbol parser, by file extension
+LANGUAGES: Dict[str, str] = {
+    "ts": "typescript", "tsx": "typescript", "js": "typescript", "jsx": "typescript", "mjs": "typescript",
+    "cjs": "typescript", "dart": "dart", "py": "python", "pyi": "python", "html": "html", "htm": "html",
+}
+
+_CONTAINER_KINDS = frozenset({"class", "interface", "enum", "mixin", "extension", "namespace"})
+_BLOCK_KINDS = _CONTAINER_KINDS | {"function", "method"}
+
+_TS_DECLARATION = re.compile(
+    r"^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:declare[ \t]+)?(?:abstract[ \t]+)?(?:async[ \t]+)?"
+    r"(?P<kind>function\*?|class|interface|type|enum|namespace|const|let|var)[ \t]+(?P<name>[A-Za-z_$][\w$]*)",
+    re.MULTILINE,
+)
+_TS_MEMBER = re.compile(
+    r"^[ \t]+(?:(?:public|private|protected|static|async|readonly|override|abstract|get|set)[ \t]+)*"
+    r"(?P<name>#?[A-Za-z_$][\w$]*)[ \t]*(?:<[^>\n]*>)?[ \t]*\(",
+    re.MULTILINE,
+)
+_DART_DECLARATION = re.compile(
+    r"^[ \t]*(?:(?:abstract|sealed|base|final|interface)[ \t]+)*"
+    r"(?P<kind>class|mixin|enum|extension|typedef)[ \t]+(?P<name>[A-Za-z_$][\w$]*)",
+    re.MULTILINE,
+)
+_DART_FUNCTION = re.compile(
+    r"^[ \t]*(?:(?:static|external|factory|const|late|final)[ \t]+)*(?:[\w$<>?,\[\]. ]+?[ \t]+)?"
+    r"(?:(?:get|set|operator)[ \t]+)?(?P<name>[A-Za-z_$][\w$.]*)[ \t]*(?:<[^>\n]*>)?[ \t]*\(",
+    re.MULTILINE,
+)
+_PYTHON_DEFINITION = re.compile(
+    r"^(?P<indent>[ \t]*)(?:async[ \t]+)?(?P<kind>def|class)[ \t]+(?P<name>\w+)", re.MULTILINE
+)
+_HTML_ELEMENT = re.compile(
+    r"<(?P<tag>[a-zA-Z][\w-]*)\b[^>]*?\bid\s*=\s*[\"'](?P<name>[^\"']+)[\"'][^>]*>|<(?P<block>script|style)\b[^>]*>",
+    re.IGNORECASE,
+)
+_HTML_VOID = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"})
+
+_KEYWORDS = frozenset({
+    "if", "for", "while", "switch", "catch", "return", "function", "await", "new", "typeof", "throw", "else",
+    "do", "try", "super", "this", "assert", "print", "when", "with", "yield", "sizeof",
+})
+_CONTINUATION = frozenset("=,(+-*/&|?:<>.[{")
+_C_TOKEN = re.compile(r"[\"'`(){}\[\];\n]|//|/\*")
+
+
+class Symbol:
+    """A definition in a file with its character range, so its source is content[start:end]."""
+
+    __slots__ = ("name", "kind", "start", "end", "line", "parent")
+
+    def __init__(self, name: str, kind: str, start: int, end: int, line: int, parent: Optional[str] = None):
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.line = line
+        self.parent = parent
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.parent}.{self.name}" if self.parent else self.name
+
+
+def language_of(path: str) -> Optional[str]:
+    extension = path.lower().rsplit(".", 1)[-1] if "." in path else ""
+    return LANGUAGES.get(extension)
+
+
+def extract_symbols(path: str, content: str) -> List[Symbol]:
+    """Definitions of a TS/JS, Dart, Python or HTML file in source order, [] for other files."""
+    language = language_of(path)
+    if language == "python":
+        return _python_symbols(content)
+    if language == "html":
+        return _html_symbols(content)
+    if language in ("typescript", "dart"):
+        return _c_like_symbols(content, language)
+    return []
+
+
+def format_outline(symbols: List[Symbol]) -> str:
+    """One line per symbol, members indented under their container."""
+    return "\n".join(
+        f"{'  ' if symbol.parent else ''}{symbol.kind} {symbol.name} (line {symbol.line})" for symbol in symbols
+    )
+
+
+def _line_number(content: str, offset: int, cache: List[Tuple[int, int]]) -> int:
+    # Counting incrementally from the previous symbol keeps this linear over a file
+    last_offset, last_line = cache[0]
+    if offset < last_offset:
+        last_offset, last_line = 0, 1
+    line = last_line + content.count("\n", last_offset, offset)
+    cache[0] = (offset, line)
+    return line
+
+
+def _python_symbols(content: str) -> List[Symbol]:
+    symbols: List[Symbol] = []
+    # (indent, qualified name, kind) of the enclosing definitions
+    stack: List[Tuple[int, str, str]] = []
+    lines = [(0, 1)]
+
+    for match in _PYTHON_DEFINITION.finditer(content):
+        indent = len(match.group("indent").expandtabs())
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        if stack and stack[-1][2] != "class":
+            # Local functions and classes are part of their enclosing function
+            continue
+
+        start = match.start()
+        # Decorators directly above belong to the definition
+        while True:
+            previous = content.rfind("\n", 0, max(start - 1, 0))
+            line = content[previous + 1:start - 1] if start else ""
+            if not line.strip().startswith("@"):
+                break
+            start = previous + 1
+
+        parent = stack[-1][1] if stack else None
+        kind = "class" if match.group("kind") == "class" else ("method" if parent else "function")
+        symbol = Symbol(
+            match.group("name"), kind, start, _python_end(content, match.end(), indent),
+            _line_number(content, match.start(), lines), parent,
+        )
+        symbols.append(symbol)
+        stack.append((indent, symbol.qualified_name, match.group("kind")))
+    return symbols
+
+
+def _python_end(content: str, position: int, indent: int) -> int:
+    end = content.find("\n", position)
+    if end == -1:
+        return len(content)
+    last = end
+    while end < len(content):
+        next_end = content.find("\n", end + 1)
+        if next_end == -1:
+            next_end = len(content)
+        line = content[end + 1:next_end]
+        stripped = line.strip()
+        if stripped and not stripped.startswith("#"):
+            if len(line.expandtabs()) - len(line.expandtabs().lstrip()) <= indent:
+                break
+            last = next_end
+        end = next_end
+    return last
+
+
+def _c_like_symbols(content: str, language: str, offset: int = 0) -> List[Symbol]:
+    if language == "typescript":
+        declarations, functions = _TS_DECLARATION, _TS_MEMBER
+    else:
+        declarations, functions = _DART_DECLARATION, _DART_FUNCTION
+
+    candidates = {}
+    for match in declarations.finditer(content):
+        candidates[match.start()] = (match, match.group("kind").rstrip("*"))
+    for match in functions.finditer(content):
+        candidates.setdefault(match.start(), (match, None))
+
+    symbols: List[Symbol] = []
+    stack: List[Symbol] = []
+    lines = [(0, 1)]
+    for position in sorted(candidates):
+        match, kind = candidates[position]
+        while stack and stack[-1].end - offset <= position:
+            stack.pop()
+        container = stack[-1] if stack else None
+        if container is not None and container.kind not in _CONTAINER_KINDS:
+            # Declarations inside function bodies are locals
+            continue
+
+        name = match.group("name")
+        start = match.start() + len(match.group(0)) - len(match.group(0).lstrip())
+        if kind is None:
+            if name in _KEYWORDS or not _is_function_definition(content, match.end() - 1):
+                continue
+            if language == "typescript" and container is None:
+                # Top-level calls look like members; only declarations count outside classes
+                continue
+            kind = "method" if container is not None else "function"
+        elif kind in ("const", "let", "var"):
+            kind = "variable"
+
+        end = _c_like_end(content, start, kind in _BLOCK_KINDS)
+        symbol = Symbol(
+            name, kind, start + offset, end + offset, _line_number(content, start, lines),
+            container.qualified_name if container is not None else None,
+        )
+        symbols.append(symbol)
+        stack.append(symbol)
+    return symbols
+
+
+def _is_function_definition(content: str, paren: int) -> bool:
+    """True if the parameter list opening at paren is followed by a body, return type or initializer."""
+    depth = 0
+    length = len(content)
+    position = paren
+    while position < length:
+        char = content[position]
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+            if depth == 0:
+                break
+        elif char == ";" and depth <= 1:
+            return False
+        position += 1
+    rest = content[position + 1:position + 64].lstrip()
+    return rest.startswith(("{", "=>", ":", "async", "sync")) or rest.startswith("throws")
+
+
+def _c_like_end(content: str, start: int, requires_block: bool) -> int:
+    """
+    End offset of a declaration in a C-like language: after the brace closing its
+    block, or at the ';' or line break ending a statement at nesting depth 0.
+    Strings and comments are skipped so braces inside them are not counted.
+    """
+    depth = 0
+    length = len(content)
+    position = start
+    # Start of a line comment on the current line, which does not count as code
+    comment = None
+    while True:
+        match = _C_TOKEN.search(content, position)
+        if match is None:
+            return length
+        token = match.group(0)
+        position = match.end()
+
+        if token in "\"'`":
+            position = _skip_string(content, match.start())
+        elif token == "//":
+            comment = match.start()
+            newline = content.find("\n", position)
+            position = length if newline == -1 else newline
+            continue
+        elif token == "/*":
+            close = content.find("*/", position)
+            position = length if close == -1 else close + 2
+        elif token in "([{":
+            depth += 1
+        elif token in ")]}":
+            depth -= 1
+            if depth <= 0 and token == "}":
+                return position
+        elif depth <= 0 and token == ";":
+            return position
+        elif token == "\n":
+            code_end = match.start() if comment is None else comment
+            comment = None
+            if depth <= 0 and not requires_block:
+                line = content[max(start, code_end - 200):code_end].rstrip()
+                if line and line[-1] not in _CONTINUATION:
+                    return match.start()
+
+
+def _skip_string(content: str, position: int) -> int:
+    quote = content[position]
+    if content.startswith(quote * 3, position):
+        close = content.find(quote * 3, position + 3)
+        return len(content) if close == -1 else close + 3
+
+    position += 1
+    length = len(content)
+    while position < length:
+        char = content[position]
+        if char == "\\":
+            position += 2
+            continue
+        if char == quote:
+            return position + 1
+        if char == "\n" and quote != "`":
+            # Unterminated quote, e.g. an apostrophe in JSX text
+            return position
+        position += 1
+    return length
+
+
+def _html_symbols(content: str) -> List[Symbol]:
+    symbols: List[Symbol] = []
+    lowered = content.lower()
+    for match in _HTML_ELEMENT.finditer(content):
+        block = match.group("block")
+        if block:
+            block = block.lower()
+            close = lowered.find(f"</{block}", match.end())
+            end = len(content) if close == -1 else content.find(">", close) + 1
+            symbols.append(Symbol(block, "block", match.start(), end, 0))
+            if block == "script":
+                body = content[match.end():close if close != -1 else len(content)]
+                symbols.extend(_c_like_symbols(body, "typescript", offset=match.end()))
+            continue
+
+        tag = match.group("tag").lower()
+        end = match.end() if tag in _HTML_VOID else _html_element_end(content, tag, match.end())
+        symbols.append(Symbol(match.group("name"), tag, match.start(), end, 0))
+
+    # Script symbols were numbered relative to the script body, number everything against the document
+    symbols.sort(key=lambda symbol: symbol.start)
+    lines = [(0, 1)]
+    for symbol in symbols:
+        symbol.line = _line_number(content, symbol.start, lines)
+    return symbols
+
+
+def _html_element_end(content: str, tag: str, position: int) -> int:
+    tags = re.compile(rf"<(/?){re.escape(tag)}\b[^>]*>", re.IGNORECASE)
+    depth = 1
+    for match in tags.finditer(content, position):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return match.end()
+    return len(content)
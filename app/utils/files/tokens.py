@@ -0,0 +1,19 @@
+import math
+
+# Rough average for English text and source code with BPE tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token count estimate used for prompt budgeting."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "\n[...truncated]") -> str:
+    """Truncate text so that its estimated token count fits into max_tokens."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[: max(0, max_chars - len(marker))] + marker
@@ -0,0 +1,178 @@
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Set
+
+from app.utils.files.string_source import StringSource
+from app.utils.files.tokens import estimate_tokens, truncate_to_tokens
+
+# Longest text or attribute value rendered per line
+MAX_VALUE_CHARS = 200
+# Distinct element paths tracked before new paths are only counted
+MAX_PATHS = 5000
+
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+def _local_name(tag: str) -> str:
+    # Drop the "{namespace-uri}" prefix ElementTree puts on namespaced tags
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else str(tag)
+
+
+def _clip(value: str) -> str:
+    value = " ".join(value.split())
+    return value if len(value) <= MAX_VALUE_CHARS else value[: MAX_VALUE_CHARS - 1] + "…"
+
+
+class _PathSchema:
+    """What was observed for one element path across all of its occurrences."""
+
+    __slots__ = ("count", "attributes", "has_text")
+
+    def __init__(self):
+        self.count = 0
+        self.attributes: Set[str] = set()
+        self.has_text = False
+
+
+def summarize_xml(
+        content: str,
+        file_name: str,
+        token_budget: int = 4000,
+        max_depth: int = 12,
+        samples_per_path: int = 3,
+) -> str:
+    """
+    Flattens XML content into "path: value" lines in a single streaming pass.
+
+    Elements are parsed with iterparse and cleared as soon as they are closed, so
+    memory stays flat regardless of document size. Repeated sibling structures are
+    collapsed: only the first samples_per_path occurrences of a path are rendered,
+    and the rest are reported in a schema summary with their counts and attributes.
+
+    Args:
+        content (str): Raw XML text
+        file_name (str): Name used in the summary header
+        token_budget (int): Upper bound for the estimated tokens of the summary
+        max_depth (int): Elements nested deeper than this are counted but not rendered
+        samples_per_path (int): Occurrences of a path rendered before it is collapsed
+
+    Returns:
+        str: Flattened summary of the XML file
+
+    Raises:
+        ET.ParseError: If the content is not well-formed XML
+    """
+    output = [f"Data from {file_name}:\n"]
+    used = estimate_tokens(output[0])
+    # The schema summary is rendered at the end, so keep room for it
+    line_budget = token_budget * 3 // 4
+
+    schemas: Dict[str, _PathSchema] = {}
+    # Stack of (element, path, rendered) for the currently open elements
+    stack: List[tuple] = []
+    elements = 0
+    deep_elements = 0
+    truncated = False
+
+    for event, elem in ET.iterparse(StringSource(content), events=("start", "end")):
+        if event == "start":
+            parent_path = stack[-1][1] if stack else ""
+            parent_rendered = stack[-1][2] if stack else True
+            path = f"{parent_path}/{_local_name(elem.tag)}" if parent_path else _local_name(elem.tag)
+
+            schema = schemas.get(path)
+            if schema is None:
+                schema = _PathSchema()
+                if len(schemas) < MAX_PATHS:
+                    schemas[path] = schema
+            schema.count += 1
+            schema.attributes.update(_local_name(name) for name in elem.attrib)
+            elements += 1
+
+            depth = len(stack) + 1
+            if depth > max_depth:
+                deep_elements += 1
+            rendered = (
+                    parent_rendered
+                    and depth <= max_depth
+                    and schema.count <= samples_per_path
+            )
+
+            if rendered:
+                for name, value in elem.attrib.items():
+                    line = f"{path}[@{_local_name(name)}]: {_clip(value)}"
+                    used += estimate_tokens(line) + 1
+                    output.append(line)
+
+            stack.append((elem, path, rendered))
+            continue
+
+        _, path, rendered = stack.pop()
+        text = elem.text.strip() if elem.text else ""
+        if text:
+            if path in schemas:
+                schemas[path].has_text = True
+            if rendered:
+                line = f"{path}: {_clip(text)}"
+                used += estimate_tokens(line) + 1
+                output.append(line)
+
+        # Release the finished element; it is the parent's only remaining child
+        elem.clear()
+        if stack:
+            stack[-1][0].remove(elem)
+
+        if used > line_budget:
+            truncated = True
+            break
+
+    if truncated:
+        output.append(f"[Truncated at the token budget after {elements} elements]")
+    if deep_elements:
+        output.append(f"[{deep_elements} elements nested deeper than {max_depth} levels were skipped]")
+
+    repeated = [(path, schema) for path, schema in schemas.items() if schema.count > samples_per_path]
+    if repeated:
+        output.append("")
+        output.append("Repeated structures (first occurrences shown above):")
+        for path, schema in repeated:
+            details = [f"{schema.count} occurrences"]
+            if schema.attributes:
+                details.append("attributes: " + ", ".join(sorted(schema.attributes)))
+            if schema.has_text:
+                details.append("has text")
+            line = f"{path}: " + "; ".join(details)
+            if used + estimate_tokens(line) > token_budget:
+                output.append("[More repeated structures omitted to fit the token budget]")
+                break
+            used += estimate_tokens(line) + 1
+            output.append(line)
+
+    return "\n".join(output)
+
+
+def summarize_xml_text(content: str, file_name: str, token_budget: int = 4000) -> str:
+    """
+    Fallback for malformed XML: strips tags line by line and keeps the remaining text.
+    """
+    lines = []
+    used = 0
+    for line in StringSource(content):
+        line = line.strip()
+        if not line or line.startswith("<?") or line.startswith("<!"):
+            continue
+
+        # Remove XML tags but keep content
+        text = _TAG_PATTERN.sub(" ", line).strip()
+        if not text:
+            continue
+
+        used += estimate_tokens(text) + 1
+        if used > token_budget:
+            lines.append("[...truncated]")
+            break
+        lines.append(text)
+
+    if lines:
+        return f"Data from {file_name}:\n" + "\n".join(lines)
+    return f"Data from {file_name} (raw format):\n" + truncate_to_tokens(content, token_budget)
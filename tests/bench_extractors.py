@@ -0,0 +1,60 @@
+"""Micro-benchmark for the file extractors. Run from the repository root: python -m tests.bench_extractors"""
+import base64
+import json
+import random
+import timeit
+import zlib
+
+from app.services.ingestion.ingestion import plan_files
+from app.services.ingestion.registry import select_extractor
+from app.schemas.types import FileItem
+
+TOKEN_BUDGET = 4000
+
+
+def make_samples():
+    rng = random.Random(0)
+
+    csv_rows = ["id,name,price,date"] + [
+        f"{i},item{i % 300},{rng.random() * 100:.2f},2024-01-{i % 28 + 1:02d}" for i in range(100_000)
+    ]
+    xml = "<root>" + "".join(
+        f'<item id="{i}"><name>n{i}</name><price>{i}.5</price></item>' for i in range(50_000)
+    ) + "</root>"
+    document = {"items": [{"id": i, "name": f"item{i}", "tags": ["a", "b"]} for i in range(50_000)]}
+    markdown = "\n\n".join(f"## Section {i}\n\n" + "Lorem ipsum dolor sit amet. " * 40 for i in range(500))
+    minified = ";".join(f"var a{i}=function(b){{return b*{i}}}" for i in range(20_000))
+    text_stream = b"BT /F1 12 Tf " + b" ".join(b"(Line %d of the document) Tj T*" % i for i in range(5_000)) + b" ET"
+    compressed = zlib.compress(text_stream)
+    pdf = b"%%PDF-1.4\n1 0 obj\n<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(compressed)
+    pdf += compressed + b"\nendstream\nendobj\n%%EOF"
+    source = "\n".join(f"export function f{i}(x: number) {{ return x * {i}; }}" for i in range(10_000))
+
+    return [
+        ("data.csv", "\n".join(csv_rows)),
+        ("data.xml", xml),
+        ("data.json", json.dumps(document)),
+        ("README.md", markdown),
+        ("bundle.js", minified),
+        ("report.pdf", base64.b64encode(pdf).decode()),
+        ("src/index.ts", source),
+    ]
+
+
+def run():
+    print(f"{'file':<16}{'extractor':<14}{'input chars':>12}{'est. tokens':>12}{'output chars':>14}{'ms/op':>10}")
+    for file_name, content in make_samples():
+        extractor = select_extractor(file_name, content)
+        estimate = plan_files([FileItem(filename=file_name, content=content)])[0].cost
+        output = extractor.extract_text(file_name, content, TOKEN_BUDGET)
+
+        runs = 5
+        seconds = timeit.timeit(lambda: extractor.extract_text(file_name, content, TOKEN_BUDGET), number=runs)
+        print(
+            f"{file_name:<16}{extractor.name:<14}{len(content):>12}{estimate:>12}"
+            f"{len(output):>14}{seconds / runs * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    run()
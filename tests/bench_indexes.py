@@ -0,0 +1,147 @@
+"""Micro-benchmark for the Studio snapshot indexes. Run from the repository root: python -m tests.bench_indexes"""
+import fnmatch
+import random
+import re
+import time
+import timeit
+
+from app.services.studio.indexes.codebase_search import CodebaseSearchIndex
+from app.services.studio.indexes.path_trie import PathTrie
+from app.services.studio.indexes.symbols import SymbolIndex
+from app.services.studio.indexes.trigram import TrigramIndex
+from app.services.studio.snapshot import ProjectSnapshot
+
+FILES = 3_000
+DEFINITIONS_PER_FILE = 10
+WORDS = [
+    "user", "account", "session", "token", "render", "button", "layout", "fetch", "cache", "route",
+    "profile", "order", "invoice", "payment", "theme", "modal", "form", "field", "submit", "query",
+]
+
+
+def make_snapshot() -> ProjectSnapshot:
+    rng = random.Random(0)
+    snapshot = ProjectSnapshot()
+    for file_number in range(FILES):
+        definitions = []
+        for number in range(DEFINITIONS_PER_FILE):
+            name = "".join(word.title() for word in rng.sample(WORDS, 3))
+            body = "\n".join(
+                f"  const {rng.choice(WORDS)}{i} = await {rng.choice(WORDS)}{rng.choice(WORDS).title()}({i});"
+                for i in range(12)
+            )
+            definitions.append(f"export function handle{name}{number}(input) {{\n{body}\n}}\n")
+        snapshot.write(f"src/{rng.choice(WORDS)}/{file_number}.ts", "\n".join(definitions))
+    return snapshot
+
+
+def report(name: str, seconds: float):
+    print(f"{name:<40} {seconds * 1000:9.2f} ms")
+
+
+def bench_codebase_search(snapshot: ProjectSnapshot):
+    start = time.perf_counter()
+    index = CodebaseSearchIndex.from_snapshot(snapshot)
+    report(f"codebase_search build ({len(index)} chunks)", time.perf_counter() - start)
+
+    queries = ["user session token", "handleInvoicePayment", "render modal form", "fetchCache"]
+    for query in queries:
+        index.search(query)  # build the per-term arrays once
+        seconds = min(timeit.repeat(lambda: index.search(query), number=20, repeat=3)) / 20
+        report(f"codebase_search query {query!r}", seconds)
+
+    path = next(iter(snapshot.files))
+    content = snapshot.files[path] + "\nexport function addedLater() {}\n"
+    start = time.perf_counter()
+    index.update(path, content)
+    report("codebase_search update one file", time.perf_counter() - start)
+
+
+def naive_grep(snapshot: ProjectSnapshot, pattern: str):
+    regex = re.compile(pattern)
+    return sorted(
+        path for path, content in snapshot.files.items()
+        if any(regex.search(line) for line in content.splitlines())
+    )
+
+
+def indexed_grep(snapshot: ProjectSnapshot, index: TrigramIndex, pattern: str):
+    regex = re.compile(pattern, re.MULTILINE)
+    candidates = index.candidates(pattern)
+    paths = snapshot.files if candidates is None else candidates
+    return sorted(path for path in paths if regex.search(snapshot.files[path]))
+
+
+def bench_grep(snapshot: ProjectSnapshot):
+    start = time.perf_counter()
+    index = TrigramIndex.from_snapshot(snapshot)
+    report("trigram build", time.perf_counter() - start)
+
+    patterns = ["handleInvoicePaymentTheme", r"const route\d+ = await", "cacheQuery|modalForm", r"\bpayment7\b"]
+    for pattern in patterns:
+        assert naive_grep(snapshot, pattern) == indexed_grep(snapshot, index, pattern), pattern
+        report(
+            f"grep naive   {pattern!r}",
+            min(timeit.repeat(lambda: naive_grep(snapshot, pattern), number=1, repeat=3)),
+        )
+        report(
+            f"grep indexed {pattern!r}",
+            min(timeit.repeat(lambda: indexed_grep(snapshot, index, pattern), number=5, repeat=3)) / 5,
+        )
+
+    path = next(iter(snapshot.files))
+    start = time.perf_counter()
+    index.update(path, snapshot.files[path] + "\nexport function addedLater() {}\n")
+    report("trigram update one file", time.perf_counter() - start)
+
+
+def bench_find(snapshot: ProjectSnapshot):
+    start = time.perf_counter()
+    trie = PathTrie.from_snapshot(snapshot)
+    report("path trie build", time.perf_counter() - start)
+
+    for pattern in ["src/user/*.ts", "17.ts", "src/*/12?.ts"]:
+        naive = sorted(
+            path for path in snapshot.files
+            if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(path.rsplit("/", 1)[-1], pattern)
+        )
+        assert naive == trie.glob(pattern), pattern
+        report(
+            f"find naive   {pattern!r}",
+            min(timeit.repeat(
+                lambda: [
+                    path for path in snapshot.files
+                    if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(path.rsplit("/", 1)[-1], pattern)
+                ],
+                number=5, repeat=3,
+            )) / 5,
+        )
+        report(f"find trie    {pattern!r}", min(timeit.repeat(lambda: trie.glob(pattern), number=5, repeat=3)) / 5)
+
+
+def bench_symbols(snapshot: ProjectSnapshot):
+    index = SymbolIndex(snapshot)
+    start = time.perf_counter()
+    count = sum(len(index.symbols(path)) for path in snapshot.files)
+    report(f"symbol tables ({count} symbols)", time.perf_counter() - start)
+
+    path = next(iter(snapshot.files))
+    name = index.symbols(path)[-1].name
+    report("symbol lookup", min(timeit.repeat(lambda: index.lookup(path, name), number=1000, repeat=3)) / 1000)
+
+    snapshot.write(path, snapshot.files[path] + "\nexport function addedLater() {}\n")
+    start = time.perf_counter()
+    index.lookup(path, "addedLater")
+    report("symbol reparse one changed file", time.perf_counter() - start)
+
+
+def main():
+    snapshot = make_snapshot()
+    bench_codebase_search(snapshot)
+    bench_grep(snapshot)
+    bench_find(snapshot)
+    bench_symbols(snapshot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Startup benchmark: import time of the app and of its prompt modules. Run from the repository root: python -m tests.bench_startup"""
+import statistics
+import subprocess
+import sys
+
+from app.components.prompts.registry import PROMPT_ASSETS
+
+RUNS = 7
+
+IMPORT_APP = "import runpy; runpy.run_path('__main__.py')"
+# What every cold start paid before the prompt registry: all prompt modules imported with the routers
+IMPORT_APP_EAGER = "".join(f"import {module}\n" for module, _ in PROMPT_ASSETS.values()) + IMPORT_APP
+TIMED = "import time; start = time.perf_counter()\n{code}\nprint(time.perf_counter() - start)"
+
+
+def run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True, check=True)
+
+
+def startup_seconds(code: str) -> float:
+    return statistics.median(float(run(TIMED.format(code=code)).stdout.split()[-1]) for _ in range(RUNS))
+
+
+def import_times(code: str, column: int = 1):
+    """(module, microseconds) of every import from python -X importtime, column 0 is self and 1 cumulative time."""
+    times = []
+    for line in run(code, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        *microseconds, module = line[len("import time:"):].split("|")
+        times.append((module.strip(), int(microseconds[column])))
+    return times
+
+
+def report(name: str, seconds: float):
+    print(f"{name:<48} {seconds * 1000:9.2f} ms")
+
+
+def main():
+    report("app import, prompts loaded lazily", startup_seconds(IMPORT_APP))
+    report("app import, all prompts loaded", startup_seconds(IMPORT_APP_EAGER))
+
+    # Self time, the tools module is the first to import openai types
+    eager = import_times(IMPORT_APP_EAGER, column=0)
+    lazy = {module for module, _ in import_times(IMPORT_APP)}
+    print("prompt modules:")
+    for module, microseconds in eager:
+        if module in {module for module, _ in PROMPT_ASSETS.values()}:
+            state = "imported at startup" if module in lazy else "deferred"
+            report(f"  {module[len('app.components.prompts.'):]} ({state})", microseconds / 1e6)
+
+    print("slowest top-level imports:")
+    top_level = [(module, microseconds) for module, microseconds in import_times(IMPORT_APP) if "." not in module]
+    for module, microseconds in sorted(top_level, key=lambda item: -item[1])[:10]:
+        report(f"  {module}", microseconds / 1e6)
+
+
+if __name__ == "__main__":
+    main()